@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Import time benchmark with a regression threshold
+
+Every run imports pypiano in a fresh interpreter with python -X importtime and reads the cumulative import time of the
+pypiano package from its report. The fastest of several runs is compared with a threshold and the slowest imported
+modules are listed. The benchmark also fails if modules that should only be imported on first use show up, such as
+mingus.midi.pyfluidsynth which loads libfluidsynth. Run from the repository root:
+
+    python benchmarks/bench_import_time.py --threshold-ms 250
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+NUMBER_OF_RUNS = 5
+# Generous default, so the benchmark only fails on clear regressions like importing pkg_resources again
+DEFAULT_THRESHOLD_MS = 250.0
+# Modules that must not be imported by import pypiano
+DEFERRED_MODULES = (
+    "pkg_resources",
+    "mingus.midi.fluidsynth",
+    "mingus.midi.pyfluidsynth",
+    "concurrent.futures.process",
+    "hashlib",
+)
+
+
+def import_times(module: str = "pypiano") -> Dict[str, Tuple[int, int]]:
+    """Import a module in a fresh interpreter and parse the -X importtime report
+
+    Returns
+        A dictionary mapping every imported module to its self and cumulative import time in microseconds
+    """
+    repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import {0}".format(module)],
+        cwd=repository_root,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS)
+    parser.add_argument("--runs", type=int, default=NUMBER_OF_RUNS)
+    args = parser.parse_args()
+
+    runs: List[Dict[str, Tuple[int, int]]] = [import_times() for _ in range(args.runs)]
+    fastest = min(runs, key=lambda times: times["pypiano"][1])
+    cumulative_ms = fastest["pypiano"][1] / 1000
+
+    print("import pypiano: {0:8.1f} ms (fastest of {1} runs)".format(cumulative_ms, args.runs))
+    print("slowest modules by self time:")
+    for name, (self_us, _) in sorted(fastest.items(), key=lambda item: item[1][0], reverse=True)[:10]:
+        print("    {0:8.1f} ms  {1}".format(self_us / 1000, name))
+
+    failures = ["{0} is imported eagerly".format(name) for name in DEFERRED_MODULES if name in fastest]
+    if cumulative_ms > args.threshold_ms:
+        failures.append("import time {0:.1f} ms exceeds {1:.1f} ms".format(cumulative_ms, args.threshold_ms))
+    for failure in failures:
+        print("FAIL: {0}".format(failure))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+pytest-benchmark suite for PianoKeyboard construction and lookups
+"""
+from mingus.containers import Note
+
+from pypiano.keyboard import PianoKeyboard
+
+KEY_NAMES = ["A-0", "C-4", "Db-4", "C#-4", "B#-3", "C-8"] * 100
+
+
+def bench_construction(benchmark):
+    benchmark(PianoKeyboard)
+
+
+def bench_lookup_index(benchmark):
+    keyboard = PianoKeyboard()
+    benchmark(lambda: [keyboard[index] for index in range(88)])
+
+
+def bench_lookup_string(benchmark):
+    keyboard = PianoKeyboard()
+    benchmark(lambda: [keyboard[name] for name in KEY_NAMES])
+
+
+def bench_lookup_note(benchmark):
+    keyboard = PianoKeyboard()
+    notes = [Note(name) for name in KEY_NAMES]
+    benchmark(lambda: [keyboard[note] for note in notes])
+
+
+def bench_key_indices(benchmark):
+    keyboard = PianoKeyboard()
+    benchmark(keyboard.key_indices, KEY_NAMES)
+
+
+def bench_distinct_key_names(benchmark):
+    keyboard = PianoKeyboard()
+    benchmark(lambda: keyboard.distinct_key_names)
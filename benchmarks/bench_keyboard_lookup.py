@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark comparing note string lookups on PianoKeyboard with the previous linear scan over all keys
+
+Run from the repository root:
+
+    python benchmarks/bench_keyboard_lookup.py
+"""
+import timeit
+from typing import Optional
+
+from pypiano.keyboard import PianoKeyboard
+
+NOTES = ("A-0", "C-4", "Db-4", "A#-6", "C-8", "G-0")
+NUMBER = 20000
+
+
+def legacy_scan(keyboard: PianoKeyboard, note: str) -> Optional[int]:
+    """Previous PianoKeyboard.__getitem__ behavior: rebuild full_note_string per key and substring match it"""
+    for key_index, piano_key in keyboard.keys.items():
+        full_note_string = "{first}-{octave}/{second}-{octave}".format(
+            first=piano_key.first_identity, second=piano_key.second_identity, octave=piano_key.octave
+        )
+        if note in full_note_string:
+            return key_index
+    return None
+
+
+def indexed_lookup(keyboard: PianoKeyboard, note: str) -> Optional[int]:
+    """Current PianoKeyboard.__getitem__ behavior: a single dictionary hit"""
+    try:
+        return keyboard[note]
+    except IndexError:
+        return None
+
+
+def main() -> None:
+    keyboard = PianoKeyboard()
+
+    for name, lookup in (("legacy scan", legacy_scan), ("note index", indexed_lookup)):
+        seconds = timeit.timeit(lambda: [lookup(keyboard, note) for note in NOTES], number=NUMBER)
+        print(
+            "{name:>12}: {per_lookup:8.3f} us per lookup".format(
+                name=name, per_lookup=seconds / (NUMBER * len(NOTES)) * 1e6
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark comparing PianoKeyboard instances with the previous per instance keyboard layout
+
+The previous implementation allocated 120 PianoKey objects with an instance __dict__ for every keyboard and kept 88
+of them. The benchmark measures the memory retained per keyboard with tracemalloc. Run from the repository root:
+
+    python benchmarks/bench_keyboard_memory.py
+"""
+import tracemalloc
+from typing import Callable, Dict, List
+
+from pypiano.keyboard import BASE_PIANO_OCTAVE_PATTERN, KEYBOARD_OFFSET, PianoKeyboard
+
+NUMBER_OF_INSTANCES = 500
+
+
+class LegacyPianoKey(object):
+    """Previous PianoKey layout with an instance __dict__"""
+
+    def __init__(self, first_identity: str, second_identity: str, octave: int, key_color: str) -> None:
+        self.first_identity = first_identity
+        self.second_identity = second_identity
+        self.octave = octave
+        self._key_color = key_color
+        self._key_index = None
+
+
+def legacy_keyboard() -> Dict[int, LegacyPianoKey]:
+    """Previous PianoKeyboard._create_keyboard_dict behavior"""
+    raw_piano_keyboard = []
+    for idx in range(10):
+        for jdx in range(12):
+            tmp_base_key = BASE_PIANO_OCTAVE_PATTERN[jdx]
+            raw_piano_keyboard.append(LegacyPianoKey(tmp_base_key.first, tmp_base_key.second, idx, tmp_base_key.color))
+
+    kb = {}
+    for index, key in enumerate(raw_piano_keyboard[KEYBOARD_OFFSET : KEYBOARD_OFFSET + 88]):
+        key._key_index = index
+        kb.update({index: key})
+    return kb
+
+
+def retained_bytes_per_instance(factory: Callable[[], object]) -> float:
+    """Measure memory retained per object created by factory"""
+    instances: List[object] = []
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(NUMBER_OF_INSTANCES):
+        instances.append(factory())
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(instances)
+
+
+def main() -> None:
+    legacy = retained_bytes_per_instance(legacy_keyboard)
+    shared = retained_bytes_per_instance(PianoKeyboard)
+    print("legacy keyboard: {0:10.1f} bytes per instance".format(legacy))
+    print("shared keyboard: {0:10.1f} bytes per instance".format(shared))
+    print("savings:         {0:10.1f} bytes per instance".format(legacy - shared))
+
+
+if __name__ == "__main__":
+    main()
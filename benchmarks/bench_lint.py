@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+pytest-benchmark suite for checking Tracks for invalid notes
+"""
+import pytest
+
+from pypiano.piano import Piano
+
+from conftest import TRACK_SIZES
+
+
+@pytest.fixture(scope="module")
+def piano():
+    # Lazy pianos never touch FluidSynth for linting
+    return Piano(lazy=True)
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES)
+def bench_lint_track(benchmark, piano, tracks, number_of_notes):
+    benchmark.pedantic(
+        piano._lint_music_container, args=(tracks[number_of_notes],), setup=piano.clear_lint_cache, rounds=20
+    )
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES)
+def bench_lint_track_cached(benchmark, piano, tracks, number_of_notes):
+    piano._lint_music_container(tracks[number_of_notes])
+    benchmark(piano._lint_music_container, tracks[number_of_notes])
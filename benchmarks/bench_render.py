@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+pytest-benchmark suite for offline rendering
+
+The real time factor, wall clock time divided by the duration of the rendered audio, is stored in the extra_info of
+every result. Rendering with a stub synthesizer measures the overhead of pypiano, rendering with FluidSynth is skipped
+if libfluidsynth can not be loaded.
+"""
+import pytest
+
+from pypiano.performance import compile_performance
+from pypiano.render import compile_events, render_events, WAV_SAMPLE_FREQUENCY
+
+from conftest import TRACK_SIZES
+
+
+def _store_real_time_factor(benchmark, frames: int) -> None:
+    benchmark.extra_info["frames"] = frames
+    # With --benchmark-disable the function runs once without collecting statistics
+    if getattr(benchmark, "stats", None) is not None:
+        benchmark.extra_info["real_time_factor"] = benchmark.stats.stats.mean / (frames / WAV_SAMPLE_FREQUENCY)
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES[:2])
+def bench_compile_events(benchmark, tracks, number_of_notes):
+    benchmark(compile_events, tracks[number_of_notes])
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES)
+def bench_compile_performance(benchmark, tracks, number_of_notes):
+    performance = benchmark(compile_performance, tracks[number_of_notes])
+    benchmark.extra_info["bytes_per_note"] = performance.nbytes / len(performance)
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES[:2])
+def bench_render_performance_stub_synth(benchmark, tracks, stub_synth, number_of_notes):
+    performance = compile_performance(tracks[number_of_notes])
+    # Events are generated from the arrays in every round
+    frames = benchmark(lambda: render_events(stub_synth, performance.events(), performance.end, lambda samples: None))
+    _store_real_time_factor(benchmark, frames)
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES[:2])
+def bench_render_stub_synth(benchmark, tracks, stub_synth, number_of_notes):
+    events, end = compile_events(tracks[number_of_notes])
+    frames = benchmark(render_events, stub_synth, events, end, lambda samples: None)
+    _store_real_time_factor(benchmark, frames)
+
+
+def bench_render_fluidsynth(benchmark, tracks):
+    pytest.importorskip("mingus.midi.pyfluidsynth", exc_type=ImportError)
+    from pypiano.piano import Piano
+
+    piano = Piano()
+    track = tracks[TRACK_SIZES[1]]
+    samples = benchmark.pedantic(piano.render, args=(track,), kwargs={"lint": False}, rounds=3)
+    _store_real_time_factor(benchmark, len(samples))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+pytest-benchmark suite for the conversion functions of pypiano.utils
+"""
+import pytest
+from mingus.containers import Note, NoteContainer
+
+from pypiano.utils import (
+    bar_to_note_string_list,
+    note_container_to_note_string_list,
+    note_to_string,
+    track_to_note_string_list,
+)
+
+from conftest import TRACK_SIZES
+
+
+def bench_note_to_string(benchmark):
+    benchmark(note_to_string, Note("C#-4"))
+
+
+def bench_note_container_to_note_string_list(benchmark):
+    benchmark(note_container_to_note_string_list, NoteContainer(["C-4", "E-4", "G-4", "B-4"]))
+
+
+def bench_bar_to_note_string_list(benchmark, tracks):
+    benchmark(bar_to_note_string_list, tracks[TRACK_SIZES[-1]][0])
+
+
+@pytest.mark.parametrize("number_of_notes", TRACK_SIZES)
+def bench_track_to_note_string_list(benchmark, tracks, number_of_notes):
+    benchmark(track_to_note_string_list, tracks[number_of_notes])
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures of the pytest-benchmark suite
+
+Run the suite from the repository root and store the results as JSON in .benchmarks/ to compare them between commits:
+
+    pytest benchmarks --benchmark-autosave
+    pytest-benchmark compare
+"""
+import numpy
+import pytest
+from mingus.containers import Bar, Track
+
+# Notes of the Tracks used by the lint and conversion benchmarks
+TRACK_SIZES = (10, 1000, 100000)
+
+
+class StubSynth(object):
+    """Synthesizer returning a constant block of samples, so render benchmarks measure the overhead of pypiano"""
+
+    def __init__(self) -> None:
+        self._samples = numpy.zeros(0, dtype=numpy.int16)
+
+    def noteon(self, chan, key, vel):
+        return 0
+
+    def noteoff(self, chan, key):
+        return 0
+
+    def get_samples(self, len):
+        if len * 2 != self._samples.size:
+            self._samples = numpy.ones(len * 2, dtype=numpy.int16)
+        return self._samples
+
+
+def make_track(number_of_notes: int) -> Track:
+    """Create a Track of quarter notes walking up and down the keyboard"""
+    notes = ["C", "D", "E", "F", "G", "A", "B"]
+    track = Track()
+    bar = Bar()
+    for index in range(number_of_notes):
+        if bar.is_full():
+            track.add_bar(bar)
+            bar = Bar()
+        bar.place_notes("{0}-{1}".format(notes[index % 7], 1 + index % 6), 4)
+    track.add_bar(bar)
+    return track
+
+
+@pytest.fixture(scope="session")
+def tracks():
+    """Tracks with TRACK_SIZES notes, created once per benchmark session"""
+    return {number_of_notes: make_track(number_of_notes) for number_of_notes in TRACK_SIZES}
+
+
+@pytest.fixture
+def stub_synth():
+    return StubSynth()
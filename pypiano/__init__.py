@@ -1,3 +1,27 @@
 from .piano import Piano
 
+# Public names imported on first access, so import pypiano does not pay for worker processes, hashing or MIDI files.
+# Maps every name to the module defining it
+_LAZY_EXPORTS = {
+    "render_batch": ".batch",
+    "RenderJob": ".batch",
+    "PianoSession": ".session",
+    "MidiFile": ".midi",
+    "write_midi_file": ".midi",
+    "Performance": ".performance",
+    "compile_performance": ".performance",
+    "PianoPool": ".pool",
+}
+
 __all__ = ["pypiano"]
+
+
+def __getattr__(name: str):
+    """Import the modules of lazily exported names when they are accessed as package attributes"""
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+
+        value = getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
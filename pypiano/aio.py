@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio native, non blocking playback of music containers
+"""
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import ContextManager, List, Optional, Set, Tuple, Union
+
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import PianoKey
+from .piano import Piano
+from .render import compile_events, send_event, MidiEvent, DEFAULT_BPM, NOTE_ON, WAV_SAMPLE_FREQUENCY
+
+logger = logging.getLogger("pypiano")
+
+
+class Playback(object):
+    """A music container being played on an event loop
+
+    Events are dispatched by a single timer callback scheduled with loop.call_at at the absolute time of the next
+    event, so a playback costs one timer handle on the loop regardless of its length and timing errors do not add up.
+    A Playback can be awaited and completes once the last event was dispatched. Cancelling the done future, for example
+    by cancelling a task awaiting the Playback, cancels the playback. If a lock is given, it is held while events are
+    sent to the synthesizer.
+
+    Attributes
+        done: asyncio.Future that is resolved when playback finished and cancelled when the playback is cancelled
+    """
+
+    def __init__(
+        self,
+        synth,
+        events: List[MidiEvent],
+        loop: asyncio.AbstractEventLoop,
+        lock: Optional[ContextManager] = None,
+    ) -> None:
+        self._synth = synth
+        self._events = events
+        self._loop = loop
+        self._lock = nullcontext() if lock is None else lock
+        self._position = 0
+        self._sounding: Set[Tuple[int, int]] = set()
+        self._start = loop.time()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._finished = False
+        self.done: asyncio.Future = loop.create_future()
+        self.done.add_done_callback(self._on_done)
+        self._step()
+
+    def __await__(self):
+        return self.done.__await__()
+
+    def _event_time(self, event: MidiEvent) -> float:
+        return self._start + event.sample / WAV_SAMPLE_FREQUENCY
+
+    def _step(self) -> None:
+        """Dispatch all events that are due and schedule the next call"""
+        now = self._loop.time()
+        with self._lock:
+            while self._position < len(self._events):
+                event = self._events[self._position]
+                event_time = self._event_time(event)
+                if event_time > now:
+                    self._handle = self._loop.call_at(event_time, self._step)
+                    return
+                send_event(self._synth, event)
+                if event.message == NOTE_ON:
+                    self._sounding.add((event.channel, event.key))
+                else:
+                    self._sounding.discard((event.channel, event.key))
+                self._position += 1
+
+        self._handle = None
+        self._finished = True
+        if not self.done.done():
+            self.done.set_result(None)
+
+    def _on_done(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.cancel()
+
+    def cancel(self) -> bool:
+        """Stop the playback and all notes it started that are still sounding
+
+        Returns
+            False if the playback already finished, True otherwise
+        """
+        if self._finished:
+            return False
+        self._finished = True
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        with self._lock:
+            for channel, key in self._sounding:
+                self._synth.noteoff(channel, key)
+        self._sounding.clear()
+        if not self.done.done():
+            self.done.cancel()
+        return True
+
+
+class AsyncPiano(object):
+    """asyncio wrapper around Piano for non blocking audio playback
+
+    Unlike Piano.play, playing a Bar or Track does not block the calling thread. Note on and note off events are
+    scheduled on the running event loop, so many playbacks can share one loop without a thread per playback.
+
+    Events are sent while holding the lock of the piano, so they never end up in a recording or render running on
+    another thread. While such a call holds the lock, due events wait for it and block the event loop, so use a
+    separate Piano to render from other threads during playback.
+
+    Attributes
+        piano: The wrapped Piano. If not given a new Piano is created from piano_kwargs
+    """
+
+    def __init__(self, piano: Optional[Piano] = None, **piano_kwargs) -> None:
+        self.piano = piano if piano is not None else Piano(**piano_kwargs)
+
+    def play_nowait(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        bpm: float = DEFAULT_BPM,
+        lint: bool = True,
+    ) -> Playback:
+        """Start playing a music container via audio output and return immediately
+
+        Must be called from a coroutine or callback running on an event loop.
+
+        Args
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            bpm: Initial tempo in quarter notes per minute
+            lint: If False the music container is not checked for invalid notes
+        Returns
+            A Playback that can be awaited or cancelled
+        """
+        if lint:
+            self.piano._lint_music_container(music_container)
+
+        events, _ = compile_events(music_container, bpm=bpm, sample_rate=WAV_SAMPLE_FREQUENCY)
+        self.piano._start_audio_output()
+        logger.debug("Scheduling %s events on the event loop", len(events))
+        return Playback(self.piano._synth, events, asyncio.get_running_loop(), self.piano._lock)
+
+    async def play(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        bpm: float = DEFAULT_BPM,
+        lint: bool = True,
+    ) -> None:
+        """Play a music container via audio output without blocking the event loop
+
+        Cancelling the awaiting task stops the playback and all notes it started.
+
+        Args
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            bpm: Initial tempo in quarter notes per minute
+            lint: If False the music container is not checked for invalid notes
+        """
+        await self.play_nowait(music_container, bpm=bpm, lint=lint)
+
+    @staticmethod
+    async def pause(seconds: float) -> None:
+        """Pause the calling coroutine for a given time without blocking the event loop
+
+        Args
+            seconds: Time to pause in seconds
+        """
+        await asyncio.sleep(seconds)
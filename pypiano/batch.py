@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Render many music containers in parallel on a pool of worker processes
+"""
+import logging
+import os
+import traceback
+from collections import namedtuple, deque
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+import numpy
+
+from .piano import Piano, DEFAULT_SOUND_FONTS
+
+# A single render job. instrument can be None to use the default instrument of the batch. If output is a path the
+# music container is recorded to a wav file, if it is None the samples are returned as NumPy array
+RenderJob = namedtuple("RenderJob", ["music_container", "instrument", "output"])
+
+# Result of a render job. index is the position of the job in the input. samples is only set for jobs without output
+# path. error is None on success and the formatted traceback of the exception raised by the job otherwise
+RenderResult = namedtuple("RenderResult", ["index", "job", "samples", "error"])
+
+logger = logging.getLogger("pypiano")
+
+# Piano of the current worker process, created once by _init_worker and reused for all jobs
+_worker_piano: Optional[Piano] = None
+_worker_instrument: Union[str, int, None] = None
+
+
+def _init_worker(sound_fonts_path: str, instrument: Union[str, int]) -> None:
+    """Create the Piano of a worker process, so sound fonts are loaded only once per process"""
+    global _worker_piano, _worker_instrument
+    _worker_piano = Piano(sound_fonts_path=sound_fonts_path, instrument=instrument)
+    _worker_instrument = instrument
+
+
+def _render_job(
+    index: int, job: RenderJob, record_seconds: Optional[float]
+) -> Tuple[int, Optional[numpy.ndarray], Optional[str]]:
+    """Render a single job with the Piano of the current worker process and capture any error
+
+    Returns
+        The index of the job, its samples and its error. The job itself is not sent back to the calling process
+    """
+    try:
+        instrument = _worker_instrument if job.instrument is None else job.instrument
+        if _worker_piano.instrument != instrument:
+            _worker_piano.load_instrument(instrument)
+
+        if job.output is None:
+            return index, _worker_piano.render(job.music_container, record_seconds), None
+
+        _worker_piano.play(job.music_container, recording_file=str(job.output), record_seconds=record_seconds)
+        return index, None, None
+    except Exception:
+        return index, None, traceback.format_exc()
+
+
+def render_batch(
+    jobs: Iterable[Union[RenderJob, Tuple]],
+    sound_fonts_path: Union[str, Path] = DEFAULT_SOUND_FONTS,
+    instrument: Union[str, int] = "Acoustic Grand Piano",
+    processes: Optional[int] = None,
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+    record_seconds: Optional[float] = None,
+) -> Iterator[RenderResult]:
+    """Render many music containers on a pool of worker processes
+
+    Every worker process creates one Piano, loads the sound fonts once and reuses it for all of its jobs. Jobs are
+    read lazily from jobs and at most max_pending jobs are in flight at any time, so arbitrarily large iterables can
+    be rendered with bounded memory. Exceptions raised by a job do not stop the batch, they are reported in the error
+    field of its result, as are errors passing a job or its result between processes. If a worker process dies or fails
+    to create its Piano, for example because the sound fonts can not be loaded, the pool breaks and the remaining jobs
+    report the BrokenProcessPool error instead.
+
+    Args
+        jobs: An iterable of RenderJob or (music_container, instrument, output) tuples
+        sound_fonts_path: Path to the sound fonts loaded by every worker process
+        instrument: Instrument used for jobs whose instrument is None
+        processes: Number of worker processes. Defaults to the number of CPUs. If 0 all jobs are rendered in the
+            calling process, which is useful for debugging
+        ordered: If True results are yielded in the order of jobs, otherwise as soon as they are completed
+        max_pending: Maximum number of submitted but not yet yielded jobs. Defaults to twice the number of processes
+        record_seconds: Passed on to Piano.play and Piano.render, see there
+    Returns
+        An iterator of RenderResult tuples
+    """
+    render_jobs = (RenderJob(*job) for job in jobs)
+
+    if processes == 0:
+        _init_worker(str(sound_fonts_path), instrument)
+        for index, job in enumerate(render_jobs):
+            _, samples, error = _render_job(index, job, record_seconds)
+            yield RenderResult(index, job, samples, error)
+        return
+
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or 2 * processes
+    logger.debug("Rendering batch on %s processes with at most %s pending jobs", processes, max_pending)
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(str(sound_fonts_path), instrument)
+    ) as executor:
+        pending: Deque[Future] = deque()
+        not_done: Set[Future] = set()
+        # Index and job of every pending future, so jobs lost with a broken pool are still reported
+        submitted: Dict[Future, Tuple[int, RenderJob]] = {}
+
+        for index, job in enumerate(render_jobs):
+            try:
+                future = executor.submit(_render_job, index, job, record_seconds)
+            except Exception as error:
+                # Like errors of running jobs, a broken pool is reported in the result of the job
+                future = Future()
+                future.set_exception(error)
+            pending.append(future)
+            not_done.add(future)
+            submitted[future] = (index, job)
+
+            while len(pending) >= max_pending:
+                yield from _collect(pending, not_done, submitted, ordered)
+
+        while pending:
+            yield from _collect(pending, not_done, submitted, ordered)
+
+
+def _result(future: Future, submitted: Dict[Future, Tuple[int, RenderJob]]) -> RenderResult:
+    """Get the result of a finished job or an error result if the job could not be run or its result not be received,
+    for example because the pool broke or the job could not be pickled"""
+    index, job = submitted.pop(future)
+    try:
+        _, samples, error = future.result()
+    except Exception:
+        return RenderResult(index, job, None, traceback.format_exc())
+    return RenderResult(index, job, samples, error)
+
+
+def _collect(
+    pending: Deque[Future], not_done: Set[Future], submitted: Dict[Future, Tuple[int, RenderJob]], ordered: bool
+) -> Iterator[RenderResult]:
+    """Wait for the next pending job, or for any pending job if results are not ordered, and yield its result"""
+    if ordered:
+        future = pending.popleft()
+        not_done.discard(future)
+        yield _result(future, submitted)
+        return
+
+    done, _ = wait(not_done, return_when=FIRST_COMPLETED)
+    for future in done:
+        not_done.discard(future)
+        pending.remove(future)
+        yield _result(future, submitted)
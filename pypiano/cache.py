@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Content addressed on disk cache of rendered recordings
+
+Recordings are stored as wav files named after a hash of everything that determines their samples: the compiled MIDI
+events, the instrument, the identity of the sound fonts, the sample rate and the length of the release tail. Rendering
+the same music container again serves a copy of the cached file, or optionally a hard link to it, instead of
+synthesizing it.
+
+Several processes can share one cache directory. Entries are written to a temporary file and atomically renamed into
+place, a cache hit links or copies into a temporary file next to the target which is then renamed over the target, and
+entries removed by another process are treated as misses. The least recently used entries are evicted once the cache
+exceeds its size cap, where the modification time of an entry records its last use.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy
+
+from .fonts import SoundFontKey
+from .render import MidiEvent
+
+logger = logging.getLogger("pypiano")
+
+# Changing how events are rendered, for example the silence detection of the release tail, must change this version
+# so existing entries are not served anymore
+CACHE_FORMAT_VERSION = 1
+# Default size cap of a RenderCache in bytes
+DEFAULT_MAX_BYTES = 1 << 30
+
+_ENTRY_SUFFIX = ".wav"
+_TEMPORARY_PREFIX = ".tmp-"
+
+# Statistics of a RenderCache. hits and misses are counted by the current process, size and entries describe the
+# cache directory shared by all processes as last seen by the current process
+RenderCacheInfo = namedtuple("RenderCacheInfo", ["hits", "misses", "max_bytes", "size", "entries"])
+
+
+def render_cache_key(
+    events: Union[List[MidiEvent], numpy.ndarray],
+    end: int,
+    instrument: Union[str, int],
+    sound_font: SoundFontKey,
+    sample_rate: int,
+    record_seconds: Optional[float],
+) -> str:
+    """Hash the canonical description of a recording
+
+    Args
+        events: Sorted list of MidiEvent tuples, see pypiano.render.compile_events, or an equivalent int64 array of
+            shape (events, 5), see pypiano.performance.Performance.event_array. Both give the same key
+        end: Sample offset where the music container ends
+        instrument: Instrument of the piano
+        sound_font: Identity of the sound fonts, see pypiano.fonts.sound_font_key
+        sample_rate: Sample rate of the recording
+        record_seconds: Length of the release tail or None for automatic length recordings
+    Returns
+        A hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    header = (CACHE_FORMAT_VERSION, tuple(sound_font), repr(instrument), sample_rate, repr(record_seconds), end)
+    digest.update(repr(header).encode("utf-8"))
+    digest.update(numpy.array(events, dtype=numpy.int64).reshape(-1, len(MidiEvent._fields)).tobytes())
+    return digest.hexdigest()
+
+
+class RenderCache(object):
+    """Size capped on disk cache of rendered wav files shared by threads and processes
+
+    Cache hits are copied by default. Hard linked files share their storage with the cache entry, so writing such a
+    file in place corrupts the cache entry. The cache and Piano.play with a render cache replace files, but Piano.play
+    without a render cache and wave.open with mode "wb" rewrite an existing file in place. Only pass link=True if
+    served files are never written to again.
+
+    Attributes
+        directory: Directory of the cache. It is created if it does not exist
+        max_bytes: Size cap of the cache in bytes
+        link: If True cache hits are served by hard link where possible, otherwise they are copied
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES, link: bool = False) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.link = link
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Size and number of entries as of the last scan plus entries stored since by this process
+        self._size, self._entries = self._scan()[:2]
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / (key + _ENTRY_SUFFIX)
+
+    def _scan(self) -> Tuple[int, int, List[Tuple[float, int, Path]]]:
+        """Get size, number of entries and (mtime, size, path) of all entries in the cache directory"""
+        entries = []
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(_ENTRY_SUFFIX) and not entry.name.startswith(_TEMPORARY_PREFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return sum(size for _, size, _ in entries), len(entries), entries
+
+    def _serve(self, source: Union[str, Path], target: Union[str, Path]) -> None:
+        """Link or copy source to a temporary file next to target and rename it over target"""
+        target = Path(target)
+        temporary = target.with_name(
+            "{0}{1}-{2}-{3}".format(_TEMPORARY_PREFIX, os.getpid(), threading.get_ident(), target.name)
+        )
+        try:
+            if self.link:
+                try:
+                    os.link(source, temporary)
+                except OSError:
+                    # Hard links are not supported by the file system or the target is on another device. A missing
+                    # source raises FileNotFoundError again while copying
+                    shutil.copyfile(source, temporary)
+            else:
+                shutil.copyfile(source, temporary)
+            os.replace(temporary, target)
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+
+    def fetch(self, key: str, target: Union[str, Path]) -> bool:
+        """Serve a cached recording to target
+
+        Returns
+            True on a cache hit, False if there is no entry for key
+        """
+        path = self._entry_path(key)
+        try:
+            self._serve(path, target)
+            # Mark the entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._misses += 1
+            return False
+
+        with self._lock:
+            self._hits += 1
+        logger.debug("Render cache hit %s", key)
+        return True
+
+    def store(self, key: str, render: Callable[[str], None], target: Union[str, Path, None] = None) -> Path:
+        """Render a recording into a new cache entry
+
+        Args
+            key: Key of the recording, see render_cache_key
+            render: Callable writing the wav file to the path it is passed
+            target: Optional path the new recording is served to like by fetch, without counting a cache hit
+        Returns
+            The path of the cache entry
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(exist_ok=True)
+        handle, temporary = tempfile.mkstemp(prefix=_TEMPORARY_PREFIX, suffix=_ENTRY_SUFFIX, dir=str(path.parent))
+        os.close(handle)
+        try:
+            render(temporary)
+            size = os.path.getsize(temporary)
+            # Serve the recording before it becomes visible to other processes, which could evict it right away
+            if target is not None:
+                self._serve(temporary, target)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        with self._lock:
+            self._size += size
+            self._entries += 1
+            evict = self._size > self.max_bytes
+        if evict:
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache is below its size cap"""
+        size, count, entries = self._scan()
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                # Already evicted by another process
+                pass
+            size -= entry_size
+            count -= 1
+            logger.debug("Evicted %s from render cache", path.name)
+        with self._lock:
+            self._size, self._entries = size, count
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters"""
+        for _, _, path in self._scan()[2]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._hits = self._misses = self._size = self._entries = 0
+
+    def info(self) -> RenderCacheInfo:
+        """Report hits, misses, size cap, size and number of entries"""
+        with self._lock:
+            return RenderCacheInfo(self._hits, self._misses, self.max_bytes, self._size, self._entries)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Process wide registry of loaded sound fonts
+
+FluidSynth parses and keeps a full copy of the samples of every loaded sound font, which takes seconds for a General
+MIDI sound font of a hundred megabytes. Font ids returned by FluidSynth are only valid for the synthesizer that loaded
+the font, so the registry remembers them per synthesizer and per file. Loading a file that is already loaded on the
+same synthesizer reuses its font id, and a font is only unloaded once the last user released it.
+
+Files are identified by their resolved path together with their modification time and size, so a sound font that was
+changed on disk is loaded again.
+"""
+import logging
+import threading
+import weakref
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Union
+
+logger = logging.getLogger("pypiano")
+
+# Identity of a sound font file. mtime_ns and size are None for files that can not be accessed, in which case loading
+# is left to FluidSynth, which reports the error
+SoundFontKey = namedtuple("SoundFontKey", ["path", "mtime_ns", "size"])
+
+# Statistics of a SoundFontRegistry similar to functools.lru_cache. hits counts loads served by an already loaded
+# font, misses loads that had to be done by FluidSynth, loaded the number of currently loaded fonts and unloads the
+# number of fonts unloaded after their last user released them
+SoundFontCacheInfo = namedtuple("SoundFontCacheInfo", ["hits", "misses", "loaded", "unloads"])
+
+
+def sound_font_key(sound_fonts_path: Union[str, Path]) -> SoundFontKey:
+    """Get the identity of a sound font file from its resolved path, modification time and size"""
+    path = Path(sound_fonts_path).resolve()
+    try:
+        stat = path.stat()
+    except OSError:
+        return SoundFontKey(str(path), None, None)
+    return SoundFontKey(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+class _LoadedSoundFont(object):
+    """A sound font loaded on one synthesizer together with the number of its users"""
+
+    __slots__ = ("sfid", "references")
+
+    def __init__(self, sfid: int) -> None:
+        self.sfid = sfid
+        self.references = 1
+
+
+class SoundFontRegistry(object):
+    """Reference counted sound fonts loaded on mingus.midi.fluidsynth.FluidSynthSequencer objects
+
+    Entries are stored per synthesizer in a weak dictionary, so they disappear together with their synthesizer even if
+    a Piano was dropped without releasing its sound fonts. All methods are thread safe.
+    """
+
+    def __init__(self) -> None:
+        self._fonts: "weakref.WeakKeyDictionary[object, Dict[SoundFontKey, _LoadedSoundFont]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._unloads = 0
+
+    def acquire(self, sequencer, sound_fonts_path: Union[str, Path]) -> SoundFontKey:
+        """Load a sound font on the synthesizer of a sequencer unless it is already loaded there
+
+        On return sequencer.sfid is the font id of the sound font, so programs can be selected from it.
+
+        Args
+            sequencer: A mingus.midi.fluidsynth.FluidSynthSequencer object
+            sound_fonts_path: Path to a *.sf2 file
+        Returns
+            The SoundFontKey which has to be passed to release once the sound font is no longer used
+        Raises
+            Exception: If FluidSynth could not load the sound font
+        """
+        key = sound_font_key(sound_fonts_path)
+
+        with self._lock:
+            fonts = self._fonts.setdefault(sequencer.fs, {})
+            loaded = fonts.get(key)
+            if loaded is not None:
+                loaded.references += 1
+                sequencer.sfid = loaded.sfid
+                self._hits += 1
+                logger.debug("Reusing sound fonts %s already loaded with id %s", key.path, loaded.sfid)
+                return key
+
+            if not sequencer.load_sound_font(str(sound_fonts_path)):
+                raise Exception("Could not load sound fonts from {file}".format(file=sound_fonts_path))
+            fonts[key] = _LoadedSoundFont(sequencer.sfid)
+            self._misses += 1
+            return key
+
+    def release(self, sequencer, key: SoundFontKey) -> None:
+        """Release a sound font acquired before and unload it from the synthesizer if it has no users left"""
+        with self._lock:
+            fonts = self._fonts.get(sequencer.fs, {})
+            loaded = fonts.get(key)
+            if loaded is None:
+                logger.debug("Sound fonts %s are not loaded", key.path)
+                return
+
+            loaded.references -= 1
+            if loaded.references == 0:
+                sequencer.fs.sfunload(loaded.sfid)
+                del fonts[key]
+                self._unloads += 1
+                logger.debug("Unloaded sound fonts %s with id %s", key.path, loaded.sfid)
+
+    def info(self) -> SoundFontCacheInfo:
+        """Report hits, misses, currently loaded sound fonts and unloads"""
+        with self._lock:
+            loaded = sum(len(fonts) for fonts in self._fonts.values())
+            return SoundFontCacheInfo(self._hits, self._misses, loaded, self._unloads)
+
+
+# Registry shared by all Piano objects of the process
+SOUND_FONTS = SoundFontRegistry()
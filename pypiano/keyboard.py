@@ -2,7 +2,9 @@
 """
 
 """
-from typing import Union, Dict, Optional, Set
+from typing import Union, FrozenSet, Iterable, Mapping, Optional
+from types import MappingProxyType
+import numpy
 from mingus.containers import Note
 from collections import namedtuple
 from .utils import note_to_string
@@ -24,10 +26,20 @@ BASE_PIANO_OCTAVE_PATTERN = (
     base_key("B", "C#", "white"),
 )
 
+# Position of A-0, the leftmost key of an 88 key piano, in a chromatic scale starting at C-0
+KEYBOARD_OFFSET = 9
+# MIDI note number of A-0, the leftmost key of an 88 key piano
+FIRST_MIDI_NUMBER = 21
+# Frequency of A-4 in Hz, see mingus.containers.Note.to_hertz
+STANDARD_PITCH = 440.0
+
 
 class PianoKey(object):
     """Class representing a single key on an 88 key piano keyboard
 
+    PianoKey objects are immutable records without an instance __dict__. The note strings of both identities are
+    computed once at construction.
+
     Attributes:
         first_identity: The first note identity of a given piano key
         second_identity: The second note identity of a given piano key
@@ -36,6 +48,24 @@ class PianoKey(object):
         key_index: The key index on where to find a given piano key on an piano keyboards from left to right
     """
 
+    __slots__ = (
+        "_first_identity",
+        "_second_identity",
+        "_octave",
+        "_key_color",
+        "_key_index",
+        "_first_note_string",
+        "_second_note_string",
+    )
+    # Annotations only declare the types of the slots, the values are set via object.__setattr__ in __init__
+    _first_identity: str
+    _second_identity: str
+    _octave: int
+    _key_color: str
+    _key_index: Optional[int]
+    _first_note_string: str
+    _second_note_string: str
+
     def __init__(
         self,
         first_identity: str,
@@ -44,11 +74,28 @@ class PianoKey(object):
         key_color: str,
         key_index: Optional[int] = None,
     ) -> None:
-        self.first_identity = first_identity
-        self.second_identity = second_identity
-        self.octave = octave
-        self.key_color = key_color
-        self.key_index = key_index
+        if key_color not in ("white", "black"):
+            raise ValueError("Key color can only be white or black")
+
+        object.__setattr__(self, "_first_identity", first_identity)
+        object.__setattr__(self, "_second_identity", second_identity)
+        object.__setattr__(self, "_octave", octave)
+        object.__setattr__(self, "_key_color", key_color)
+        object.__setattr__(self, "_key_index", key_index)
+        object.__setattr__(self, "_first_note_string", "{0}-{1}".format(first_identity, octave))
+        object.__setattr__(self, "_second_note_string", "{0}-{1}".format(second_identity, octave))
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("{0} objects are immutable".format(self.__class__.__name__))
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("{0} objects are immutable".format(self.__class__.__name__))
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (self._first_identity, self._second_identity, self._octave, self._key_color, self._key_index),
+        )
 
     def __repr__(self) -> str:
         return "{0}(first_identity={1},second_identity={2},octave={3},key_color={4},key_index={5})".format(
@@ -63,72 +110,79 @@ class PianoKey(object):
     def __getitem__(self, key: int) -> str:
         """Implementing index operator for PianoKey. Access the first or second note string by passing 0 or 1"""
         if key == 0:
-            return self.first_note_string
+            return self._first_note_string
         elif key == 1:
-            return self.second_note_string
+            return self._second_note_string
         else:
             raise IndexError("Out of range. PianoKey has only two indices")
 
     def __contains__(self, item: str) -> bool:
         """Check if a string representing a note matches one of the note identities of a given PianoKey"""
-        if item in self.full_note_string:
-            return True
-        else:
-            return False
+        return item == self._first_note_string or item == self._second_note_string
+
+    @property
+    def first_identity(self) -> str:
+        """Get the first note identity of a given PianoKey object"""
+        return self._first_identity
+
+    @property
+    def second_identity(self) -> str:
+        """Get the second note identity of a given PianoKey object"""
+        return self._second_identity
+
+    @property
+    def octave(self) -> int:
+        """Get the octave of a given PianoKey object"""
+        return self._octave
 
     @property
     def key_color(self) -> str:
         """Get key color of a given PianoKey object"""
         return self._key_color
 
-    @key_color.setter
-    def key_color(self, color: str) -> None:
-        """Set key color of a given PianoKey object"""
-        if color not in ("white", "black"):
-            raise ValueError("Key color can only be white or black")
-        self._key_color = color
-
     @property
     def key_index(self) -> int:
         """Get key index of a given PianoKey object"""
         return self._key_index
 
-    @key_index.setter
-    def key_index(self, key_index: int) -> None:
-        """Set key index of a given PianoKey object"""
-        self._key_index = key_index
-
     @property
     def full_note_string(self) -> str:
         """Get both PianoKey note identities as a combined string"""
-        return "{first}-{octave}/{second}-{octave}".format(
-            first=self.first_identity, second=self.second_identity, octave=self.octave
-        )
+        return "{first}/{second}".format(first=self._first_note_string, second=self._second_note_string)
 
     @property
     def first_note_string(self) -> str:
         """Get the first identity of a given piano key as am mingus.containers.Note"""
-        return "{first}-{octave}".format(first=self.first_identity, octave=self.octave)
+        return self._first_note_string
 
     @property
     def second_note_string(self) -> str:
         """Get the second identity of a given piano key as am mingus.containers.Note"""
-        return "{first}-{octave}".format(first=self.first_identity, octave=self.octave)
+        return self._second_note_string
 
     @property
     def first_note(self) -> Note:
         """Get the first identity of the piano key as a mingus.containers.Note"""
-        return Note("{first}-{octave}".format(first=self.first_identity, octave=self.octave))
+        return Note(self._first_identity, self._octave)
 
     @property
     def second_note(self) -> Note:
         """Get the second identity of the piano key as a mingus.containers.Note"""
-        return Note("{second}-{octave}".format(second=self.second_identity, octave=self.octave))
+        return Note(self._second_identity, self._octave)
+
+    @property
+    def midi_number(self) -> int:
+        """Get the MIDI note number of a given PianoKey"""
+        if self._key_index is None:
+            return int(self.first_note) + 12
+        return self._key_index + FIRST_MIDI_NUMBER
 
     @property
     def frequency(self) -> float:
         """Get frequency of a given PianoKey. See docstring of mingus.containers.Note.to_hertz for more details"""
-        return self.first_note.to_hertz()
+        if self._key_index is None:
+            return self.first_note.to_hertz()
+        return float(KEY_FREQUENCIES[self._key_index])
 
     def get_as_note(self, identity: str = "first") -> Note:
         """Get first or second PianoKey identity as a mingus.containers.Note
@@ -160,23 +214,34 @@ class PianoKey(object):
             ValueError: If identity is not 'first' or 'second'
         """
         if identity == "first":
-            return "{note}-{octave}".format(note=self.first_identity, octave=self.octave)
+            return self._first_note_string
         elif identity == "second":
-            return "{note}-{octave}".format(note=self.second_identity, octave=self.octave)
+            return self._second_note_string
         else:
             raise ValueError("Invalid identity parameter - Must be 'first' or 'second'. Got {0}".format(identity))
 
 
 class PianoKeyboard(object):
-    """Class representing a 88 key piano keyboard"""
+    """Class representing a 88 key piano keyboard
+
+    The key layout is immutable and built once per process. All PianoKeyboard objects share it, so creating a
+    keyboard does not allocate any PianoKey objects.
+    """
 
     NUMBER_OF_KEYS: int = 88
     NUMBER_OF_WHITE_KEYS: int = 52
     NUMBER_OF_BLACK_KEYS: int = 36
 
+    __slots__ = ("_keyboard", "_white_keys", "_black_keys")
+
     def __init__(self) -> None:
         """ """
-        self._keyboard = PianoKeyboard._create_keyboard_dict()
+        self._keyboard = KEYBOARD_LAYOUT
+        self._white_keys = WHITE_KEYS
+        self._black_keys = BLACK_KEYS
+
+    def __reduce__(self):
+        return (self.__class__, ())
 
     def __repr__(self) -> str:
         return "{0}(keys={1},white_keys={2},black_keys={3},first_key={4},last_key={5})".format(
@@ -188,16 +253,17 @@ class PianoKeyboard(object):
             self._keyboard[87].full_note_string,
         )
 
-    def __getitem__(self, key: Union[int, str]) -> Union[PianoKey, int]:
+    def __getitem__(self, key: Union[int, str, Note]) -> Union[PianoKey, int]:
         """Defines indexing behavior for PianoKeyboard objects
 
         You can pass in an integer referring to the key index on a piano keyboard from left to right to receive
-        the corresponding PianoKey object. Alternatively, you can pass in a string indicating a note to receive the
-        corresponding key index on the piano keyboard from left to right.
+        the corresponding PianoKey object. Alternatively, you can pass in a string indicating a note or a
+        mingus.containers.Note to receive the corresponding key index on the piano keyboard from left to right. Note
+        strings are matched exactly against both identities of a key via the shared NOTE_INDEX table.
 
         Args:
-            key: An integer between 0 and 87 or a string indicating a note following the pattern:
-                 <NOTE_NAME><ACCIDENTAL>-<OCTAVE>, so for example C-1, A#-1, Bb-2.
+            key: An integer between 0 and 87, a mingus.containers.Note or a string indicating a note following the
+                 pattern: <NOTE_NAME><ACCIDENTAL>-<OCTAVE>, so for example C-1, A#-1, Bb-2.
 
         Returns:
             PianoKey object if key is an integer or an integer between 0 and 87 if key is a note string.
@@ -213,16 +279,17 @@ class PianoKeyboard(object):
                     "There are only 88 keys on a piano. key must be an integer between 0 and 87. Got {0}".format(key)
                 )
             return self._keyboard[key]
-        else:
-            for key_index in self._keyboard.keys():
-                if key in self._keyboard[key_index]:
-                    return key_index
 
+        if isinstance(key, Note):
+            key = note_to_string(key)
+        try:
+            return NOTE_INDEX[key]
+        except KeyError:
             raise IndexError(
                 "{key} is not a valid note on a piano. Please provide a valid Note between A-0 and C-8/B#-8".format(
                     key=key
                 )
-            )
+            ) from None
 
     def __iter__(self):
         """Define iterating behavior for PianoKeyboard - Yield PianoKeys from left to right"""
@@ -240,67 +307,161 @@ class PianoKeyboard(object):
         """
         if isinstance(item, Note):
             item = note_to_string(item)
-        return item in self.distinct_key_names
+        return item in NOTE_INDEX
 
     def __len__(self):
         """Define the len of the keyboard as the number of keys"""
         return len(self._keyboard)
 
     @staticmethod
-    def _create_keyboard_dict() -> Dict[int, PianoKey]:
+    def _create_keyboard_dict() -> Mapping[int, PianoKey]:
         """Method to generate piano dictionary
 
-        Method generates a piano dictionary with key_index from left to right as its' key and a corresponding
-        PianoKey object as Value
+        Method generates a read only piano dictionary with key_index from left to right as its' key and a corresponding
+        PianoKey object as Value. Only the 88 keys of the piano are created.
         """
-        raw_piano_keyboard = []
-        for idx in range(10):
-            for jdx in range(12):
-                tmp_base_key = BASE_PIANO_OCTAVE_PATTERN[jdx]
-                current_key = PianoKey(tmp_base_key.first, tmp_base_key.second, idx, tmp_base_key.color)
-                raw_piano_keyboard.append(current_key)
-
         kb = {}
-        for index, key in enumerate(raw_piano_keyboard[9:97]):
-            key.key_index = index
-            kb.update({index: key})
+        for key_index in range(PianoKeyboard.NUMBER_OF_KEYS):
+            octave, position = divmod(key_index + KEYBOARD_OFFSET, 12)
+            base = BASE_PIANO_OCTAVE_PATTERN[position]
+            kb[key_index] = PianoKey(base.first, base.second, octave, base.color, key_index)
 
-        return kb
+        return MappingProxyType(kb)
 
     @property
-    def distinct_key_names(self) -> Set[str]:
+    def distinct_key_names(self) -> FrozenSet[str]:
         """Get all distinct key names / note names on the piano keyboard
 
         Retrieves a set of distinct notes that can be found an a piano with 88 keys. Returned note names follow the
-        mingus note naming convention: <NOTE_NAME><ACCIDENTAL>-<OCTAVE>, so for example C-1, A#-1, Bb-2, etc.
+        mingus note naming convention: <NOTE_NAME><ACCIDENTAL>-<OCTAVE>, so for example C-1, A#-1, Bb-2, etc. Both
+        identities of every key are included. The set is computed once per process and shared by all keyboards.
 
         Returns:
-          A set containing note names. Note that the key names in the returned set are not in order as you find them on
-          an an actual piano keyboard.
+          A frozenset containing note names. Note that the key names in the returned set are not in order as you find
+          them on an an actual piano keyboard.
 
           example:
 
-          {'A#-1','A#-2','A#-3','A#-4','A#-5','A#-6','A#-7','A#-8','A-1','A-2','A-3','A-4','A-5','A-6',...}
+          frozenset({'A#-1','A#-2','A#-3','A#-4','A#-5','A#-6','A#-7','A#-8','A-1','A-2','A-3','A-4','A-5',...})
 
         """
-        available_keys = []
+        return DISTINCT_KEY_NAMES
 
-        for k in self._keyboard:
-            tmp_key = self._keyboard[k]
-            available_keys.extend([tmp_key[0], tmp_key[1]])
+    @property
+    def keys(self) -> Mapping[int, PianoKey]:
+        return self._keyboard
 
-        return set(available_keys)
+    @property
+    def frequencies(self) -> numpy.ndarray:
+        """Return a read only array with the frequency in Hz of every key from left to right"""
+        return KEY_FREQUENCIES
 
     @property
-    def keys(self) -> Dict[int, PianoKey]:
-        return self._keyboard
+    def midi_numbers(self) -> numpy.ndarray:
+        """Return a read only array with the MIDI note number of every key from left to right"""
+        return KEY_MIDI_NUMBERS
+
+    @property
+    def key_colors(self) -> numpy.ndarray:
+        """Return a read only array with the color of every key from left to right"""
+        return KEY_COLORS
+
+    def key_indices(self, keys: Union[numpy.ndarray, Iterable[Union[int, str, Note]]]) -> numpy.ndarray:
+        """Map a batch of key indices, note strings or mingus.containers.Note objects to key indices
+
+        Note strings are resolved once per distinct value, so large batches with repeated notes cost a single
+        dictionary lookup per distinct note plus one vectorized gather.
+
+        Args
+            keys: An array like of integers between 0 and 87, note strings or mingus.containers.Note objects. Iterables
+                may mix key indices and notes
+        Returns
+            An integer array with the key index of every element in keys
+        Raises
+            IndexError: If a key index is out of range or a note is not on a piano keyboard
+        """
+        if not isinstance(keys, numpy.ndarray):
+            items = [note_to_string(k) if isinstance(k, Note) else k for k in keys]
+            is_name = numpy.fromiter((isinstance(k, str) for k in items), dtype=bool, count=len(items))
+            if 0 < is_name.sum() < len(items):
+                # numpy.asarray would turn the key indices of a mixed batch into strings, so both kinds are split
+                indices = numpy.empty(len(items), dtype=numpy.intp)
+                indices[~is_name] = self.key_indices([k for k in items if not isinstance(k, str)])
+                indices[is_name] = self.key_indices([k for k in items if isinstance(k, str)])
+                return indices
+            keys = numpy.asarray(items)
+
+        if keys.size == 0:
+            return numpy.empty(keys.shape, dtype=numpy.intp)
+
+        if keys.dtype.kind in "iu":
+            if keys.min() < 0 or keys.max() >= self.NUMBER_OF_KEYS:
+                raise IndexError("There are only 88 keys on a piano. Key indices must be integers between 0 and 87")
+            return keys.astype(numpy.intp)
+
+        distinct_keys, inverse = numpy.unique(keys, return_inverse=True)
+        distinct_indices = numpy.fromiter(
+            (self[str(k)] for k in distinct_keys), dtype=numpy.intp, count=len(distinct_keys)
+        )
+        return distinct_indices[inverse].reshape(keys.shape)
+
+    def to_frequencies(self, keys: Union[numpy.ndarray, Iterable[Union[int, str, Note]]]) -> numpy.ndarray:
+        """Map a batch of key indices, note strings or mingus.containers.Note objects to frequencies in Hz
+
+        See docstring of PianoKeyboard.key_indices for accepted input
+        """
+        return KEY_FREQUENCIES[self.key_indices(keys)]
+
+    def to_midi_numbers(self, keys: Union[numpy.ndarray, Iterable[Union[int, str, Note]]]) -> numpy.ndarray:
+        """Map a batch of key indices, note strings or mingus.containers.Note objects to MIDI note numbers
+
+        See docstring of PianoKeyboard.key_indices for accepted input
+        """
+        return KEY_MIDI_NUMBERS[self.key_indices(keys)]
 
     @property
-    def white_keys(self) -> Dict[int, PianoKey]:
-        """Return a sub dictionary of all black keys from keyboard"""
-        return {key: piano_key for key, piano_key in self._keyboard.items() if "white" in piano_key.key_color}
+    def white_keys(self) -> Mapping[int, PianoKey]:
+        """Return a read only sub dictionary of all white keys from keyboard"""
+        return self._white_keys
 
     @property
-    def black_keys(self) -> Dict[int, PianoKey]:
-        """Return a sub dictionary of all black keys from keyboard"""
-        return {key: piano_key for key, piano_key in self._keyboard.items() if "black" in piano_key.key_color}
+    def black_keys(self) -> Mapping[int, PianoKey]:
+        """Return a read only sub dictionary of all black keys from keyboard"""
+        return self._black_keys
+
+
+def _create_note_index() -> Mapping[str, int]:
+    """Create an immutable mapping from note strings to key indices
+
+    Both identities of every key are included, so for example C#-4 and Db-4 map to the same key index. If a note
+    string is the first identity of one key and the second identity of another key, the first identity wins.
+    """
+    first_identities = {piano_key.first_note_string: key_index for key_index, piano_key in KEYBOARD_LAYOUT.items()}
+    note_index = {piano_key.second_note_string: key_index for key_index, piano_key in KEYBOARD_LAYOUT.items()}
+    note_index.update(first_identities)
+    return MappingProxyType(note_index)
+
+
+# Key layout and derived tables, built once per process and shared by all PianoKeyboard objects
+KEYBOARD_LAYOUT = PianoKeyboard._create_keyboard_dict()
+WHITE_KEYS: Mapping[int, PianoKey] = MappingProxyType(
+    {key_index: piano_key for key_index, piano_key in KEYBOARD_LAYOUT.items() if piano_key.key_color == "white"}
+)
+BLACK_KEYS: Mapping[int, PianoKey] = MappingProxyType(
+    {key_index: piano_key for key_index, piano_key in KEYBOARD_LAYOUT.items() if piano_key.key_color == "black"}
+)
+NOTE_INDEX = _create_note_index()
+DISTINCT_KEY_NAMES: FrozenSet[str] = frozenset(NOTE_INDEX)
+
+
+def _read_only(array: numpy.ndarray) -> numpy.ndarray:
+    """Mark a shared lookup table as read only"""
+    array.flags.writeable = False
+    return array
+
+
+# Vectorized per key lookup tables, indexed by key index from left to right
+KEY_MIDI_NUMBERS = _read_only(numpy.arange(FIRST_MIDI_NUMBER, FIRST_MIDI_NUMBER + PianoKeyboard.NUMBER_OF_KEYS))
+# 69 is the MIDI note number of A-4, which is tuned to the standard pitch
+KEY_FREQUENCIES = _read_only(STANDARD_PITCH * 2.0 ** ((KEY_MIDI_NUMBERS - 69) / 12.0))
+KEY_COLORS = _read_only(numpy.array([KEYBOARD_LAYOUT[k].key_color for k in range(PianoKeyboard.NUMBER_OF_KEYS)]))
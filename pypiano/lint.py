@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming validation of music containers against the range of an 88 key piano
+"""
+import threading
+import weakref
+from collections import namedtuple, OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
+
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import KEYBOARD_LAYOUT, PianoKey, PianoKeyboard, FIRST_MIDI_NUMBER
+from .utils import note_to_string
+
+if TYPE_CHECKING:
+    # pypiano.render imports midi_number from this module, so MidiEvent is only imported for type checking
+    from .render import MidiEvent
+
+LAST_MIDI_NUMBER = FIRST_MIDI_NUMBER + PianoKeyboard.NUMBER_OF_KEYS - 1
+# (note name, octave) pairs of both identities of every key, so notes are matched like PianoKeyboard matches note
+# strings without building the strings. Enharmonic names like B#-8 are resolved by the key table, not by MIDI number
+KEY_NAMES = frozenset(
+    pair
+    for piano_key in KEYBOARD_LAYOUT.values()
+    for pair in ((piano_key.first_identity, piano_key.octave), (piano_key.second_identity, piano_key.octave))
+)
+
+# An invalid note together with its position in the music container. bar is the index of the bar in a Track (0 for a
+# Bar) and beat is the position within that bar as mingus stores it. Both are None for Notes and NoteContainers
+InvalidNote = namedtuple("InvalidNote", ["note", "bar", "beat"])
+
+
+def midi_number(note: Note) -> int:
+    """Get the MIDI note number of a mingus.containers.Note without building any strings"""
+    return int(note) + 12
+
+
+def _iter_bar(bar: Bar, bar_index: int) -> Iterator[Tuple[Note, Optional[int], Optional[float]]]:
+    """Yield all notes of a mingus.containers.Bar with their position. Rests are skipped"""
+    for beat, _, notes in bar.bar:
+        if notes is None:
+            continue
+        for note in notes:
+            yield note, bar_index, beat
+
+
+def iter_notes(
+    music_container: Union[str, Note, NoteContainer, Bar, Track]
+) -> Iterator[Tuple[Note, Optional[int], Optional[float]]]:
+    """Walk a music container once and yield every note with its position
+
+    Args
+        music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music. Strings
+            are parsed as mingus.containers.Note
+    Returns
+        An iterator of (note, bar, beat) tuples. See InvalidNote for the meaning of bar and beat
+    Raises
+        TypeError: If music_container is not a supported music container
+    """
+    if isinstance(music_container, str):
+        yield Note(music_container), None, None
+    elif isinstance(music_container, Note):
+        yield music_container, None, None
+    elif isinstance(music_container, NoteContainer):
+        for note in music_container.notes:
+            yield note, None, None
+    elif isinstance(music_container, Bar):
+        yield from _iter_bar(music_container, 0)
+    elif isinstance(music_container, Track):
+        for bar_index, bar in enumerate(music_container.bars):
+            yield from _iter_bar(bar, bar_index)
+    else:
+        raise TypeError("Unsupported music container of type {0}".format(type(music_container)))
+
+
+def find_invalid_notes(
+    music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey], collect_all: bool = False
+) -> List[InvalidNote]:
+    """Find notes in a music container that can't be found on a piano with 88 keys
+
+    Every note is looked up by name and octave in the key table of the keyboard, so a note is valid exactly if
+    PianoKeyboard accepts it and no intermediate strings or sets are built. Integers are interpreted as key indices
+    like in PianoKeyboard.__getitem__.
+
+    Args
+        music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+        collect_all: If False the search stops at the first invalid note, otherwise all invalid notes are returned
+    Returns
+        A list of InvalidNote tuples in the order they appear in the music container. Empty if all notes are valid
+    """
+    if isinstance(music_container, PianoKey):
+        if FIRST_MIDI_NUMBER <= music_container.midi_number <= LAST_MIDI_NUMBER:
+            return []
+        return [InvalidNote(music_container, None, None)]
+
+    if isinstance(music_container, int):
+        if 0 <= music_container < PianoKeyboard.NUMBER_OF_KEYS:
+            return []
+        return [InvalidNote(music_container, None, None)]
+
+    invalid_notes = []
+    for note, bar, beat in iter_notes(music_container):
+        if (note.name, note.octave) not in KEY_NAMES:
+            invalid_notes.append(InvalidNote(note, bar, beat))
+            if not collect_all:
+                break
+
+    return invalid_notes
+
+
+# A MIDI event with a key that can't be found on a piano with 88 keys together with its position in the event stream,
+# or for pypiano.performance.Performance the note on event of an invalid note and the index of the note
+InvalidEvent = namedtuple("InvalidEvent", ["event", "index"])
+
+
+def find_invalid_events(events: Iterable["MidiEvent"], collect_all: bool = False) -> List[InvalidEvent]:
+    """Find MIDI events with keys that can't be found on a piano with 88 keys
+
+    Works on any iterable of pypiano.render.MidiEvent tuples, such as compiled music containers or the events of a
+    pypiano.midi.MidiFile, which are consumed while they are checked.
+
+    Args
+        events: An iterable of MidiEvent tuples
+        collect_all: If False the search stops at the first invalid event, otherwise all invalid events are returned
+    Returns
+        A list of InvalidEvent tuples in the order they appear in events. Empty if all events are valid
+    """
+    invalid_events = []
+    for index, event in enumerate(events):
+        if not FIRST_MIDI_NUMBER <= event.key <= LAST_MIDI_NUMBER:
+            invalid_events.append(InvalidEvent(event, index))
+            if not collect_all:
+                break
+
+    return invalid_events
+
+
+def format_invalid_events(invalid_events: List[InvalidEvent]) -> str:
+    """Format a list of InvalidEvent tuples for error messages"""
+    return ", ".join(
+        "MIDI key {0} (event {1}, sample {2})".format(invalid.event.key, invalid.index, invalid.event.sample)
+        for invalid in invalid_events
+    )
+
+
+def format_invalid_notes(invalid_notes: List[InvalidNote]) -> str:
+    """Format a list of InvalidNote tuples for error messages"""
+    formatted = []
+    for invalid_note in invalid_notes:
+        note = invalid_note.note
+        name = note_to_string(note) if isinstance(note, Note) else str(note)
+        if invalid_note.bar is None:
+            formatted.append(name)
+        else:
+            formatted.append("{0} (bar {1}, beat {2})".format(name, invalid_note.bar, invalid_note.beat))
+    return ", ".join(formatted)
+
+
+LintCacheInfo = namedtuple("LintCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def fingerprint(music_container: Union[Bar, Track]) -> Optional[Tuple]:
+    """Compute a cheap structural fingerprint of a mingus.containers.Bar or mingus.containers.Track
+
+    The fingerprint records the identity and the number of notes of every note container, so it changes whenever bars
+    or note containers are added, removed or replaced and whenever notes are added to or removed from a note container.
+    It costs a single pass over the beats of all bars and does not visit any notes. Notes that are modified in place,
+    for example via mingus.containers.Note.transpose, do not change the fingerprint.
+
+    Returns
+        A hashable fingerprint or None if the music container is not cacheable
+    """
+    if isinstance(music_container, Bar):
+        return _bar_fingerprint(music_container)
+    elif isinstance(music_container, Track):
+        return tuple((id(bar),) + _bar_fingerprint(bar) for bar in music_container.bars)
+    return None
+
+
+def _bar_fingerprint(bar: Bar) -> Tuple:
+    """Fingerprint a single bar by the identity and size of its note containers, see fingerprint"""
+    return (bar.current_beat, id(bar.bar)) + tuple(
+        (id(notes), 0 if notes is None else len(notes)) for _, _, notes in bar.bar
+    )
+
+
+class LintCache(object):
+    """Bounded LRU cache of music containers that passed validation
+
+    Bars and Tracks are remembered by identity together with their fingerprint, so a container that was validated
+    once is not walked again until it changes structurally. All other music containers are cheap to check and are
+    always validated. Only containers without invalid notes are cached. A LintCache can be shared by several threads,
+    music containers are validated without holding its lock.
+
+    Attributes
+        maxsize: Maximum number of cached music containers. The least recently used container is evicted first
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer. Got {0}".format(maxsize))
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[int, Tuple[weakref.ref, Tuple]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find_invalid_notes(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        collect_all: bool = False,
+    ) -> List[InvalidNote]:
+        """Cached version of pypiano.lint.find_invalid_notes"""
+        container_fingerprint = fingerprint(music_container)
+        if container_fingerprint is None:
+            return find_invalid_notes(music_container, collect_all=collect_all)
+
+        key = id(music_container)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is music_container and entry[1] == container_fingerprint:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return []
+            self._misses += 1
+
+        invalid_notes = find_invalid_notes(music_container, collect_all=collect_all)
+        if not invalid_notes:
+            with self._lock:
+                self._entries[key] = (weakref.ref(music_container), container_fingerprint)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return invalid_notes
+
+    def clear(self) -> None:
+        """Remove all cached music containers and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> LintCacheInfo:
+        """Get hit and miss counters and the size of the cache"""
+        with self._lock:
+            return LintCacheInfo(self._hits, self._misses, self.maxsize, len(self._entries))
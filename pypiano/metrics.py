@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Pluggable timing metrics for the stages of playing and rendering music containers
+
+Piano reports the wall clock time of its stages to a metrics collector, which is any callable accepting a StageMetric.
+Collectors are scoped with contextvars, so concurrent requests of a server, threads or asyncio tasks can collect their
+own metrics, and a process wide default collector can be set for exporters such as Prometheus:
+
+    recorder = MetricsRecorder()
+    with collect_metrics(recorder):
+        piano.render(track)
+    recorder.totals()
+
+Without a collector measuring a stage costs a single context variable lookup.
+"""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .render import WAV_SAMPLE_FREQUENCY
+
+# Names of the measured stages
+LINT = "lint"
+DRIVER_START = "driver_start"
+SOUND_FONT_LOAD = "sound_font_load"
+RENDER = "render"
+WAV_WRITE = "wav_write"
+# Time spent waiting for a free piano of a pypiano.pool.PianoPool
+POOL_WAIT = "pool_wait"
+
+# Timing of a single stage. frames is the number of rendered stereo frames for stages producing audio and None
+# otherwise. real_time_factor is the wall clock time divided by the duration of the rendered audio, so values below 1
+# are faster than realtime. It is None for stages without audio
+StageMetric = namedtuple("StageMetric", ["stage", "seconds", "frames", "real_time_factor"])
+
+MetricsCollector = Callable[[StageMetric], None]
+
+_default_collector: Optional[MetricsCollector] = None
+_collector: ContextVar[Optional[MetricsCollector]] = ContextVar("pypiano_metrics_collector", default=None)
+
+
+def set_default_collector(collector: Optional[MetricsCollector]) -> None:
+    """Set the collector used in all contexts without a collector of their own, or None to disable it"""
+    global _default_collector
+    _default_collector = collector
+
+
+def current_collector() -> Optional[MetricsCollector]:
+    """Get the collector of the current context or the default collector"""
+    collector = _collector.get()
+    return collector if collector is not None else _default_collector
+
+
+@contextmanager
+def collect_metrics(collector: MetricsCollector) -> Iterator[MetricsCollector]:
+    """Send the metrics of all stages run in the current context to collector until the with block is left"""
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+def record(stage: str, seconds: float, frames: Optional[int] = None, sample_rate: int = WAV_SAMPLE_FREQUENCY) -> None:
+    """Send the timing of a stage to the current collector, if any"""
+    collector = current_collector()
+    if collector is None:
+        return
+    real_time_factor = None
+    if frames:
+        real_time_factor = seconds / (frames / sample_rate)
+    collector(StageMetric(stage, seconds, frames, real_time_factor))
+
+
+class _Stage(object):
+    """A stage measured by measure. Stages producing audio set frames to the number of rendered frames. excluded is
+    the time spent within the stage on work reported as another stage, which is not counted twice"""
+
+    __slots__ = ("frames", "excluded")
+
+    def __init__(self) -> None:
+        self.frames: Optional[int] = None
+        self.excluded = 0.0
+
+
+@contextmanager
+def measure(stage: str) -> Iterator[_Stage]:
+    """Measure the wall clock time of the with block and record it, unless it raised an exception"""
+    current = _Stage()
+    if current_collector() is None:
+        yield current
+        return
+    start = time.perf_counter()
+    yield current
+    record(stage, time.perf_counter() - start - current.excluded, current.frames)
+
+
+class CallTimer(object):
+    """Wrap a callable and add up the wall clock time spent in it, for example writing blocks of a recording
+
+    Attributes
+        seconds: Total time spent in the callable
+    """
+
+    __slots__ = ("_function", "seconds")
+
+    def __init__(self, function: Callable) -> None:
+        self._function = function
+        self.seconds = 0.0
+
+    def __call__(self, *args):
+        start = time.perf_counter()
+        try:
+            return self._function(*args)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsRecorder(object):
+    """A collector keeping all metrics in memory, for tests, benchmarks and debugging
+
+    Attributes
+        metrics: List of all recorded StageMetric tuples
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List[StageMetric] = []
+
+    def __call__(self, metric: StageMetric) -> None:
+        self.metrics.append(metric)
+
+    def totals(self) -> Dict[str, float]:
+        """Total seconds per stage"""
+        totals: Dict[str, float] = {}
+        for metric in self.metrics:
+            totals[metric.stage] = totals.get(metric.stage, 0.0) + metric.seconds
+        return totals
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Read and write Standard MIDI Files without building mingus containers
+
+MidiFile only reads the header and the offsets of the track chunks of a file. MidiFile.events memory maps the file and
+parses it lazily into MidiEvent tuples with absolute sample offsets, merging the tracks of format 1 files and applying
+their tempo map on the fly. The events of a file are never held in memory at once, so they can be validated with
+pypiano.lint.find_invalid_events and rendered with pypiano.render.render_events while they are parsed:
+
+    midi_file = MidiFile("prelude.mid")
+    piano.render(midi_file)
+
+Only note on and note off events are read. Program changes, controllers such as the sustain pedal, pitch bends and
+system exclusive messages are skipped. See the Standard MIDI Files 1.0 specification for the layout of the chunks.
+"""
+import heapq
+import mmap
+import struct
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from .render import MidiEvent, DEFAULT_BPM, NOTE_OFF, NOTE_ON, WAV_SAMPLE_FREQUENCY
+
+# Tempo of files without set tempo events in microseconds per quarter note, which is 120 bpm
+DEFAULT_TEMPO = 500000
+# Ticks per quarter note of written files
+DEFAULT_RESOLUTION = 480
+
+_HEADER = struct.Struct(">4sIHHH")
+_CHUNK_HEADER = struct.Struct(">4sI")
+
+_META = 0xFF
+_SET_TEMPO = 0x51
+_END_OF_TRACK = 0x2F
+_SYSTEM_EXCLUSIVE = (0xF0, 0xF7)
+# Channel messages with a single data byte, all others have two
+_PROGRAM_CHANGE = 0xC0
+_CHANNEL_PRESSURE = 0xD0
+
+# Kinds of the raw track events besides NOTE_OFF and NOTE_ON
+_TEMPO = 0
+_END = 0x100
+
+# A raw track event: tick, kind, channel, key and velocity or, for tempo events, the tempo in microseconds per quarter
+_RawEvent = Tuple[int, int, int, int, int]
+
+
+def _read_variable_length(data: mmap.mmap, offset: int) -> Tuple[int, int]:
+    """Read a variable length quantity and return it with the offset after it"""
+    value = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, offset
+
+
+def _iter_track(data: mmap.mmap, start: int, end: int) -> Iterator[_RawEvent]:
+    """Parse the events of a track chunk, ending with an end of track event"""
+    offset, tick, status = start, 0, 0
+    try:
+        while offset < end:
+            delta, offset = _read_variable_length(data, offset)
+            tick += delta
+            if data[offset] & 0x80:
+                status = data[offset]
+                offset += 1
+            elif status == 0:
+                raise ValueError("Data byte without running status at offset {0}".format(offset))
+
+            if status == _META:
+                meta_type = data[offset]
+                length, offset = _read_variable_length(data, offset + 1)
+                if meta_type == _SET_TEMPO and length == 3:
+                    yield tick, _TEMPO, 0, 0, int.from_bytes(data[offset : offset + 3], "big")
+                elif meta_type == _END_OF_TRACK:
+                    break
+                offset += length
+                # Meta events and system exclusive messages cancel the running status
+                status = 0
+            elif status in _SYSTEM_EXCLUSIVE:
+                length, offset = _read_variable_length(data, offset)
+                offset += length
+                status = 0
+            elif status > _SYSTEM_EXCLUSIVE[0]:
+                raise ValueError("Unexpected system message {0:#x} at offset {1}".format(status, offset))
+            else:
+                message = status & 0xF0
+                if message in (_PROGRAM_CHANGE, _CHANNEL_PRESSURE):
+                    offset += 1
+                    continue
+                key, velocity = data[offset], data[offset + 1]
+                offset += 2
+                if message == NOTE_ON and velocity:
+                    yield tick, NOTE_ON, status & 0x0F, key, velocity
+                elif message in (NOTE_ON, NOTE_OFF):
+                    # Note on events with velocity 0 stop a note as well
+                    yield tick, NOTE_OFF, status & 0x0F, key, 0
+    except IndexError:
+        raise ValueError("Track chunk at offset {0} is truncated".format(start))
+    if offset > end:
+        raise ValueError("Event at the end of the track chunk at offset {0} exceeds the chunk".format(start))
+    yield tick, _END, 0, 0, 0
+
+
+class MidiFile(object):
+    """A Standard MIDI File of format 0 or 1 on disk, parsed lazily
+
+    MidiFile objects only hold the path and header of the file, so they are cheap to create and to pickle, for example
+    as music container of a pypiano.batch.RenderJob.
+
+    Attributes
+        path: Path of the file
+        format: 0 for a single track, 1 for simultaneous tracks
+        number_of_tracks: Number of track chunks
+        division: Ticks per quarter note, or for SMPTE timing a tuple of frames per second and ticks per frame
+    Raises
+        OSError: If the file can not be read
+        ValueError: If the file is not a Standard MIDI File of format 0 or 1
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as midi_file:
+            header = midi_file.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:4] != b"MThd":
+                raise ValueError("{0} is not a Standard MIDI File".format(self.path))
+            _, header_size, self.format, self.number_of_tracks, division = _HEADER.unpack(header)
+            if self.format not in (0, 1):
+                raise ValueError(
+                    "{0} has format {1}, only formats 0 and 1 are supported".format(self.path, self.format)
+                )
+
+            if division & 0x8000:
+                # The upper byte is the negative frame rate, where -29 stands for 29.97 drop frame timing
+                frames_per_second = 256 - (division >> 8)
+                self.division: Union[int, Tuple[float, int]] = (
+                    29.97 if frames_per_second == 29 else float(frames_per_second),
+                    division & 0xFF,
+                )
+            else:
+                self.division = division
+
+            # Offsets and ends of the data of all track chunks. Chunks of other types are skipped
+            self._tracks: List[Tuple[int, int]] = []
+            offset = 8 + header_size
+            while len(self._tracks) < self.number_of_tracks:
+                midi_file.seek(offset)
+                chunk_header = midi_file.read(_CHUNK_HEADER.size)
+                if len(chunk_header) < _CHUNK_HEADER.size:
+                    raise ValueError(
+                        "{0} has {1} of {2} track chunks".format(self.path, len(self._tracks), self.number_of_tracks)
+                    )
+                chunk_id, size = _CHUNK_HEADER.unpack(chunk_header)
+                offset += _CHUNK_HEADER.size
+                if chunk_id == b"MTrk":
+                    self._tracks.append((offset, offset + size))
+                offset += size
+
+    def __repr__(self) -> str:
+        return "MidiFile({0!r})".format(str(self.path))
+
+    def _iter_timed(self, sample_rate: int) -> Iterator[_RawEvent]:
+        """Merge the tracks and convert ticks into sample offsets, keeping tempo and end of track events"""
+        with open(self.path, "rb") as midi_file, mmap.mmap(midi_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            tracks = [_iter_track(data, start, end) for start, end in self._tracks]
+            # Merging is stable, so tempo events of the first track come before notes of later tracks at the same tick
+            merged = heapq.merge(*tracks, key=itemgetter(0))
+
+            if isinstance(self.division, tuple):
+                frames_per_second, ticks_per_frame = self.division
+                samples_per_tick = sample_rate / (frames_per_second * ticks_per_frame)
+                for tick, kind, channel, key, velocity in merged:
+                    yield int(round(tick * samples_per_tick)), kind, channel, key, velocity
+                return
+
+            tempo_tick, tempo_sample = 0, 0.0
+            samples_per_tick = sample_rate * DEFAULT_TEMPO / (1e6 * self.division)
+            for tick, kind, channel, key, value in merged:
+                sample = tempo_sample + (tick - tempo_tick) * samples_per_tick
+                if kind == _TEMPO:
+                    tempo_tick, tempo_sample = tick, sample
+                    samples_per_tick = sample_rate * value / (1e6 * self.division)
+                yield int(round(sample)), kind, channel, key, value
+
+    def events(self, sample_rate: int = WAV_SAMPLE_FREQUENCY, channel: Optional[int] = None) -> Iterator[MidiEvent]:
+        """Parse the note events of all tracks in order
+
+        Events at the same sample are ordered like a sorted list of MidiEvent tuples, so note off events come before
+        note on events and repeated notes are retriggered.
+
+        Args
+            sample_rate: Sample rate used to convert times into sample offsets
+            channel: MIDI channel used for all events. If None the channels of the file are kept
+        Returns
+            An iterator of MidiEvent tuples
+        Raises
+            ValueError: If a track chunk is malformed. Events before the malformed event are yielded first
+        """
+        pending: List[MidiEvent] = []
+        for sample, kind, event_channel, key, velocity in self._iter_timed(sample_rate):
+            if kind not in (NOTE_ON, NOTE_OFF):
+                continue
+            if pending and pending[0].sample != sample:
+                pending.sort()
+                yield from pending
+                pending.clear()
+            pending.append(MidiEvent(sample, kind, event_channel if channel is None else channel, key, velocity))
+        pending.sort()
+        yield from pending
+
+    def end(self, sample_rate: int = WAV_SAMPLE_FREQUENCY) -> int:
+        """Parse the file and get the sample offset of its end, which is the end of its longest track"""
+        end = 0
+        for sample, kind, _, _, _ in self._iter_timed(sample_rate):
+            if kind == _END:
+                end = max(end, sample)
+        return end
+
+
+def _variable_length(value: int) -> bytes:
+    """Encode a variable length quantity"""
+    encoded = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        encoded.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(encoded)
+
+
+def write_midi_file(
+    path: Union[str, Path],
+    events: Iterable[MidiEvent],
+    end: int = 0,
+    sample_rate: int = WAV_SAMPLE_FREQUENCY,
+    bpm: float = DEFAULT_BPM,
+    resolution: int = DEFAULT_RESOLUTION,
+) -> None:
+    """Write MIDI events into a format 0 Standard MIDI File with a constant tempo
+
+    Events are written while they are consumed, so compiled music containers as well as the events of another
+    MidiFile can be written:
+
+        write_midi_file("track.mid", *compile_events(track))
+
+    Args
+        path: Path of the file to write
+        events: Sorted MidiEvent tuples with channels from 0 to 15
+        end: Sample offset of the end of the track. The track ends at its last event if that is later
+        sample_rate: Sample rate of the sample offsets of events
+        bpm: Tempo in quarter notes per minute written to the file
+        resolution: Ticks per quarter note
+    Raises
+        ValueError: If events are not sorted or do not fit into MIDI messages
+    """
+    ticks_per_sample = bpm * resolution / (60.0 * sample_rate)
+    tempo = int(round(60e6 / bpm))
+
+    with open(path, "wb") as midi_file:
+        midi_file.write(_HEADER.pack(b"MThd", 6, 0, 1, resolution))
+        midi_file.write(_CHUNK_HEADER.pack(b"MTrk", 0))
+        track_start = midi_file.tell()
+        midi_file.write(b"\x00" + bytes([_META, _SET_TEMPO, 3]) + tempo.to_bytes(3, "big"))
+
+        tick = 0
+        for event in events:
+            event_tick = int(round(event.sample * ticks_per_sample))
+            if event_tick < tick:
+                raise ValueError("Events must be sorted. Got {0} after tick {1}".format(event, tick))
+            if not 0 <= event.channel <= 15 or not 0 <= event.key <= 127 or not 0 <= event.velocity <= 127:
+                raise ValueError("{0} does not fit into a MIDI message".format(event))
+            status = (NOTE_ON if event.message == NOTE_ON else NOTE_OFF) | event.channel
+            midi_file.write(_variable_length(event_tick - tick) + bytes([status, event.key, event.velocity]))
+            tick = event_tick
+
+        end_tick = max(tick, int(round(end * ticks_per_sample)))
+        midi_file.write(_variable_length(end_tick - tick) + bytes([_META, _END_OF_TRACK, 0]))
+
+        # The length of the track chunk is only known once all events are written
+        track_end = midi_file.tell()
+        midi_file.seek(track_start - 4)
+        midi_file.write(struct.pack(">I", track_end - track_start))
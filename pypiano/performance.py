@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Compact array based form of compiled music containers
+
+A Performance stores every note of a compiled music container in parallel NumPy arrays of onset sample, duration,
+MIDI key, velocity and channel, which takes about 20 bytes per note instead of the object graph of mingus containers
+or the two MidiEvent tuples per note of pypiano.render.compile_events. Pianos validate, render, cache and schedule
+Performances without going back to mingus objects, and Performances pickle as a few contiguous buffers, so they are
+cheap to send to worker processes, for example as music container of a pypiano.batch.RenderJob:
+
+    performance = compile_performance(track)
+    piano.render(performance)
+"""
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import PianoKey, FIRST_MIDI_NUMBER
+from .lint import InvalidEvent, LAST_MIDI_NUMBER
+from .midi import MidiFile
+from .render import compile_events, MidiEvent, DEFAULT_BPM, NOTE_OFF, NOTE_ON, WAV_SAMPLE_FREQUENCY
+from .scheduler import SCHEDULE_DTYPE
+
+# Duration of notes that are started and never stopped, like note on events without a note off event in a MIDI file
+HELD = -1
+# Number of events converted into MidiEvent tuples at once by Performance.events
+_EVENT_BLOCK_SIZE = 4096
+
+
+class Performance(object):
+    """Notes of a compiled music container as parallel NumPy arrays
+
+    Notes are ordered by the note on events of the sorted event list they were built from. Use compile_performance or
+    Performance.from_events to create Performances.
+
+    Attributes
+        onset: int64 array with the sample offset of every note
+        duration: int64 array with the length of every note in samples, HELD for notes that are never stopped
+        key: int16 array with the MIDI note number of every note
+        velocity: uint8 array with the velocity of every note
+        channel: uint8 array with the MIDI channel of every note
+        end: Sample offset where the music container ends
+        sample_rate: Sample rate of onset, duration and end
+    """
+
+    def __init__(
+        self,
+        onset: numpy.ndarray,
+        duration: numpy.ndarray,
+        key: numpy.ndarray,
+        velocity: numpy.ndarray,
+        channel: numpy.ndarray,
+        end: int = 0,
+        sample_rate: int = WAV_SAMPLE_FREQUENCY,
+    ) -> None:
+        self.onset = numpy.asarray(onset, dtype=numpy.int64)
+        self.duration = numpy.asarray(duration, dtype=numpy.int64)
+        self.key = numpy.asarray(key, dtype=numpy.int16)
+        self.velocity = numpy.asarray(velocity, dtype=numpy.uint8)
+        self.channel = numpy.asarray(channel, dtype=numpy.uint8)
+        if not len(self.onset) == len(self.duration) == len(self.key) == len(self.velocity) == len(self.channel):
+            raise ValueError("All arrays of a Performance must have the same length")
+        self.end = end
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_events(
+        cls, events: Iterable[MidiEvent], end: int = 0, sample_rate: int = WAV_SAMPLE_FREQUENCY
+    ) -> "Performance":
+        """Build a Performance from sorted MIDI events, consuming them one by one
+
+        Every note off event stops the earliest sounding note of its channel and key. Note off events without a
+        sounding note are dropped.
+
+        Args
+            events: Sorted MidiEvent tuples, such as a list compiled by pypiano.render.compile_events or the events of
+                a pypiano.midi.MidiFile
+            end: Sample offset where the music container ends
+            sample_rate: Sample rate of the sample offsets of events
+        Raises
+            ValueError: If a velocity or channel does not fit into a MIDI message
+        """
+        onset, duration, key, velocity, channel = array("q"), array("q"), array("h"), array("B"), array("B")
+        sounding: Dict[Tuple[int, int], Deque[int]] = {}
+        for event in events:
+            if event.message == NOTE_ON:
+                sounding.setdefault((event.channel, event.key), deque()).append(len(onset))
+                try:
+                    velocity.append(event.velocity)
+                    channel.append(event.channel)
+                except OverflowError:
+                    raise ValueError("{0} does not fit into a MIDI message".format(event))
+                onset.append(event.sample)
+                duration.append(HELD)
+                key.append(event.key)
+            else:
+                started = sounding.get((event.channel, event.key))
+                if started:
+                    note = started.popleft()
+                    duration[note] = event.sample - onset[note]
+
+        # The arrays share the memory of the array.array buffers, so they are not copied
+        return cls(
+            numpy.frombuffer(onset, dtype=numpy.int64),
+            numpy.frombuffer(duration, dtype=numpy.int64),
+            numpy.frombuffer(key, dtype=numpy.int16),
+            numpy.frombuffer(velocity, dtype=numpy.uint8),
+            numpy.frombuffer(channel, dtype=numpy.uint8),
+            end,
+            sample_rate,
+        )
+
+    def __len__(self) -> int:
+        return len(self.onset)
+
+    def __repr__(self) -> str:
+        return "Performance(notes={0}, end={1}, sample_rate={2})".format(len(self), self.end, self.sample_rate)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the arrays in bytes"""
+        return sum(column.nbytes for column in (self.onset, self.duration, self.key, self.velocity, self.channel))
+
+    def event_array(self) -> numpy.ndarray:
+        """Get the sorted note on and note off events of all notes
+
+        Returns
+            An int64 array of shape (events, 5) with the fields of MidiEvent as columns, in the order of a sorted list
+            of MidiEvent tuples
+        """
+        stopped = self.duration != HELD
+        notes = len(self)
+        events = numpy.empty((notes + int(stopped.sum()), 5), dtype=numpy.int64)
+        events[:notes] = numpy.column_stack(
+            (self.onset, numpy.full(notes, NOTE_ON), self.channel, self.key, self.velocity)
+        )
+        events[notes:, 0] = self.onset[stopped] + self.duration[stopped]
+        events[notes:, 1] = NOTE_OFF
+        events[notes:, 2] = self.channel[stopped]
+        events[notes:, 3] = self.key[stopped]
+        events[notes:, 4] = 0
+        # lexsort sorts by the last key first, so the sample is the primary key
+        return events[numpy.lexsort(events.T[::-1])]
+
+    def events(self) -> Iterator[MidiEvent]:
+        """Iterate over the sorted MIDI events of all notes, see pypiano.render.render_events"""
+        events = self.event_array()
+        for start in range(0, len(events), _EVENT_BLOCK_SIZE):
+            for event in events[start : start + _EVENT_BLOCK_SIZE].tolist():
+                yield MidiEvent(*event)
+
+    def schedule(self) -> numpy.ndarray:
+        """Convert the notes into a schedule for pypiano.scheduler.EventScheduler without building MidiEvent tuples"""
+        events = self.event_array()
+        schedule = numpy.empty(len(events), dtype=SCHEDULE_DTYPE)
+        schedule["time"] = events[:, 0] / self.sample_rate
+        for column, field in enumerate(SCHEDULE_DTYPE.names[1:], start=1):
+            schedule[field] = events[:, column]
+        return schedule
+
+    def find_invalid_notes(self, collect_all: bool = False) -> List[InvalidEvent]:
+        """Find notes that can't be found on a piano with 88 keys with a single vectorized comparison
+
+        Returns
+            A list of InvalidEvent tuples with the note on event of every invalid note and its index in the arrays
+        """
+        invalid = numpy.flatnonzero((self.key < FIRST_MIDI_NUMBER) | (self.key > LAST_MIDI_NUMBER))
+        if not collect_all:
+            invalid = invalid[:1]
+        events = numpy.column_stack(
+            (
+                self.onset[invalid],
+                numpy.full(len(invalid), NOTE_ON),
+                self.channel[invalid],
+                self.key[invalid],
+                self.velocity[invalid],
+            )
+        )
+        return [InvalidEvent(MidiEvent(*event), note) for note, event in zip(invalid.tolist(), events.tolist())]
+
+
+def compile_performance(
+    music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
+    bpm: float = DEFAULT_BPM,
+    sample_rate: int = WAV_SAMPLE_FREQUENCY,
+    channel: Optional[int] = None,
+) -> Performance:
+    """Compile a music container or a MIDI file into a Performance
+
+    See pypiano.render.compile_events for the timing of the different music containers and the channel argument. The
+    events of a pypiano.midi.MidiFile are read while they are parsed. Performances are returned as they are.
+    """
+    if isinstance(music_container, Performance):
+        return music_container
+    if isinstance(music_container, MidiFile):
+        return Performance.from_events(
+            music_container.events(sample_rate, channel), music_container.end(sample_rate), sample_rate
+        )
+    events, end = compile_events(music_container, bpm=bpm, sample_rate=sample_rate, channel=channel)
+    return Performance.from_events(events, end, sample_rate)
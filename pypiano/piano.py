@@ -1,26 +1,43 @@
 # -*- coding: utf-8 -*-
 """
 """
+import functools
 import logging
-import pkg_resources
+import threading
 import time
+import numpy
 
+from importlib.resources import files
 from mingus.containers import Note, NoteContainer, Bar, Track
-from mingus.midi.fluidsynth import FluidSynthSequencer
-from mingus.midi import pyfluidsynth as globalfs
 
-from typing import Union
+from typing import Callable, Iterable, List, Optional, Tuple, Union, TYPE_CHECKING
 from pathlib import Path
+from .fonts import sound_font_key, SoundFontCacheInfo, SoundFontKey, SOUND_FONTS
 from .keyboard import PianoKeyboard, PianoKey
-
-from .utils import (
-    note_to_string,
-    note_container_to_note_string_list,
-    bar_to_note_string_list,
-    track_to_note_string_list,
+from .midi import MidiFile
+from .performance import Performance
+from .samples import SampleBank
+from .sf2 import sound_font_info
+from .metrics import measure, record, CallTimer, DRIVER_START, LINT, RENDER, SOUND_FONT_LOAD, WAV_WRITE
+from .lint import LintCache, LintCacheInfo, find_invalid_events, format_invalid_events, format_invalid_notes
+from .scheduler import compile_schedule, schedule_from_events, EventScheduler, SchedulerStats
+from .render import (
+    check_sample_dtype,
+    compile_events,
+    convert_samples,
+    render_events,
+    MidiEvent,
+    MAX_TAIL_SECONDS,
+    SILENCE_THRESHOLD,
+    WAV_SAMPLE_FREQUENCY,
 )
 
-DEFAULT_SOUND_FONTS = Path(pkg_resources.resource_filename("pypiano", "/sound_fonts/FluidR3_GM.sf2"))
+if TYPE_CHECKING:
+    from mingus.midi.fluidsynth import FluidSynthSequencer
+    from mingus.midi import pyfluidsynth as globalfs
+    from .cache import RenderCache
+
+DEFAULT_SOUND_FONTS = Path(str(files("pypiano").joinpath("sound_fonts", "FluidR3_GM.sf2")))
 
 # Valid audio driver are taken from docstring of mingus.midi.fluidsynth.FluidSynthSequencer.start_audio_output() method
 # https://github.com/bspaans/python-mingus/blob/f131620eb7353bcfbf1303b24b951a95cad2ac20/mingus/midi/fluidsynth.py#L57
@@ -53,6 +70,38 @@ DEFAULT_INSTRUMENTS = {
 logger = logging.getLogger("pypiano")
 logger.addHandler(logging.NullHandler())
 
+# Synthesizer backends imported on first use. Importing mingus.midi.fluidsynth loads libfluidsynth via ctypes, which
+# is not needed for keyboard lookups, linting or compiling music containers
+_LAZY_BACKENDS = ("FluidSynthSequencer", "globalfs")
+
+
+def _import_backends() -> None:
+    """Import the synthesizer backends into the module namespace unless already done, for example by a mock"""
+    global FluidSynthSequencer, globalfs
+    if "FluidSynthSequencer" not in globals():
+        from mingus.midi.fluidsynth import FluidSynthSequencer
+    if "globalfs" not in globals():
+        from mingus.midi import pyfluidsynth as globalfs
+
+
+def __getattr__(name: str):
+    """Import the synthesizer backends when they are accessed as module attributes"""
+    if name in _LAZY_BACKENDS:
+        _import_backends()
+        return globals()[name]
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def _synchronized(method: Callable) -> Callable:
+    """Run a method of Piano while holding the lock of the piano, see the thread safety notes of Piano"""
+
+    @functools.wraps(method)
+    def synchronized(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return synchronized
+
 
 class Piano(object):
     """Class representing a Piano with 88 keys based on mingus
@@ -60,6 +109,12 @@ class Piano(object):
     Class to programmatically play piano via audio output or record music to a wav file. Abstraction layer on top of
     mingus.midi.fluidsynth.FluidSynthSequencer.
 
+    Thread safety: A Piano owns a single synthesizer, which can only play, record or render one music container at a
+    time. All methods changing the synthesizer, the sound fonts, the instrument, the audio driver or a recording hold
+    a re-entrant lock of the piano, so calls from several threads are serialized instead of corrupting recordings or
+    deleting the audio driver twice. Playing via audio output holds the lock until the music container was played.
+    Keyboard lookups do not lock. Use one Piano per thread, or a pypiano.pool.PianoPool, to play or render in parallel.
+
     Attributes
         sound_fonts_path: Optional string or Path object pointing to a *.sf2 files. PyPiano ships sound fonts by default
         audio_driver: Optional argument specifying audio driver to use. Following audio drivers could be used:
@@ -69,7 +124,16 @@ class Piano(object):
             choose one of the following pianos sounds:
             ("Acoustic Grand Piano", "Bright Acoustic Piano", "Electric Grand Piano", "Honky-tonk Piano",
              "Electric Piano 1", "Electric Piano 2", "Harpsichord", "Clavi"). If different sound fonts are provided
-             you should also pass an integer with the instrument number
+             you can pass the name or the integer instrument number of a preset in bank 0
+        lint_cache_size: Maximum number of validated Bars and Tracks to remember, so replaying them does not check
+            them again. See pypiano.lint.LintCache for details
+        lazy: If True the synthesizer is created and the sound fonts are loaded on the first call of play or render
+            instead of right away, see self.warm_up
+        render_cache: Optional pypiano.cache.RenderCache. Recordings of play are served from it if the same music
+            container was recorded before with the same instrument and sound fonts
+        sample_bank_bytes: Memory cap in bytes of a pypiano.samples.SampleBank used to render and record Notes and
+            NoteContainers by mixing cached single notes instead of synthesizing them. int16 arrays rendered from the
+            sample bank are read-only. 0 disables the sample bank
     """
 
     def __init__(
@@ -77,59 +141,133 @@ class Piano(object):
         sound_fonts_path: Union[str, Path] = DEFAULT_SOUND_FONTS,
         audio_driver: Union[str, None] = None,
         instrument: Union[str, int] = "Acoustic Grand Piano",
+        lint_cache_size: int = 128,
+        lazy: bool = False,
+        render_cache: Optional["RenderCache"] = None,
+        sample_bank_bytes: int = 0,
     ) -> None:
 
-        self.__fluid_synth_sequencer = FluidSynthSequencer()
+        # Guards the synthesizer and all state below that changes with it, see the thread safety notes above
+        self._lock = threading.RLock()
+
+        # The synthesizer is created by self.warm_up, right away or for lazy pianos on first need
+        self.__fluid_synth_sequencer: Optional[FluidSynthSequencer] = None
 
         self._sound_fonts_path = Path(sound_fonts_path)
-        # Set variable to track if sound fonts are loaded
+        # Set variable to track if sound fonts are loaded and which file they were loaded from
         self._sound_fonts_loaded = False
-        self.load_sound_fonts(self._sound_fonts_path)
+        self._sound_font_key: Optional[SoundFontKey] = None
 
         # Audio output is lazily loaded when self.play method is called the first time without recording
         self._current_audio_driver = audio_driver
         # Set a variable to track if audio output is currently active
         self._audio_driver_is_active = False
 
-        # Set instrument
+        # Set instrument. Lazy pianos only check it, it is selected once the sound fonts are loaded
         self.instrument = instrument
         self.load_instrument(self.instrument)
 
         # Initialize a piano keyboard
         self.keyboard = PianoKeyboard()
 
+        # Timing statistics of the last Bar or Track played via audio output, see pypiano.scheduler.SchedulerStats
+        self.last_scheduler_stats: Optional[SchedulerStats] = None
+
+        # Remember validated music containers to avoid checking them again when replayed
+        self._lint_cache = LintCache(maxsize=lint_cache_size)
+
+        self.render_cache = render_cache
+        self.sample_bank = SampleBank(self, max_bytes=sample_bank_bytes) if sample_bank_bytes else None
+
+        if not lazy:
+            self.warm_up()
+
+    @_synchronized
+    def warm_up(self) -> None:
+        """Create the synthesizer, load the sound fonts and select the instrument unless this was done already
+
+        Lazy pianos do this on the first call of play or render, so using them only for their keyboard or to validate
+        music containers never touches FluidSynth. Services that can not afford loading sound fonts while handling their
+        first request should call this method ahead of time.
+        """
+        if self.__fluid_synth_sequencer is None:
+            logger.debug("Creating FluidSynth sequencer")
+            _import_backends()
+            self.__fluid_synth_sequencer = FluidSynthSequencer()
+
+        if not self._sound_fonts_loaded and self._sound_fonts_path is not None:
+            self.load_sound_fonts(self._sound_fonts_path)
+            self.load_instrument(self.instrument)
+
+    @property
+    def _sequencer(self) -> "FluidSynthSequencer":
+        """The mingus.midi.fluidsynth.FluidSynthSequencer of this piano, warmed up on first access"""
+        self.warm_up()
+        return self.__fluid_synth_sequencer
+
+    @property
+    def _synth(self):
+        """The mingus.midi.pyfluidsynth.Synth object of this piano, for modules driving it with MIDI events"""
+        return self._sequencer.fs
+
+    @_synchronized
     def load_sound_fonts(self, sound_fonts_path: Union[str, Path]) -> None:
-        """Load sound fonts from a given path"""
-        logger.debug("Attempting to load sound fonts from {file}".format(file=sound_fonts_path))
+        """Load sound fonts from a given path
+
+        Sound fonts are shared via pypiano.fonts.SOUND_FONTS. Loading a file that is already loaded on the synthesizer
+        of this piano reuses its font id instead of parsing the file again, and loading the current sound fonts again
+        does nothing unless the file changed on disk.
+        """
+        if self.__fluid_synth_sequencer is None:
+            # Lazy piano that was not warmed up yet, the sound fonts are loaded by self.warm_up
+            self._sound_fonts_path = Path(sound_fonts_path)
+            return
+
+        logger.debug("Attempting to load sound fonts from %s", sound_fonts_path)
+
+        if self._sound_fonts_loaded and self._sound_font_key == sound_font_key(sound_fonts_path):
+            logger.debug("Sound fonts from %s are already loaded", sound_fonts_path)
+            return
+
+        # Acquire the new sound fonts before releasing the current ones, so the current ones are kept if loading fails
+        with measure(SOUND_FONT_LOAD):
+            key = SOUND_FONTS.acquire(self.__fluid_synth_sequencer, sound_fonts_path)
 
         if self._sound_fonts_loaded:
 
             self._unload_sound_fonts()
 
-        if not self.__fluid_synth_sequencer.load_sound_font(str(sound_fonts_path)):
-            raise Exception("Could not load sound fonts from {file}".format(file=sound_fonts_path))
-
+        self._sound_font_key = key
         self._sound_fonts_loaded = True
         self._sound_fonts_path = Path(sound_fonts_path)
 
-        logger.debug("Successfully initialized sound fonts from {file_path}".format(file_path=sound_fonts_path))
+        logger.debug("Successfully initialized sound fonts from %s", sound_fonts_path)
 
+    @_synchronized
     def _unload_sound_fonts(self) -> None:
         """Unload a given sound font file
 
         Safely unload current sound font file. Method controls if a sound font file is already loaded via
-        self._sound_fonts_loaded.
+        self._sound_fonts_loaded. The sound fonts are only removed from the synthesizer once no other user of
+        pypiano.fonts.SOUND_FONTS holds them.
         """
 
-        logger.debug("Unloading current active sound fonts from file: {0}".format(self._sound_fonts_path))
+        logger.debug("Unloading current active sound fonts from file: %s", self._sound_fonts_path)
 
         if self._sound_fonts_loaded:
-            self.__fluid_synth_sequencer.fs.sfunload(self.__fluid_synth_sequencer.sfid)
+            SOUND_FONTS.release(self.__fluid_synth_sequencer, self._sound_font_key)
+            self._sound_font_key = None
             self._sound_fonts_loaded = False
             self._sound_fonts_path = None
         else:
             logger.debug("No active sound fonts")
 
+    @staticmethod
+    def sound_font_cache_info() -> SoundFontCacheInfo:
+        """Report hits, misses, loaded sound fonts and unloads of the process wide sound font registry"""
+        return SOUND_FONTS.info()
+
+    @_synchronized
     def _start_audio_output(self) -> None:
         """Private method to start audio output
 
@@ -139,7 +277,7 @@ class Piano(object):
         mingus.midi.fluidsynth.FluidSynthSequencer
         """
 
-        logger.debug("Starting audio output using driver: {driver}".format(driver=self._current_audio_driver))
+        logger.debug("Starting audio output using driver: %s", self._current_audio_driver)
 
         # That is actually already done by the low level method and is included here again for transparency
         if self._current_audio_driver not in VALID_AUDIO_DRIVERS:
@@ -150,15 +288,17 @@ class Piano(object):
                 )
             )
         if not self._audio_driver_is_active:
-            self.__fluid_synth_sequencer.start_audio_output(self._current_audio_driver)
-            # It seems to be necessary to reset the program after starting audio output
-            # mingus.midi.pyfluidsynth.program_reset() is calling fluidsynth fluid_synth_program_reset()
-            # https://www.fluidsynth.org/api/group__midi__messages.html#ga8a0e442b5013876affc685b88a6e3f49
-            self.__fluid_synth_sequencer.fs.program_reset()
+            with measure(DRIVER_START):
+                self._sequencer.start_audio_output(self._current_audio_driver)
+                # It seems to be necessary to reset the program after starting audio output
+                # mingus.midi.pyfluidsynth.program_reset() is calling fluidsynth fluid_synth_program_reset()
+                # https://www.fluidsynth.org/api/group__midi__messages.html#ga8a0e442b5013876affc685b88a6e3f49
+                self._sequencer.fs.program_reset()
             self._audio_driver_is_active = True
         else:
             logger.debug("Audio output seems to be already active")
 
+    @_synchronized
     def _stop_audio_output(self) -> None:
         """Private method to stop audio output
 
@@ -184,15 +324,16 @@ class Piano(object):
         and enables switching between recording to a file and playing audio output without initializing a new object.
         """
         if self._audio_driver_is_active:
-            globalfs.delete_fluid_audio_driver(self.__fluid_synth_sequencer.fs.audio_driver)
+            globalfs.delete_fluid_audio_driver(self._sequencer.fs.audio_driver)
             # It seems to be necessary to reset the program after starting audio output
             # mingus.midi.pyfluidsynth.program_reset() is calling fluidsynth fluid_synth_program_reset()
             # https://www.fluidsynth.org/api/group__midi__messages.html#ga8a0e442b5013876affc685b88a6e3f49
-            self.__fluid_synth_sequencer.fs.program_reset()
+            self._sequencer.fs.program_reset()
             self._audio_driver_is_active = False
         else:
             logger.debug("Audio output seems to be already inactive")
 
+    @_synchronized
     def load_instrument(self, instrument: Union[str, int]) -> None:
         """Method to change the piano instrument
 
@@ -202,12 +343,28 @@ class Piano(object):
              "Electric Piano 1", "Electric Piano 2", "Harpsichord", "Clavi")
         Args
             instrument: String with the name of the instrument to be used for default sound founts. If different sound
-                fonts are used an integer with the instrument number should be provided.
+                fonts are used the name or the integer instrument number of a preset in bank 0 should be provided.
+        Raises
+            RuntimeError: If the sound fonts were unloaded, so there are no instruments to choose from
+        """
+        logger.info("Setting instrument: %s", instrument)
+        program = self._resolve_instrument(instrument)
+        if self._sound_fonts_loaded:
+            self._set_program(1, program)
+        self.instrument = instrument
+
+    def _resolve_instrument(self, instrument: Union[str, int]) -> int:
+        """Private method to check an instrument against the loaded sound fonts and get its program number
+
+        If default sound fonts are used, check if the provided instrument string is contained in the valid
+        instruments. If different sound fonts are provided, their presets in bank 0 are read with
+        pypiano.sf2.sound_font_info and the instrument can be given by preset name or program number. Sound fonts that
+        can not be inspected are left to FluidSynth and only accept program numbers. Raises a RuntimeError if the sound
+        fonts were unloaded
         """
-        logger.info("Setting instrument: {0}".format(instrument))
+        if self._sound_fonts_path is None:
+            raise RuntimeError("No sound fonts are loaded, load sound fonts before choosing an instrument")
 
-        # If default sound fonts are used, check if the provided instrument string is contained in the valid
-        # instruments. If different sound fonts are provided, checks are disabled
         if self._sound_fonts_path == DEFAULT_SOUND_FONTS:
 
             if isinstance(instrument, int):
@@ -220,22 +377,45 @@ class Piano(object):
                     )
                 )
 
-            self.__fluid_synth_sequencer.set_instrument(channel=1, instr=DEFAULT_INSTRUMENTS[instrument], bank=0)
-            self.instrument = instrument
-
-        else:
+            return DEFAULT_INSTRUMENTS[instrument]
 
+        try:
+            info = sound_font_info(self._sound_fonts_path)
+        except (OSError, ValueError) as error:
+            logger.debug("Could not inspect sound fonts %s, instrument not checked: %s", self._sound_fonts_path, error)
             if isinstance(instrument, str):
                 raise TypeError("When using non default sound fonts you must pass an integer for instrument parameter")
+            return instrument
 
-            self.__fluid_synth_sequencer.set_instrument(channel=1, instr=instrument, bank=0)
-            self.instrument = instrument
+        presets = {preset.program: preset.name for preset in info.presets if preset.bank == 0}
+        if isinstance(instrument, str):
+            for program, name in presets.items():
+                if name == instrument:
+                    return program
+            raise ValueError(
+                "Unknown instrument parameter. Instrument must be one of: {instrument}".format(
+                    instrument=tuple(presets.values())
+                )
+            )
 
+        if instrument not in presets:
+            raise ValueError(
+                "Sound fonts {file} have no instrument number {instrument} in bank 0. Instrument must be one of: "
+                "{programs}".format(file=self._sound_fonts_path, instrument=instrument, programs=tuple(presets))
+            )
+        return instrument
+
+    def _set_program(self, channel: int, program: int) -> None:
+        """Private method to select a program of the loaded sound fonts on a MIDI channel"""
+        self._sequencer.set_instrument(channel=channel, instr=program, bank=0)
+
+    @_synchronized
     def play(
         self,
-        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
         recording_file: Union[str, None] = None,
-        record_seconds: int = 4,
+        record_seconds: Optional[float] = None,
+        lint: bool = True,
     ) -> None:
         """Function to play a provided music container and control recording settings
 
@@ -244,58 +424,274 @@ class Piano(object):
         file.
 
         Args
-            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music, a
+                pypiano.midi.MidiFile which is parsed while it is played or a compiled pypiano.performance.Performance.
+                All notes of a MidiFile are played with the instrument of the piano
             recording_file: Path to a wav file where audio should be saved to. If passed music_container will be
                 recorded
-            record_seconds: The duration of recording in seconds
+            record_seconds: Duration in seconds recorded after the end of the music container. If None the recording
+                stops as soon as the release of the last notes went silent
+            lint: If False the music container is not checked for invalid notes. Use this if music containers are
+                already validated in bulk
         """
 
         # Check a given music container for invalid notes. See docstring of self._lint_music_container for more details
-        self._lint_music_container(music_container)
+        if lint:
+            self._lint_music_container(music_container)
 
         if recording_file is None:
 
-            logger.info("Playing music container: {music_container} via audio".format(music_container=music_container))
+            logger.info("Playing music container: %s via audio", music_container)
             self._start_audio_output()
             self._play_music_container(music_container)
 
         else:
 
-            logger.info(
-                "Recording music container: {music_container} to file {recording_file}".format(
-                    music_container=music_container, recording_file=recording_file
+            logger.info("Recording music container: %s to file %s", music_container, recording_file)
+            events, end = self._compile_music_container(music_container)
+
+            if self.render_cache is None:
+                self._record_events(events, end, recording_file, record_seconds)
+            else:
+                # Hashing and the cache directory are only needed once a render cache is used
+                from .cache import render_cache_key
+
+                key_events: Union[List[MidiEvent], numpy.ndarray]
+                if isinstance(music_container, Performance):
+                    key_events = music_container.event_array()
+                else:
+                    # The cache key hashes all events, so events streamed from a MidiFile are read into memory
+                    events = key_events = list(events)
+                key = render_cache_key(
+                    key_events,
+                    end,
+                    self.instrument,
+                    sound_font_key(self._sound_fonts_path),
+                    WAV_SAMPLE_FREQUENCY,
+                    record_seconds,
                 )
-            )
-            self._stop_audio_output()
-            self.__fluid_synth_sequencer.start_recording(recording_file)
-            self._play_music_container(music_container)
+                if not self.render_cache.fetch(key, recording_file):
+                    self.render_cache.store(
+                        key, lambda path: self._record_events(events, end, path, record_seconds), recording_file
+                    )
 
-            WAV_SAMPLE_FREQUENCY = 44100
+            logger.info("Finished recording to %s", recording_file)
 
-            samples = globalfs.raw_audio_string(
-                self.__fluid_synth_sequencer.fs.get_samples(int(record_seconds * WAV_SAMPLE_FREQUENCY))
-            )
-            self.__fluid_synth_sequencer.wav.writeframes(bytes(samples))
+    @_synchronized
+    def _record_events(
+        self, events: Iterable[MidiEvent], end: int, recording_file: str, record_seconds: Optional[float]
+    ) -> None:
+        """Private method to record compiled MIDI events to a wav file, see self.play"""
+        mixed = None
+        # Events streamed from a MidiFile are not a list and never a single chord the sample bank could mix
+        if self.sample_bank is not None and isinstance(events, list):
+            mixed = self.sample_bank.render_events(events, end, record_seconds)
+
+        self._stop_audio_output()
+        self._sequencer.start_recording(recording_file)
+        wav = self._sequencer.wav
+        # Blocks are views into a reused buffer, wave writes them without copying them into bytes first
+        write = CallTimer(lambda samples: wav.writeframes(memoryview(samples)))
+        close = CallTimer(wav.close)
+        frames = 0
+        # It seems we have to delete the wav attribute after recording in order to enable switching between
+        # audio output and recording for all music containers. Recording no longer goes through play_Bar and
+        # play_Track, but start_recording still sets the wav attribute. The
+        # mingus.midi.fluidsynth.FluidSynthSequencer.play_Bar and
+        # mingus.midi.fluidsynth.FluidSynthSequencer.play_Track use the
+        # mingus.midi.fluidsynth.FluidSynthSequencer.sleep methods internally which is for some reason also used
+        # to record in mingus.
+        # See also my issue in the mingus repository: https://github.com/bspaans/python-mingus/issues/77
+        # When wav attribute is present sleep tries to write to the wave file and if not the method just sleeps.
+        # If we do not delete the wav attribute it is still there as None and play_Bar tries to write to the file
+        # resulting in AttributeError: 'NoneType' object has no attribute 'write'
+        # The wav file is closed and the wav attribute deleted also if rendering failed, for example while parsing a
+        # malformed MidiFile, so the piano can play and record again
+        try:
+            if mixed is None:
+                frames = self._render_events(events, end, write, record_seconds)
+            else:
+                write(mixed.reshape(-1))
+                frames = len(mixed)
+        finally:
+            try:
+                close()
+            finally:
+                delattr(self._sequencer, "wav")
+        record(WAV_WRITE, write.seconds + close.seconds, frames)
+
+    @_synchronized
+    def render(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
+        record_seconds: Optional[float] = None,
+        dtype: Union[str, numpy.dtype] = "int16",
+        lint: bool = True,
+    ) -> numpy.ndarray:
+        """Render a music container to a NumPy array without touching the file system
+
+        Args
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            record_seconds: Duration in seconds rendered after the end of the music container. If None rendering stops
+                as soon as the release of the last notes went silent
+            dtype: Either int16 or float32. float32 samples are scaled to the range -1.0 to 1.0
+            lint: If False the music container is not checked for invalid notes
+        Returns
+            An array of shape (frames, 2) with the stereo samples at 44100 Hz
+        """
+        dtype = check_sample_dtype(dtype)
+        if lint:
+            self._lint_music_container(music_container)
+
+        events, end = self._compile_music_container(music_container)
+        return self._render_events_to_array(events, end, record_seconds, dtype)
+
+    @_synchronized
+    def _render_events_to_array(
+        self, events: Iterable[MidiEvent], end: int, record_seconds: Optional[float], dtype: numpy.dtype
+    ) -> numpy.ndarray:
+        """Private method to render compiled MIDI events to a NumPy array of shape (frames, 2), see self.render"""
+        if self.sample_bank is not None and isinstance(events, list):
+            samples = self.sample_bank.render_events(events, end, record_seconds)
+            if samples is not None:
+                return convert_samples(samples, dtype)
+
+        blocks: List[numpy.ndarray] = []
+        self._stop_audio_output()
+        self._render_events(events, end, lambda samples: blocks.append(samples.copy()), record_seconds)
+
+        samples = numpy.concatenate(blocks) if blocks else numpy.zeros(0, dtype=numpy.int16)
+        return convert_samples(samples.reshape(-1, 2), dtype)
+
+    @_synchronized
+    def render_into(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
+        out: numpy.ndarray,
+        record_seconds: Optional[float] = None,
+        lint: bool = True,
+    ) -> int:
+        """Render a music container into a caller supplied array without touching the file system
 
-            self.__fluid_synth_sequencer.wav.close()
+        Rendering stops when out is full, so longer music containers are truncated.
 
-            # It seems we have to delete the wav attribute after recording in order to enable switching between
-            # audio output and recording for all music containers. The
-            # mingus.midi.fluidsynth.FluidSynthSequencer.play_Bar and
-            # mingus.midi.fluidsynth.FluidSynthSequencer.play_Track use the
-            # mingus.midi.fluidsynth.FluidSynthSequencer.sleep methods internally which is for some reason also used
-            # to record in mingus.
-            # See also my issue in the mingus repository: https://github.com/bspaans/python-mingus/issues/77
-            # When wav attribute is present sleep tries to write to the wave file and if not the method just sleeps.
-            # If we do not delete the wav attribute it is still there as None and play_Bar tries to write to the file
-            # resulting in AttributeError: 'NoneType' object has no attribute 'write'
-            delattr(self.__fluid_synth_sequencer, "wav")
+        Args
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            out: An int16 or float32 array of shape (frames, 2). float32 samples are scaled to the range -1.0 to 1.0
+            record_seconds: Duration in seconds rendered after the end of the music container. If None rendering stops
+                as soon as the release of the last notes went silent
+            lint: If False the music container is not checked for invalid notes
+        Returns
+            The number of frames written to out
+        """
+        if out.ndim != 2 or out.shape[1] != 2:
+            raise ValueError("out must be an array of shape (frames, 2). Got shape {0}".format(out.shape))
+        check_sample_dtype(out.dtype)
+        if lint:
+            self._lint_music_container(music_container)
+
+        position = 0
+
+        def write(samples: numpy.ndarray) -> None:
+            nonlocal position
+            frames = len(samples) // 2
+            convert_samples(samples.reshape(-1, 2), out.dtype, out=out[position : position + frames])
+            position += frames
+
+        self._stop_audio_output()
+        return self._render_music_container(music_container, write, record_seconds, max_frames=len(out))
+
+    def _render_music_container(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
+        write: Callable[[numpy.ndarray], None],
+        record_seconds: Optional[float] = None,
+        max_frames: Optional[int] = None,
+    ) -> int:
+        """Private method to render a music container faster than realtime
+
+        The music container is compiled into MIDI events with absolute sample offsets which are sent to the synthesizer
+        while samples are pulled in between, see pypiano.render. Unlike mingus.midi.fluidsynth.FluidSynthSequencer
+        play_Bar and play_Track no wall clock time is spent sleeping. The length of the music container follows from
+        its note durations and tempo. After it ends, either record_seconds of audio are rendered or, if record_seconds
+        is None, audio is rendered until the release of the last notes went silent. Audio output must be stopped.
+
+        Args
+            music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            write: Callable receiving each block of interleaved stereo int16 samples, see pypiano.render.render_events
+            record_seconds: Duration in seconds rendered after the end of the music container or None to detect the
+                end of the release automatically
+            max_frames: Optional upper limit for the number of rendered frames
+        Returns
+            The number of rendered frames
+        """
+        events, end = self._compile_music_container(music_container)
+        return self._render_events(events, end, write, record_seconds, max_frames)
+
+    def _compile_music_container(
+        self, music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance]
+    ) -> Tuple[Iterable[MidiEvent], int]:
+        """Private method to compile a music container into MIDI events and the sample offset where it ends
+
+        The events of a pypiano.midi.MidiFile are an iterator parsing the file while it is consumed. They are all sent
+        to channel 1, which is the only channel with the instrument of the piano selected. The events of a
+        pypiano.performance.Performance are generated from its arrays while they are consumed. All other music
+        containers are compiled into a sorted list, see pypiano.render.compile_events
+        """
+        if isinstance(music_container, Performance):
+            if music_container.sample_rate != WAV_SAMPLE_FREQUENCY:
+                raise ValueError(
+                    "Performances must be compiled at {0} Hz. Got {1} Hz".format(
+                        WAV_SAMPLE_FREQUENCY, music_container.sample_rate
+                    )
+                )
+            return music_container.events(), music_container.end
+        if isinstance(music_container, MidiFile):
+            return music_container.events(WAV_SAMPLE_FREQUENCY, channel=1), music_container.end(WAV_SAMPLE_FREQUENCY)
+        return compile_events(music_container, sample_rate=WAV_SAMPLE_FREQUENCY)
 
-            logger.info("Finished recording to {recording_file}".format(recording_file=recording_file))
+    @_synchronized
+    def _render_events(
+        self,
+        events: Iterable[MidiEvent],
+        end: int,
+        write: Callable[[numpy.ndarray], None],
+        record_seconds: Optional[float] = None,
+        max_frames: Optional[int] = None,
+    ) -> int:
+        """Private method to render compiled MIDI events ending at sample end, see self._render_music_container"""
+        if record_seconds is None:
+            number_of_frames = end
+            silence_threshold = SILENCE_THRESHOLD
+        else:
+            number_of_frames = end + int(record_seconds * WAV_SAMPLE_FREQUENCY)
+            silence_threshold = None
+
+        max_tail_frames = MAX_TAIL_SECONDS * WAV_SAMPLE_FREQUENCY
+        if max_frames is not None:
+            number_of_frames = min(number_of_frames, max_frames)
+            max_tail_frames = min(max_tail_frames, max_frames - number_of_frames)
+
+        # Warm up lazy pianos before measuring, so loading sound fonts is not counted as rendering
+        synth = self._synth
+        # Consuming the blocks, for example writing them to a wav file which is reported as WAV_WRITE, is not counted
+        # as rendering
+        timed_write = CallTimer(write)
+        with measure(RENDER) as stage:
+            stage.frames = render_events(
+                synth,
+                events,
+                number_of_frames,
+                timed_write,
+                silence_threshold=silence_threshold,
+                max_tail_frames=max_tail_frames,
+            )
+            stage.excluded = timed_write.seconds
+        return stage.frames
 
     def _play_music_container(
         self,
-        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
     ) -> None:
         """Private method to call the appropriate low level play method for given music container class
 
@@ -307,82 +703,91 @@ class Piano(object):
             music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
         """
 
-        logger.debug(
-            "Attempting to play music container: {music_container} of type: {container_type}".format(
-                music_container=music_container,
-                container_type=str(type(music_container)),
-            )
-        )
+        logger.debug("Attempting to play music container: %s of type: %s", music_container, type(music_container))
 
         if isinstance(music_container, str):
-            self.__fluid_synth_sequencer.play_Note(Note(music_container))
+            self._sequencer.play_Note(Note(music_container))
         elif isinstance(music_container, int):
             # FIX ME: Added another type check to fix mypy error
             piano_key = self.keyboard[music_container]
             if isinstance(piano_key, int):
                 raise TypeError("This should not happen")
-            self.__fluid_synth_sequencer.play_Note(piano_key.first_note)
+            self._sequencer.play_Note(piano_key.first_note)
+        elif isinstance(music_container, PianoKey):
+            self._sequencer.play_Note(music_container.first_note)
         elif isinstance(music_container, Note):
-            self.__fluid_synth_sequencer.play_Note(music_container)
+            self._sequencer.play_Note(music_container)
         elif isinstance(music_container, NoteContainer):
-            self.__fluid_synth_sequencer.play_NoteContainer(music_container)
-        elif isinstance(music_container, Bar):
-            self.__fluid_synth_sequencer.play_Bar(music_container)
-        elif isinstance(music_container, Track):
-            self.__fluid_synth_sequencer.play_Track(music_container)
-
-        logger.debug(
-            "Done playing music container: {music_container} of type: {container_type}".format(
-                music_container=music_container,
-                container_type=str(type(music_container)),
-            )
-        )
-
-    def _lint_music_container(self, music_container: Union[str, Note, NoteContainer, Bar, Track]) -> None:
+            self._sequencer.play_NoteContainer(music_container)
+        elif isinstance(music_container, (Bar, Track)):
+            # Bars and Tracks are timed by an EventScheduler instead of the chained sleep calls of
+            # mingus.midi.fluidsynth.FluidSynthSequencer.play_Bar and play_Track, which drift behind the tempo
+            self.last_scheduler_stats = EventScheduler(self._synth).run(compile_schedule(music_container))
+        elif isinstance(music_container, MidiFile):
+            schedule = schedule_from_events(music_container.events(WAV_SAMPLE_FREQUENCY, channel=1))
+            self.last_scheduler_stats = EventScheduler(self._synth).run(schedule)
+        elif isinstance(music_container, Performance):
+            self.last_scheduler_stats = EventScheduler(self._synth).run(music_container.schedule())
+
+        logger.debug("Done playing music container: %s of type: %s", music_container, type(music_container))
+
+    def _lint_music_container(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey, MidiFile, Performance],
+        collect_all: bool = False,
+    ) -> None:
         """Check a music container for invalid notes
 
         Method checks a given music container like mingus.containers.Note or more complex containers like Tracks, etc.
         for notes that can't be found on a piano with 88 keys. In case a string is passed it also checks whether it can
-        be parsed as a mingus.containers.Note.
+        be parsed as a mingus.containers.Note. The container is walked once and every note is looked up in the key table
+        of the keyboard. See pypiano.lint.find_invalid_notes for details. Bars and Tracks that passed
+        the check are remembered until they change, see pypiano.lint.LintCache. The events of a pypiano.midi.MidiFile
+        are checked while the file is parsed, see pypiano.lint.find_invalid_events, and the keys of a
+        pypiano.performance.Performance are checked at once, see pypiano.performance.Performance.find_invalid_notes.
 
         Args
             music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+            collect_all: If False checking stops at the first invalid note, otherwise all invalid notes are reported
 
         Raises
             ValueError: If illegal notes in given music container are found
         """
 
-        logger.debug(
-            "Checking music container: {container} of class {container_type} for invalid notes".format(
-                container=music_container, container_type=str(type(music_container))
-            )
-        )
+        logger.debug("Checking music container of class %s for invalid notes", type(music_container))
 
-        if isinstance(music_container, str):
-            note = Note(music_container)
-            distinct_notes_in_container = {note_to_string(note)}
-        elif isinstance(music_container, Note):
-            distinct_notes_in_container = {note_to_string(music_container)}
-        elif isinstance(music_container, NoteContainer):
-            distinct_notes_in_container = set(note_container_to_note_string_list(music_container))
-        elif isinstance(music_container, Bar):
-            distinct_notes_in_container = set(bar_to_note_string_list(music_container))
-        elif isinstance(music_container, Track):
-            distinct_notes_in_container = set(track_to_note_string_list(music_container))
-        else:
-            raise Exception("Unexpected Error")
+        if isinstance(music_container, (MidiFile, Performance)):
+            with measure(LINT):
+                if isinstance(music_container, Performance):
+                    invalid_events = music_container.find_invalid_notes(collect_all=collect_all)
+                else:
+                    invalid_events = find_invalid_events(music_container.events(), collect_all=collect_all)
+            if invalid_events:
+                raise ValueError(
+                    "Found notes that are not on a piano with 88 keys. Invalid notes in {0}: {1}".format(
+                        music_container, format_invalid_events(invalid_events)
+                    )
+                )
+            return
 
-        diff = distinct_notes_in_container - self.keyboard.distinct_key_names
-        if len(diff) > 0:
+        with measure(LINT):
+            invalid_notes = self._lint_cache.find_invalid_notes(music_container, collect_all=collect_all)
+        if invalid_notes:
             raise ValueError(
-                "Found notes that are not on a piano with 88 keys. Invalid notes in container: {0}".format(diff)
+                "Found notes that are not on a piano with 88 keys. Invalid notes in container: {0}".format(
+                    format_invalid_notes(invalid_notes)
+                )
             )
 
-        logger.debug(
-            "Music container: {container} of class {container_type} looks good".format(
-                container=music_container, container_type=str(type(music_container))
-            )
-        )
+        logger.debug("Music container of class %s looks good", type(music_container))
+
+    def lint_cache_info(self) -> LintCacheInfo:
+        """Get hit and miss counters and the size of the lint cache"""
+        return self._lint_cache.info()
+
+    def clear_lint_cache(self) -> None:
+        """Forget all validated music containers, for example after notes were modified in place"""
+        self._lint_cache.clear()
 
     @staticmethod
     def pause(seconds: int) -> None:
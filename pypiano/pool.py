@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded pool of warmed up pianos for serving concurrent requests
+
+A Piano serializes all calls from several threads on its single synthesizer, see the thread safety notes of Piano. A
+PianoPool keeps up to size pianos with their sound fonts loaded and instrument selected and checks them out to one
+thread at a time, so requests are played or rendered in parallel without paying for loading sound fonts:
+
+    pool = PianoPool(size=4)
+    with pool.checkout(timeout=5) as piano:
+        samples = piano.render(track)
+
+Pianos are health checked when they are returned. Unhealthy pianos are discarded and replaced by a new piano, so the
+pool stays warm. The time every checkout waited for a free piano is reported to the metrics collector as POOL_WAIT,
+see pypiano.metrics.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+from .cache import RenderCache
+from .metrics import record, POOL_WAIT
+from .piano import Piano, DEFAULT_SOUND_FONTS
+
+logger = logging.getLogger("pypiano")
+
+# Statistics of a PianoPool. created counts the pianos currently owned by the pool, idle and in_use the ones waiting
+# for and checked out to a thread. replaced counts pianos discarded by health checks. Wait times are in seconds
+PianoPoolInfo = namedtuple(
+    "PianoPoolInfo", ["size", "created", "idle", "in_use", "checkouts", "replaced", "mean_wait", "max_wait"]
+)
+
+
+def check_piano(piano: Piano) -> bool:
+    """Default health check of a PianoPool
+
+    A piano is healthy if its sound fonts are loaded and no recording was left open, for example by an exception
+    raised while writing the wav file.
+    """
+    return piano._sound_fonts_loaded and not hasattr(piano._sequencer, "wav")
+
+
+class PianoPool(object):
+    """Pool of at most size pianos sharing sound fonts and instrument, safe to use from several threads
+
+    Attributes
+        size: Maximum number of pianos
+        sound_fonts_path: Sound fonts of all pianos, see Piano
+        instrument: Instrument of all pianos. Pianos whose sound fonts or instrument were changed are reset when they
+            are returned
+        audio_driver: Audio driver of all pianos, see Piano
+        render_cache: Optional pypiano.cache.RenderCache shared by all pianos
+        prewarm: Number of pianos created right away. If None all size pianos are created, otherwise the remaining
+            ones are created on first checkout
+        health_check: Callable returning False for pianos that must be replaced. Defaults to check_piano
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        sound_fonts_path: Union[str, Path] = DEFAULT_SOUND_FONTS,
+        instrument: Union[str, int] = "Acoustic Grand Piano",
+        audio_driver: Union[str, None] = None,
+        render_cache: Optional[RenderCache] = None,
+        prewarm: Optional[int] = None,
+        health_check: Callable[[Piano], bool] = check_piano,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be a positive integer. Got {0}".format(size))
+        self.size = size
+        self.sound_fonts_path = Path(sound_fonts_path)
+        self.instrument = instrument
+        self.audio_driver = audio_driver
+        self.render_cache = render_cache
+        self.health_check = health_check
+
+        self._condition = threading.Condition()
+        self._idle: List[Piano] = []
+        self._in_use: Dict[int, Piano] = {}
+        # Pianos owned by the pool, including pianos that are being created or replaced
+        self._created = 0
+        self._closed = False
+        self._checkouts = 0
+        self._replaced = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        for _ in range(size if prewarm is None else min(prewarm, size)):
+            self._created += 1
+            self._idle.append(self._new_piano())
+
+    def _new_piano(self) -> Piano:
+        """Create a warmed up piano. The caller must have counted it in self._created, which is undone on failure"""
+        try:
+            return Piano(
+                sound_fonts_path=self.sound_fonts_path,
+                audio_driver=self.audio_driver,
+                instrument=self.instrument,
+                render_cache=self.render_cache,
+            )
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    @staticmethod
+    def _discard(piano: Piano) -> None:
+        """Stop audio output and release the sound fonts of a piano that is no longer used"""
+        try:
+            piano._stop_audio_output()
+            piano._unload_sound_fonts()
+        except Exception:
+            logger.debug("Could not clean up discarded piano", exc_info=True)
+
+    def acquire(self, timeout: Optional[float] = None) -> Piano:
+        """Check out a piano, waiting until one is free if all size pianos are in use
+
+        Every piano acquired must be returned with release, checkout does this automatically.
+
+        Args
+            timeout: Maximum time to wait in seconds. If None wait until a piano is free
+        Returns
+            A warmed up Piano used by no other thread
+        Raises
+            TimeoutError: If no piano became free within timeout
+            RuntimeError: If the pool was closed
+        """
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        piano = None
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("PianoPool is closed")
+                if self._idle:
+                    piano = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    # Reserve a place for a new piano, which is created without holding the lock
+                    self._created += 1
+                    break
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No piano became free within {0} seconds".format(timeout))
+                self._condition.wait(remaining)
+
+        if piano is None:
+            piano = self._new_piano()
+
+        waited = time.perf_counter() - start
+        with self._condition:
+            self._in_use[id(piano)] = piano
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        record(POOL_WAIT, waited)
+        return piano
+
+    def release(self, piano: Piano) -> None:
+        """Return a piano to the pool, replacing it if it fails the health check
+
+        Raises
+            ValueError: If the piano is not checked out from this pool
+        """
+        with self._condition:
+            if self._in_use.pop(id(piano), None) is not piano:
+                raise ValueError("Piano is not checked out from this pool")
+            closed = self._closed
+
+        healthy = False
+        if not closed:
+            try:
+                if piano._sound_fonts_path != self.sound_fonts_path:
+                    piano.load_sound_fonts(self.sound_fonts_path)
+                if piano.instrument != self.instrument:
+                    piano.load_instrument(self.instrument)
+                healthy = self.health_check(piano)
+            except Exception:
+                logger.warning("Health check of pooled piano failed", exc_info=True)
+
+        if healthy:
+            with self._condition:
+                if not self._closed:
+                    self._idle.append(piano)
+                    self._condition.notify()
+                    return
+                healthy = False
+
+        self._discard(piano)
+        if closed or self._closed:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            return
+
+        logger.info("Replacing unhealthy pooled piano")
+        with self._condition:
+            self._replaced += 1
+        # The place of the discarded piano stays reserved for its replacement. If creating it fails, the place is freed
+        # and the next checkout tries again
+        try:
+            replacement = self._new_piano()
+        except Exception:
+            logger.warning("Could not replace pooled piano", exc_info=True)
+            return
+        with self._condition:
+            self._idle.append(replacement)
+            self._condition.notify()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[Piano]:
+        """Check out a piano for the with block and return it afterwards, also if the block raised, see acquire"""
+        piano = self.acquire(timeout)
+        try:
+            yield piano
+        finally:
+            self.release(piano)
+
+    def close(self) -> None:
+        """Discard all idle pianos and all checked out pianos once they are returned. Waiting threads are woken up"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for piano in idle:
+            self._discard(piano)
+
+    def info(self) -> PianoPoolInfo:
+        """Report the number of pianos, checkouts, replacements and wait times"""
+        with self._condition:
+            mean_wait = self._total_wait / self._checkouts if self._checkouts else 0.0
+            return PianoPoolInfo(
+                self.size,
+                self._created,
+                len(self._idle),
+                len(self._in_use),
+                self._checkouts,
+                self._replaced,
+                mean_wait,
+                self._max_wait,
+            )
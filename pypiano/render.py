@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Offline, faster than realtime rendering of music containers
+
+Music containers are compiled into a list of MIDI events with absolute sample offsets. The synthesizer is then driven
+event by event and samples are pulled in exact block sizes between events, so no wall clock time is spent sleeping.
+"""
+import sys
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import numpy
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import PianoKey, FIRST_MIDI_NUMBER
+from .lint import midi_number
+
+WAV_SAMPLE_FREQUENCY = 44100
+# Maximum number of frames pulled from the synthesizer at once
+BLOCK_SIZE = 4096
+# Default tempo of mingus.midi.sequencer.Sequencer.play_Bar and play_Track
+DEFAULT_BPM = 120
+# Blocks whose peak amplitude does not exceed this value are considered silent, about -60 dBFS for int16 samples
+SILENCE_THRESHOLD = 32
+# Upper limit for the release tail of automatic length recordings, for example for instruments that never decay
+MAX_TAIL_SECONDS = 10
+
+NOTE_OFF = 0x80
+NOTE_ON = 0x90
+
+# A MIDI event at an absolute sample offset. Sorting a list of events orders note off before note on events that
+# happen at the same sample, so repeated notes are retriggered
+MidiEvent = namedtuple("MidiEvent", ["sample", "message", "channel", "key", "velocity"])
+
+
+def _note_events(
+    note: Note, start: int, stop: int, events: List[MidiEvent], channel: Optional[int] = None
+) -> None:
+    """Append note on and note off events for a mingus.containers.Note on its own or a given channel"""
+    key = midi_number(note)
+    channel = int(note.channel) if channel is None else channel
+    events.append(MidiEvent(start, NOTE_ON, channel, key, int(note.velocity)))
+    events.append(MidiEvent(stop, NOTE_OFF, channel, key, 0))
+
+
+def _bar_events(
+    bar: Bar, seconds: float, bpm: float, sample_rate: int, events: List[MidiEvent], channel: Optional[int] = None
+) -> Tuple[float, float]:
+    """Append events of a mingus.containers.Bar starting at seconds
+
+    Timing follows mingus.midi.sequencer.Sequencer.play_Bar: entries are played one after another and a bpm attribute on
+    a NoteContainer changes the tempo from that entry on.
+
+    Returns
+        The end of the bar in seconds and the tempo at the end of the bar
+    """
+    for _, duration, notes in bar:
+        if hasattr(notes, "bpm"):
+            bpm = notes.bpm
+        end = seconds + 60.0 / bpm * (4.0 / duration)
+        if notes is not None:
+            start_sample = int(round(seconds * sample_rate))
+            stop_sample = int(round(end * sample_rate))
+            for note in notes:
+                _note_events(note, start_sample, stop_sample, events, channel)
+        seconds = end
+    return seconds, bpm
+
+
+def compile_events(
+    music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+    bpm: float = DEFAULT_BPM,
+    sample_rate: int = WAV_SAMPLE_FREQUENCY,
+    channel: Optional[int] = None,
+) -> Tuple[List[MidiEvent], int]:
+    """Compile a music container into a sorted list of MIDI events
+
+    Notes, NoteContainers, strings, key indices and PianoKeys are started at sample 0 and stopped after a quarter note
+    at bpm, so recordings of them capture the release of the notes instead of a held key. Bars and Tracks follow the
+    timing of mingus.midi.sequencer.Sequencer.
+
+    Args
+        music_container: A music container such as Notes, NoteContainers, etc. describing a piece of music
+        bpm: Initial tempo in quarter notes per minute
+        sample_rate: Sample rate used to convert times into sample offsets
+        channel: MIDI channel used for all events. If None the channel of every Note is used and key indices are played
+            on channel 1
+    Returns
+        A sorted list of MidiEvent tuples and the sample offset where the music container ends
+    """
+    events: List[MidiEvent] = []
+    end = 0.0
+
+    if isinstance(music_container, (str, int, Note, NoteContainer, PianoKey)):
+        # Music containers without timing of their own last a quarter note
+        end = 60.0 / bpm
+        stop = int(round(end * sample_rate))
+        if isinstance(music_container, int):
+            key_channel = 1 if channel is None else channel
+            key = music_container + FIRST_MIDI_NUMBER
+            events.append(MidiEvent(0, NOTE_ON, key_channel, key, Note.velocity))
+            events.append(MidiEvent(stop, NOTE_OFF, key_channel, key, 0))
+        elif isinstance(music_container, NoteContainer):
+            for note in music_container:
+                _note_events(note, 0, stop, events, channel)
+        elif isinstance(music_container, str):
+            _note_events(Note(music_container), 0, stop, events, channel)
+        elif isinstance(music_container, PianoKey):
+            _note_events(music_container.first_note, 0, stop, events, channel)
+        else:
+            _note_events(music_container, 0, stop, events, channel)
+    elif isinstance(music_container, Bar):
+        end, _ = _bar_events(music_container, 0.0, bpm, sample_rate, events, channel)
+    elif isinstance(music_container, Track):
+        for bar in music_container:
+            end, bpm = _bar_events(bar, end, bpm, sample_rate, events, channel)
+    else:
+        raise TypeError("Unsupported music container of type {0}".format(type(music_container)))
+
+    events.sort()
+    return events, int(round(end * sample_rate))
+
+
+# Sample formats supported by Piano.render
+SAMPLE_DTYPES = (numpy.dtype(numpy.int16), numpy.dtype(numpy.float32))
+
+
+def check_sample_dtype(dtype: Union[str, numpy.dtype]) -> numpy.dtype:
+    """Check that dtype is one of the supported sample formats int16 or float32"""
+    dtype = numpy.dtype(dtype)
+    if dtype not in SAMPLE_DTYPES:
+        raise ValueError("Samples can only be rendered as int16 or float32. Got {0}".format(dtype))
+    return dtype
+
+
+def convert_samples(
+    samples: numpy.ndarray, dtype: Union[str, numpy.dtype], out: Optional[numpy.ndarray] = None
+) -> numpy.ndarray:
+    """Convert int16 samples to int16 or float32 samples in the range -1.0 to 1.0, optionally into out"""
+    dtype = check_sample_dtype(dtype)
+    if dtype == numpy.int16:
+        if out is None:
+            return samples
+        out[...] = samples
+        return out
+    return numpy.multiply(samples, 1.0 / 32768, out=out, dtype=numpy.float32)
+
+
+def send_event(synth, event: MidiEvent) -> None:
+    """Send a single MidiEvent to a synthesizer"""
+    if event.message == NOTE_ON:
+        synth.noteon(event.channel, event.key, event.velocity)
+    else:
+        synth.noteoff(event.channel, event.key)
+
+
+class BlockReader(object):
+    """Pull blocks of samples from a synthesizer into one reusable buffer
+
+    For mingus.midi.pyfluidsynth.Synth objects samples are written by FluidSynth directly into the buffer, otherwise
+    the result of get_samples is copied into it. Blocks returned by read are views into the shared buffer and are only
+    valid until the next call to read, so memory use is bounded by the block size and not by the recording length.
+
+    Attributes
+        synth: A mingus.midi.pyfluidsynth.Synth object or any object with a compatible get_samples method
+        block_size: Maximum number of stereo frames per block
+    """
+
+    def __init__(self, synth, block_size: int = BLOCK_SIZE) -> None:
+        self.synth = synth
+        self.block_size = block_size
+        self._buffer = numpy.zeros(block_size * 2, dtype=numpy.int16)
+        self._write_s16 = _native_write_s16(synth)
+
+    def read(self, frames: int) -> numpy.ndarray:
+        """Render up to block_size frames and return them as interleaved stereo int16 view into the shared buffer"""
+        frames = min(frames, self.block_size)
+        block = self._buffer[: frames * 2]
+        if self._write_s16 is not None:
+            buffer_address = self._buffer.ctypes.data
+            self._write_s16(self.synth.synth, frames, buffer_address, 0, 2, buffer_address, 1, 2)
+        else:
+            block[:] = self.synth.get_samples(frames)
+        return block
+
+
+def _native_write_s16(synth) -> Optional[Callable]:
+    """Get fluid_synth_write_s16 if synth is a mingus.midi.pyfluidsynth.Synth"""
+    # A Synth can only exist if mingus.midi.pyfluidsynth was imported, so libfluidsynth is never loaded just to check
+    pyfluidsynth = sys.modules.get("mingus.midi.pyfluidsynth")
+    if pyfluidsynth is None:
+        return None
+    if isinstance(synth, pyfluidsynth.Synth) and hasattr(pyfluidsynth, "fluid_synth_write_s16"):
+        return pyfluidsynth.fluid_synth_write_s16
+    return None
+
+
+def _pull_samples(reader: BlockReader, number_of_frames: int, write: Callable[[numpy.ndarray], None]) -> None:
+    """Pull a number of frames from the synthesizer block by block"""
+    while number_of_frames > 0:
+        block = reader.read(number_of_frames)
+        write(block)
+        number_of_frames -= len(block) // 2
+
+
+def _pull_until_silent(
+    reader: BlockReader, max_frames: int, write: Callable[[numpy.ndarray], None], silence_threshold: int
+) -> int:
+    """Pull blocks from the synthesizer until a block is silent or max_frames frames were pulled
+
+    The first silent block is not written. Returns the number of frames written.
+    """
+    written = 0
+    while written < max_frames:
+        block = reader.read(max_frames - written)
+        if len(block) == 0 or max(int(block.max()), -int(block.min())) <= silence_threshold:
+            break
+        write(block)
+        written += len(block) // 2
+    return written
+
+
+def render_events(
+    synth,
+    events: Iterable[MidiEvent],
+    number_of_frames: int,
+    write: Callable[[numpy.ndarray], None],
+    block_size: int = BLOCK_SIZE,
+    silence_threshold: Optional[int] = None,
+    max_tail_frames: int = MAX_TAIL_SECONDS * WAV_SAMPLE_FREQUENCY,
+) -> int:
+    """Render a sorted list of MIDI events without sleeping
+
+    Events are sent to the synthesizer at their exact sample offset and the samples in between are pulled from the
+    synthesizer via get_samples. If silence_threshold is given, rendering continues after number_of_frames frames until
+    the output goes quiet, so the release of the last notes is captured without recording trailing silence. Notes
+    that are still sounding at the end are stopped.
+
+    Args
+        synth: A mingus.midi.pyfluidsynth.Synth object
+        events: A sorted list or iterator of MidiEvent tuples, see compile_events and pypiano.midi.MidiFile.events
+        number_of_frames: Number of stereo frames to render before the release tail
+        write: Callable receiving each rendered block as an interleaved stereo int16 array. Blocks are views into a
+            reused buffer and must be consumed before write returns, see BlockReader
+        block_size: Maximum number of frames pulled from the synthesizer at once
+        silence_threshold: Peak amplitude at or below which a block counts as silent. If None no release tail is
+            rendered
+        max_tail_frames: Maximum number of frames rendered for the release tail
+    Returns
+        The total number of rendered frames
+    """
+    reader = BlockReader(synth, block_size)
+    cursor = 0
+    sounding = set()
+
+    for event in events:
+        if event.sample > number_of_frames:
+            break
+        if event.sample > cursor:
+            _pull_samples(reader, event.sample - cursor, write)
+            cursor = event.sample
+        send_event(synth, event)
+        if event.message == NOTE_ON:
+            sounding.add((event.channel, event.key))
+        else:
+            sounding.discard((event.channel, event.key))
+
+    _pull_samples(reader, number_of_frames - cursor, write)
+
+    tail = 0
+    if silence_threshold is not None:
+        tail = _pull_until_silent(reader, max_tail_frames, write, silence_threshold)
+
+    for channel, key in sounding:
+        synth.noteoff(channel, key)
+
+    return number_of_frames + tail
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Per key sample bank mixing cached single notes into chords instead of rendering them with FluidSynth
+"""
+import math
+from collections import namedtuple, OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+import numpy
+from mingus.containers import Note
+
+from .keyboard import FIRST_MIDI_NUMBER
+from .render import MidiEvent, DEFAULT_BPM, MAX_TAIL_SECONDS, NOTE_OFF, NOTE_ON, WAV_SAMPLE_FREQUENCY
+
+# Default memory cap of a SampleBank in bytes. A piano note rendered until it decayed takes about 1 to 2 MB
+DEFAULT_MAX_BYTES = 256 << 20
+# MIDI controller silencing all voices of a channel immediately, so buffers do not contain the release of other notes
+ALL_SOUND_OFF = 120
+# Channel a Piano plays on
+PIANO_CHANNEL = 1
+# Length of single notes and chords compiled by a Piano in frames, a quarter note at the default tempo, see
+# pypiano.render.compile_events
+DEFAULT_NOTE_FRAMES = int(round(60.0 / DEFAULT_BPM * WAV_SAMPLE_FREQUENCY))
+
+# Statistics of a SampleBank. hits count buffers and mixed chords served from the cache, misses count buffers rendered
+# with the synthesizer and size is the memory used by the cached buffers in bytes
+SampleBankInfo = namedtuple("SampleBankInfo", ["hits", "misses", "max_bytes", "size", "entries"])
+
+
+class SampleBank(object):
+    """Cache of rendered single notes of a Piano, mixed into chords with NumPy
+
+    Buffers are kept per instrument and sound fonts of the piano, so changing the instrument does not serve buffers of
+    the previous one. FluidSynth mixes voices additively, so mixed chords match direct renders up to the int16 dither
+    of every buffer and the quantization of note events to blocks of 64 frames. Reverb and chorus keep state of their
+    own and can differ, see check_fidelity.
+
+    Attributes
+        piano: The Piano rendering the buffers
+        max_bytes: Memory cap of the cached buffers in bytes
+        gain: Factor applied to mixed chords before they are clipped to the int16 range
+    """
+
+    def __init__(self, piano, max_bytes: int = DEFAULT_MAX_BYTES, gain: float = 1.0) -> None:
+        self.piano = piano
+        self.max_bytes = max_bytes
+        self.gain = gain
+        # Maps (instrument, sound fonts, key, velocity, length) to the buffer of shape (frames, 2) and whether it was
+        # rendered until the note went silent. Buffers cut off at the maximum tail length can not be extended with
+        # silence
+        self._buffers: "OrderedDict[Tuple, Tuple[numpy.ndarray, bool]]" = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        # Buffers are rendered with the synthesizer of the piano, so the bank shares the lock of the piano
+        self._lock = piano._lock
+
+    def _render_direct(self, events: List[MidiEvent], end: int, frames: Optional[int]) -> numpy.ndarray:
+        """Render events ending at sample end with the synthesizer of the piano, starting and ending in silence"""
+        blocks: List[numpy.ndarray] = []
+        # Half a frame more avoids losing the last frame to rounding, max_frames cuts the render to frames
+        record_seconds = None if frames is None else (max(frames - end, 0) + 0.5) / WAV_SAMPLE_FREQUENCY
+        with self._lock:
+            synth = self.piano._synth
+            synth.cc(PIANO_CHANNEL, ALL_SOUND_OFF, 0)
+            self.piano._stop_audio_output()
+            self.piano._render_events(
+                events, end, lambda samples: blocks.append(samples.copy()), record_seconds, frames
+            )
+            synth.cc(PIANO_CHANNEL, ALL_SOUND_OFF, 0)
+        samples = numpy.concatenate(blocks) if blocks else numpy.zeros(0, dtype=numpy.int16)
+        return samples.reshape(-1, 2)
+
+    @staticmethod
+    def _chord_events(notes: Iterable[Tuple[int, int]], length: Optional[int]) -> List[MidiEvent]:
+        """Get the sorted events of notes started at sample 0 and stopped at length, or held if length is None"""
+        events = []
+        for key, velocity in notes:
+            events.append(MidiEvent(0, NOTE_ON, PIANO_CHANNEL, key, velocity))
+            if length is not None:
+                events.append(MidiEvent(length, NOTE_OFF, PIANO_CHANNEL, key, 0))
+        return sorted(events)
+
+    def _store(self, cache_key: Tuple, entry: Tuple[numpy.ndarray, bool]) -> None:
+        """Add a read-only buffer to the cache and evict the least recently used buffers above the memory cap"""
+        entry[0].flags.writeable = False
+        self._buffers[cache_key] = entry
+        self._size += entry[0].nbytes
+        while self._size > self.max_bytes and len(self._buffers) > 1:
+            _, (evicted, _) = self._buffers.popitem(last=False)
+            self._size -= evicted.nbytes
+
+    def _lookup(self, cache_key: Tuple) -> Optional[Tuple[numpy.ndarray, bool]]:
+        """Get a cached entry and count the hit, or None"""
+        entry = self._buffers.get(cache_key)
+        if entry is not None:
+            self._buffers.move_to_end(cache_key)
+            self._hits += 1
+        return entry
+
+    def _buffer(self, key: int, velocity: int, length: Optional[int]) -> Tuple[numpy.ndarray, bool]:
+        """Get the buffer of a key and velocity released after length frames, rendering it on a miss"""
+        cache_key = (self.piano.instrument, self.piano._sound_font_key, key, velocity, length)
+        with self._lock:
+            entry = self._lookup(cache_key)
+            if entry is not None:
+                return entry
+
+            self._misses += 1
+            end = length or 0
+            buffer = self._render_direct(self._chord_events([(key, velocity)], length), end, None)
+            entry = (buffer, len(buffer) - end < MAX_TAIL_SECONDS * WAV_SAMPLE_FREQUENCY)
+            self._store(cache_key, entry)
+            return entry
+
+    def warm_up(
+        self, velocities: Iterable[int] = (Note.velocity,), length: Optional[int] = DEFAULT_NOTE_FRAMES
+    ) -> None:
+        """Render all 88 keys of the current instrument for the given velocities and note length, see render_chord"""
+        for velocity in velocities:
+            for key in range(FIRST_MIDI_NUMBER, FIRST_MIDI_NUMBER + 88):
+                self._buffer(key, velocity, length)
+
+    def render_chord(
+        self,
+        notes: Iterable[Tuple[int, int]],
+        frames: Optional[int] = None,
+        length: Optional[int] = DEFAULT_NOTE_FRAMES,
+    ) -> Optional[numpy.ndarray]:
+        """Mix the buffers of notes started together and released together
+
+        Mixed chords are cached like single notes, so playing a chord again returns the cached array. Single notes at
+        unit gain are served as views of their buffer without mixing. Both are read-only.
+
+        Args
+            notes: Iterable of (MIDI key, velocity) pairs
+            frames: Number of frames to render. If None the chord lasts until its longest note went silent
+            length: Number of frames after which the notes are released. If None the notes are held until the end
+        Returns
+            A read-only int16 array of shape (frames, 2) or None if a buffer is shorter than frames because it was cut
+            off at the maximum tail length
+        """
+        notes = sorted(notes)
+        piano = self.piano
+        chord_key = ("chord", piano.instrument, piano._sound_font_key, tuple(notes), length, frames, self.gain)
+        with self._lock:
+            entry = self._lookup(chord_key)
+        if entry is not None:
+            return entry[0]
+
+        buffers = [self._buffer(key, velocity, length) for key, velocity in notes]
+        if frames is None:
+            frames = max((len(buffer) for buffer, _ in buffers), default=0)
+        elif any(len(buffer) < frames and not complete for buffer, complete in buffers):
+            return None
+        if len(buffers) == 1 and self.gain == 1.0 and len(buffers[0][0]) >= frames:
+            return buffers[0][0][:frames]
+
+        # Only the overlapping part of every buffer is added, the rest of the mix stays silent
+        mix = numpy.zeros((frames, 2), dtype=numpy.int32)
+        for buffer, _ in buffers:
+            overlap = min(len(buffer), frames)
+            mix[:overlap] += buffer[:overlap]
+        if self.gain != 1.0:
+            mix = numpy.rint(mix * self.gain)
+        samples = numpy.clip(mix, -32768, 32767, out=mix).astype(numpy.int16)
+        with self._lock:
+            self._store(chord_key, (samples, True))
+        return samples
+
+    def render_events(
+        self, events: List[MidiEvent], end: int, record_seconds: Optional[float]
+    ) -> Optional[numpy.ndarray]:
+        """Mix compiled MIDI events if they form a chord on the piano channel, see pypiano.render.compile_events
+
+        Returns
+            An int16 array of shape (frames, 2) or None if the events can not be mixed from the bank
+        """
+        notes = [(event.key, event.velocity) for event in events if event.message == NOTE_ON]
+        released = [event.key for event in events if event.message != NOTE_ON]
+        if not notes or any(event.channel != PIANO_CHANNEL for event in events):
+            return None
+        if any(event.sample != 0 for event in events[: len(notes)]):
+            return None
+        if released:
+            # All notes must be released together at the end, like compiled Notes and NoteContainers
+            if any(event.sample != end for event in events[len(notes) :]):
+                return None
+            if sorted(released) != sorted(key for key, _ in notes):
+                return None
+            length: Optional[int] = end
+        elif end == 0:
+            length = None
+        else:
+            return None
+        frames = None if record_seconds is None else end + int(record_seconds * WAV_SAMPLE_FREQUENCY)
+        return self.render_chord(notes, frames, length)
+
+    def check_fidelity(
+        self,
+        notes: Iterable[Tuple[int, int]],
+        frames: int = WAV_SAMPLE_FREQUENCY,
+        length: Optional[int] = DEFAULT_NOTE_FRAMES,
+    ) -> float:
+        """Compare a mixed chord with a direct render of the synthesizer
+
+        Args
+            notes: Iterable of (MIDI key, velocity) pairs
+            frames: Number of frames to compare
+            length: Number of frames after which the notes are released, see render_chord
+        Returns
+            Signal to error ratio of the mixed chord in dB, infinity if both are identical
+        """
+        notes = list(notes)
+        mixed = self.render_chord(notes, frames, length)
+        if mixed is None:
+            raise ValueError("Buffers of the bank are too short to render {0} frames".format(frames))
+        direct = self._render_direct(self._chord_events(notes, length), min(length or 0, frames), frames)
+        direct = direct.astype(numpy.float64)
+        error = numpy.sum((mixed - direct) ** 2)
+        if error == 0:
+            return math.inf
+        return 10 * math.log10(max(numpy.sum(direct**2), 1.0) / error)
+
+    def clear(self) -> None:
+        """Remove all buffers"""
+        with self._lock:
+            self._buffers.clear()
+            self._size = 0
+
+    def info(self) -> SampleBankInfo:
+        """Report hits, misses, memory cap, memory use and number of buffers"""
+        with self._lock:
+            return SampleBankInfo(self._hits, self._misses, self.max_bytes, self._size, len(self._buffers))
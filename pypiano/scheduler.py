@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Realtime event scheduler with drift free timing
+
+mingus.midi.sequencer.Sequencer.play_Bar and play_Track chain time.sleep calls, so their errors add up and long pieces
+drift behind their nominal tempo. The scheduler in this module precompiles a music container into a sorted array of
+absolute timestamps and dispatches every event against a monotonic clock instead. It sleeps until shortly before an
+event is due and busy waits for the remaining lookahead window, which keeps the dispatch latency of every event
+independent of all previous ones.
+"""
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Iterable, Optional, Union
+
+import numpy
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import PianoKey
+from .render import compile_events, MidiEvent, DEFAULT_BPM, NOTE_ON, WAV_SAMPLE_FREQUENCY
+
+# Default time in seconds before an event is due at which the scheduler stops sleeping and starts busy waiting
+DEFAULT_LOOKAHEAD = 0.002
+
+SCHEDULE_DTYPE = numpy.dtype(
+    [
+        ("time", numpy.float64),
+        ("message", numpy.uint8),
+        ("channel", numpy.uint8),
+        ("key", numpy.uint8),
+        ("velocity", numpy.uint8),
+    ]
+)
+
+# Measured dispatch latency statistics in seconds. latency is the difference between the time an event was sent to
+# the synthesizer and the time it was due. jitter is the standard deviation of the latency
+SchedulerStats = namedtuple("SchedulerStats", ["events", "mean_latency", "max_latency", "jitter"])
+
+
+def compile_schedule(
+    music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+    bpm: float = DEFAULT_BPM,
+    channel: Optional[int] = None,
+) -> numpy.ndarray:
+    """Compile a music container into a sorted structured array of events with absolute timestamps in seconds
+
+    See pypiano.render.compile_events for the timing of the different music containers and the channel argument.
+
+    Returns
+        An array of SCHEDULE_DTYPE with the fields time, message, channel, key and velocity
+    """
+    events, _ = compile_events(music_container, bpm=bpm, sample_rate=WAV_SAMPLE_FREQUENCY, channel=channel)
+    return schedule_from_events(events)
+
+
+def schedule_from_events(events: Iterable[MidiEvent]) -> numpy.ndarray:
+    """Convert sorted MidiEvent tuples at WAV_SAMPLE_FREQUENCY from a list or iterator into a SCHEDULE_DTYPE array"""
+    schedule = numpy.array(
+        [(event.sample, event.message, event.channel, event.key, event.velocity) for event in events],
+        dtype=SCHEDULE_DTYPE,
+    )
+    schedule["time"] /= WAV_SAMPLE_FREQUENCY
+    return schedule
+
+
+class EventScheduler(object):
+    """Dispatch a compiled schedule to a synthesizer in realtime
+
+    FluidSynth's own sequencer is not exposed by mingus.midi.pyfluidsynth, so events are timed against a monotonic
+    clock in Python. run blocks the calling thread until the schedule was played or stop was called from another
+    thread.
+
+    Attributes
+        synth: A mingus.midi.pyfluidsynth.Synth object
+        lookahead: Time in seconds before an event is due at which sleeping stops and busy waiting starts. Larger values
+            reduce latency and jitter under load at the cost of CPU time
+        clock: Monotonic clock returning seconds
+    """
+
+    def __init__(
+        self,
+        synth,
+        lookahead: float = DEFAULT_LOOKAHEAD,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Optional[Callable[[float], object]] = None,
+    ) -> None:
+        self.synth = synth
+        self.lookahead = lookahead
+        self.clock = clock
+        self._stop_event = threading.Event()
+        # Sleeping on the stop event makes waiting for the next event interruptible by stop
+        self._sleep = sleep if sleep is not None else self._stop_event.wait
+
+    def stop(self) -> None:
+        """Stop a running schedule. Notes that are still sounding are stopped by run"""
+        self._stop_event.set()
+
+    def run(self, schedule: numpy.ndarray) -> SchedulerStats:
+        """Play a schedule created by compile_schedule and measure its timing
+
+        Args
+            schedule: A sorted array of SCHEDULE_DTYPE
+        Returns
+            SchedulerStats of the dispatched events
+        """
+        self._stop_event.clear()
+        latencies = numpy.zeros(len(schedule))
+        sounding = set()
+        dispatched = 0
+        start = self.clock()
+
+        for time_offset, message, channel, key, velocity in schedule.tolist():
+            due = start + time_offset
+            remaining = due - self.clock()
+            if remaining > self.lookahead:
+                self._sleep(remaining - self.lookahead)
+            if self._stop_event.is_set():
+                break
+            while self.clock() < due:
+                pass
+
+            if message == NOTE_ON:
+                self.synth.noteon(channel, key, velocity)
+                sounding.add((channel, key))
+            else:
+                self.synth.noteoff(channel, key)
+                sounding.discard((channel, key))
+            latencies[dispatched] = self.clock() - due
+            dispatched += 1
+
+        if self._stop_event.is_set():
+            for channel, key in sounding:
+                self.synth.noteoff(channel, key)
+
+        latencies = latencies[:dispatched]
+        if dispatched == 0:
+            return SchedulerStats(0, 0.0, 0.0, 0.0)
+        return SchedulerStats(dispatched, float(latencies.mean()), float(latencies.max()), float(latencies.std()))
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Multi channel sessions playing several instruments on one shared synthesizer
+
+A Piano owns a synthesizer and loads its own copy of the sound fonts, so playing an ensemble with one Piano per
+instrument multiplies memory use and mixes the parts only at the audio driver. A PianoSession owns a single Piano and
+hands out lightweight SessionPiano handles, each bound to one of the 16 MIDI channels of the synthesizer with its own
+instrument. Parts of several handles are merged into one event stream, so they are rendered or played together into
+one mix by one synthesizer.
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy
+from mingus.containers import Note, NoteContainer, Bar, Track
+
+from .keyboard import PianoKey
+from .piano import Piano, DEFAULT_SOUND_FONTS
+from .samples import PIANO_CHANNEL
+from .render import check_sample_dtype, compile_events, MidiEvent, DEFAULT_BPM, WAV_SAMPLE_FREQUENCY
+from .scheduler import schedule_from_events, EventScheduler, SchedulerStats
+
+logger = logging.getLogger("pypiano")
+
+# Number of MIDI channels of a synthesizer
+MAX_CHANNELS = 16
+# Channel reserved for percussion by General MIDI. It is handed out last, because it does not play melodic instruments
+DRUM_CHANNEL = 9
+# Order in which channels are handed out. Channel 1 comes first, because it is the channel a plain Piano plays on. The
+# instrument of a handle on channel 1 is the instrument of the Piano of the session
+CHANNEL_ORDER = (1, 0) + tuple(range(2, DRUM_CHANNEL)) + tuple(range(DRUM_CHANNEL + 1, MAX_CHANNELS)) + (DRUM_CHANNEL,)
+
+
+class SessionPiano(object):
+    """A piano playing on one MIDI channel of a PianoSession
+
+    Handles are created by PianoSession.new_piano and share the synthesizer and sound fonts of their session. play and
+    render of a handle only play its own part, use PianoSession.play and PianoSession.render to play several handles
+    together.
+
+    Attributes
+        session: The PianoSession this handle belongs to
+        channel: The MIDI channel of this handle
+        instrument: The instrument currently selected on the channel
+    """
+
+    def __init__(self, session: "PianoSession", channel: int, instrument: Union[str, int]) -> None:
+        self._session: Optional[PianoSession] = session
+        self._channel = channel
+        self.instrument = instrument
+
+    def __repr__(self) -> str:
+        return "SessionPiano(channel={0}, instrument={1!r})".format(self._channel, self.instrument)
+
+    @property
+    def session(self) -> "PianoSession":
+        if self._session is None:
+            raise RuntimeError("SessionPiano on channel {0} was already released".format(self._channel))
+        return self._session
+
+    @property
+    def channel(self) -> int:
+        return self._channel
+
+    def load_instrument(self, instrument: Union[str, int]) -> None:
+        """Change the instrument of this channel, see Piano.load_instrument"""
+        self.session._select_instrument(self._channel, instrument)
+        self.instrument = instrument
+
+    def play(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        bpm: float = DEFAULT_BPM,
+        lint: bool = True,
+    ) -> SchedulerStats:
+        """Play a music container on this channel via audio output, see PianoSession.play"""
+        return self.session.play([(self, music_container)], bpm=bpm, lint=lint)
+
+    def render(
+        self,
+        music_container: Union[str, int, Note, NoteContainer, Bar, Track, PianoKey],
+        record_seconds: Optional[float] = None,
+        dtype: Union[str, numpy.dtype] = "int16",
+        lint: bool = True,
+        bpm: float = DEFAULT_BPM,
+    ) -> numpy.ndarray:
+        """Render a music container on this channel to a NumPy array, see PianoSession.render"""
+        return self.session.render(
+            [(self, music_container)], record_seconds=record_seconds, dtype=dtype, lint=lint, bpm=bpm
+        )
+
+    def release(self) -> None:
+        """Give the channel of this handle back to its session. The handle can not be used afterwards"""
+        self.session.release(self)
+
+
+class PianoSession(object):
+    """A synthesizer shared by up to 16 SessionPiano handles with different instruments
+
+    Attributes
+        piano: The Piano owning the synthesizer and sound fonts. If not given a new Piano is created from
+            sound_fonts_path and audio_driver
+    """
+
+    def __init__(
+        self,
+        sound_fonts_path: Union[str, Path] = DEFAULT_SOUND_FONTS,
+        audio_driver: Union[str, None] = None,
+        piano: Optional[Piano] = None,
+    ) -> None:
+        self.piano = piano if piano is not None else Piano(sound_fonts_path=sound_fonts_path, audio_driver=audio_driver)
+        self._handles: Dict[int, SessionPiano] = {}
+        # Handles may be created, released and played from several threads
+        self._lock = threading.Lock()
+
+    @property
+    def pianos(self) -> Tuple[SessionPiano, ...]:
+        """All handles that were not released yet, ordered by channel"""
+        return tuple(self._handles[channel] for channel in sorted(self._handles))
+
+    def new_piano(
+        self, instrument: Union[str, int] = "Acoustic Grand Piano", channel: Optional[int] = None
+    ) -> SessionPiano:
+        """Create a handle playing a given instrument on a free MIDI channel
+
+        Args
+            instrument: Instrument of the handle, see Piano.load_instrument
+            channel: MIDI channel from 0 to 15. If None the next free channel is used, the drum channel 9 last
+        Returns
+            A SessionPiano bound to the channel
+        Raises
+            ValueError: If channel is not a valid MIDI channel or already in use
+            RuntimeError: If all 16 channels are in use
+        """
+        # Unknown instruments are rejected before a channel is taken
+        self.piano._resolve_instrument(instrument)
+
+        with self._lock:
+            if channel is None:
+                free_channels = [candidate for candidate in CHANNEL_ORDER if candidate not in self._handles]
+                if not free_channels:
+                    raise RuntimeError("All {0} MIDI channels of the session are in use".format(MAX_CHANNELS))
+                channel = free_channels[0]
+            elif not 0 <= channel < MAX_CHANNELS:
+                raise ValueError("channel must be between 0 and {0}. Got {1}".format(MAX_CHANNELS - 1, channel))
+            elif channel in self._handles:
+                raise ValueError("Channel {0} is already in use by {1!r}".format(channel, self._handles[channel]))
+
+            self._select_instrument(channel, instrument)
+            handle = SessionPiano(self, channel, instrument)
+            self._handles[channel] = handle
+
+        logger.debug("Created %r", handle)
+        return handle
+
+    def _select_instrument(self, channel: int, instrument: Union[str, int]) -> None:
+        """Select an instrument on a channel
+
+        The channel of the Piano itself is changed via Piano.load_instrument, so Piano.instrument, which is part of the
+        keys of its render cache and sample bank, always names the instrument playing on that channel.
+        """
+        if channel == PIANO_CHANNEL:
+            self.piano.load_instrument(instrument)
+        else:
+            self.piano._set_program(channel, self.piano._resolve_instrument(instrument))
+
+    def release(self, handle: SessionPiano) -> None:
+        """Give the channel of a handle back to the session"""
+        with self._lock:
+            if self._handles.get(handle.channel) is not handle:
+                raise ValueError("{0!r} does not belong to this session".format(handle))
+            del self._handles[handle.channel]
+            handle._session = None
+
+    def _compile_parts(
+        self,
+        parts: Iterable[Tuple[SessionPiano, Union[str, int, Note, NoteContainer, Bar, Track, PianoKey]]],
+        bpm: float,
+        lint: bool,
+    ) -> Tuple[List[MidiEvent], int]:
+        """Compile the music containers of several handles into one sorted list of MIDI events on their channels"""
+        events: List[MidiEvent] = []
+        end = 0
+
+        for handle, music_container in parts:
+            if handle._session is not self:
+                raise ValueError("{0!r} does not belong to this session".format(handle))
+            if lint:
+                self.piano._lint_music_container(music_container)
+            part_events, part_end = compile_events(
+                music_container, bpm=bpm, sample_rate=WAV_SAMPLE_FREQUENCY, channel=handle.channel
+            )
+            events.extend(part_events)
+            end = max(end, part_end)
+
+        events.sort()
+        return events, end
+
+    def render(
+        self,
+        parts: Iterable[Tuple[SessionPiano, Union[str, int, Note, NoteContainer, Bar, Track, PianoKey]]],
+        record_seconds: Optional[float] = None,
+        dtype: Union[str, numpy.dtype] = "int16",
+        lint: bool = True,
+        bpm: float = DEFAULT_BPM,
+    ) -> numpy.ndarray:
+        """Render the parts of several handles together into one mix, see Piano.render
+
+        Args
+            parts: An iterable of (handle, music_container) pairs. All parts start at the same time
+            record_seconds: Duration in seconds rendered after the end of the longest part. If None rendering stops as
+                soon as the release of the last notes went silent
+            dtype: Either int16 or float32. float32 samples are scaled to the range -1.0 to 1.0
+            lint: If False the music containers are not checked for invalid notes
+            bpm: Initial tempo in quarter notes per minute, see PianoSession.play
+        Returns
+            An array of shape (frames, 2) with the stereo samples at 44100 Hz
+        """
+        dtype = check_sample_dtype(dtype)
+        events, end = self._compile_parts(parts, bpm, lint)
+        with self._lock:
+            return self.piano._render_events_to_array(events, end, record_seconds, dtype)
+
+    def play(
+        self,
+        parts: Iterable[Tuple[SessionPiano, Union[str, int, Note, NoteContainer, Bar, Track, PianoKey]]],
+        bpm: float = DEFAULT_BPM,
+        lint: bool = True,
+    ) -> SchedulerStats:
+        """Play the parts of several handles together via audio output
+
+        Blocks until the longest part was played. Notes, NoteContainers, strings, key indices and PianoKeys last a
+        quarter note at bpm, see pypiano.render.compile_events.
+
+        Args
+            parts: An iterable of (handle, music_container) pairs. All parts start at the same time
+            bpm: Initial tempo in quarter notes per minute
+            lint: If False the music containers are not checked for invalid notes
+        Returns
+            SchedulerStats measuring the timing of the played events
+        """
+        events, _ = self._compile_parts(parts, bpm, lint)
+        # Like Piano.play, the lock of the piano is held until the parts were played
+        with self.piano._lock:
+            self.piano._start_audio_output()
+            stats = EventScheduler(self.piano._synth).run(schedule_from_events(events))
+        self.piano.last_scheduler_stats = stats
+        return stats
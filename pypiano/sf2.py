@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Inspect SoundFont 2 files without loading them into FluidSynth
+
+An SF2 file is a RIFF file with three LIST chunks: INFO with metadata, sdta with the sample data, which makes up almost
+all of the file, and pdta with the preset, instrument and sample headers. The file is memory mapped and only the
+chunk headers, INFO and the preset headers of pdta are parsed, so the sample data is never read from disk.
+
+See the SoundFont 2.04 specification for the layout of the chunks.
+"""
+import mmap
+import struct
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from .fonts import sound_font_key, SoundFontKey
+
+# A preset of a sound font, selected on a MIDI channel by its bank and program number
+SoundFontPreset = namedtuple("SoundFontPreset", ["name", "bank", "program"])
+
+# Summary of a sound font. version is the (major, minor) version of the SoundFont format, info maps the ids of all
+# INFO sub chunks, such as INAM or ICOP, to their text and presets is sorted by bank and program. sample_data_size is
+# the size of the sdta chunk's sample data in bytes
+SoundFontInfo = namedtuple("SoundFontInfo", ["path", "version", "name", "info", "presets", "sample_data_size"])
+
+_CHUNK_HEADER = struct.Struct("<4sI")
+# Preset header record of the phdr chunk: name, program, bank, preset bag index, library, genre and morphology
+_PRESET_HEADER = struct.Struct("<20sHHHIII")
+
+
+def _iter_chunks(data: mmap.mmap, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Iterate over the RIFF chunks between start and end and yield their id, data offset and data size"""
+    offset = start
+    while offset + _CHUNK_HEADER.size <= end:
+        chunk_id, size = _CHUNK_HEADER.unpack_from(data, offset)
+        offset += _CHUNK_HEADER.size
+        if offset + size > end:
+            raise ValueError("Chunk {0!r} at offset {1} exceeds its parent chunk".format(chunk_id, offset))
+        yield chunk_id, offset, size
+        # Chunks are padded to an even size
+        offset += size + (size & 1)
+
+
+def _decode(raw: bytes) -> str:
+    """Decode a zero terminated string of an SF2 file"""
+    return raw.split(b"\0", 1)[0].decode("latin-1").strip()
+
+
+def _read_info(data: mmap.mmap, start: int, end: int) -> Tuple[Tuple[int, int], Dict[str, str]]:
+    """Read the version and text sub chunks of the INFO chunk"""
+    version = (0, 0)
+    info = {}
+    for chunk_id, offset, size in _iter_chunks(data, start, end):
+        if chunk_id == b"ifil":
+            version = struct.unpack_from("<HH", data, offset)
+        else:
+            info[chunk_id.decode("latin-1")] = _decode(data[offset : offset + size])
+    return version, info
+
+
+def _read_presets(data: mmap.mmap, start: int, end: int) -> List[SoundFontPreset]:
+    """Read the preset headers from the phdr sub chunk of the pdta chunk"""
+    for chunk_id, offset, size in _iter_chunks(data, start, end):
+        if chunk_id != b"phdr":
+            continue
+        if size % _PRESET_HEADER.size:
+            raise ValueError("Size of the phdr chunk is not a multiple of {0}".format(_PRESET_HEADER.size))
+        presets = []
+        # The last record only terminates the list
+        for record in range(size // _PRESET_HEADER.size - 1):
+            name, program, bank, *_ = _PRESET_HEADER.unpack_from(data, offset + record * _PRESET_HEADER.size)
+            presets.append(SoundFontPreset(_decode(name), bank, program))
+        return sorted(presets, key=lambda preset: (preset.bank, preset.program))
+    raise ValueError("pdta chunk has no phdr chunk")
+
+
+def read_sound_font_info(sound_fonts_path: Union[str, Path]) -> SoundFontInfo:
+    """Read metadata and presets of an SF2 file without reading its sample data
+
+    Args
+        sound_fonts_path: Path to a *.sf2 file
+    Returns
+        A SoundFontInfo tuple
+    Raises
+        OSError: If the file can not be read
+        ValueError: If the file is not a valid SF2 file
+    """
+    with open(sound_fonts_path, "rb") as sound_fonts_file:
+        try:
+            data = mmap.mmap(sound_fonts_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError("{0} is empty".format(sound_fonts_path))
+
+    with data:
+        if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"sfbk":
+            raise ValueError("{0} is not a SoundFont 2 file".format(sound_fonts_path))
+        _, riff_size = _CHUNK_HEADER.unpack_from(data, 0)
+
+        version, info, presets, sample_data_size = None, None, None, 0
+        for chunk_id, offset, size in _iter_chunks(data, 12, min(8 + riff_size, len(data))):
+            if chunk_id != b"LIST":
+                continue
+            list_type = data[offset : offset + 4]
+            if list_type == b"INFO":
+                version, info = _read_info(data, offset + 4, offset + size)
+            elif list_type == b"sdta":
+                # Only the sub chunk headers are read, the samples themselves are skipped
+                sample_data_size = sum(
+                    sub_size
+                    for sub_id, _, sub_size in _iter_chunks(data, offset + 4, offset + size)
+                    if sub_id in (b"smpl", b"sm24")
+                )
+            elif list_type == b"pdta":
+                presets = _read_presets(data, offset + 4, offset + size)
+
+    if info is None or presets is None:
+        raise ValueError("{0} has no INFO or pdta chunk".format(sound_fonts_path))
+
+    return SoundFontInfo(str(sound_fonts_path), version, info.get("INAM", ""), info, tuple(presets), sample_data_size)
+
+
+@lru_cache(maxsize=32)
+def _cached_sound_font_info(key: SoundFontKey) -> SoundFontInfo:
+    return read_sound_font_info(key.path)
+
+
+def sound_font_info(sound_fonts_path: Union[str, Path]) -> SoundFontInfo:
+    """Cached read_sound_font_info. Files are read again once they changed on disk, see pypiano.fonts.sound_font_key"""
+    return _cached_sound_font_info(sound_font_key(sound_fonts_path))
@@ -1,6 +1,22 @@
+import numpy
+
+
 class MockSynth(object):
     def __init__(self):
         self.audio_driver = None
+        self.events = []
+
+    def noteon(self, chan, key, vel):
+        self.events.append(("noteon", chan, key, vel))
+        return 0
+
+    def noteoff(self, chan, key):
+        self.events.append(("noteoff", chan, key))
+        return 0
+
+    def cc(self, chan, ctrl, val):
+        self.events.append(("cc", chan, ctrl, val))
+        return 0
 
     def sfunload(self, sfid):
         return True
@@ -9,7 +25,7 @@ class MockSynth(object):
         return True
 
     def get_samples(self, len):
-        return True
+        return numpy.zeros(len * 2, dtype=numpy.int16)
 
 
 class MockWav(object):
@@ -24,7 +40,7 @@ class MockFluidSynthSequencer(object):
     def __init__(self):
         self.fs = MockSynth()
         self.sfid = None
-        self.wav = MockWav()
+        self.programs = {}
 
     def load_sound_font(self, path):
         return True
@@ -33,9 +49,12 @@ class MockFluidSynthSequencer(object):
         return True
 
     def set_instrument(self, channel, instr, bank):
+        self.programs[channel] = instr
         return True
 
     def start_recording(self, file):
+        # Like mingus, the wav attribute only exists once a recording was started
+        self.wav = MockWav()
         return True
 
     def play_Note(self, note):
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import unittest
+from unittest.mock import patch
+from mingus.containers import Bar
+from pypiano.aio import AsyncPiano
+from .mock_objects import MockFluidSynthSequencer
+
+
+@patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
+class AsyncPianoTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self) -> None:
+        self.bar = Bar()
+        self.bar.place_notes("C-4", 4)
+        self.bar.place_notes("E-4", 4)
+
+    def test_play(self, mock_fluid_synth_sequencer):
+        async def main():
+            p = AsyncPiano()
+            synth = p.piano._synth
+            synth.events.clear()
+            await asyncio.gather(p.play(self.bar, bpm=6000), p.play("G-4"))
+            return synth.events
+
+        events = asyncio.run(main())
+        expected = [("noteon", 1, 60, 64), ("noteoff", 1, 60), ("noteon", 1, 64, 64), ("noteoff", 1, 64)]
+        self.assertEqual([event for event in events if event[2] != 67], expected)
+        self.assertIn(("noteon", 1, 67, 64), events)
+
+    def test_lock(self, mock_fluid_synth_sequencer):
+        async def main():
+            p = AsyncPiano()
+            synth = p.piano._synth
+            owned = []
+            noteon = synth.noteon
+
+            def locked_noteon(*args):
+                owned.append(p.piano._lock._is_owned())
+                return noteon(*args)
+
+            with patch.object(synth, "noteon", side_effect=locked_noteon):
+                await p.play(self.bar, bpm=6000)
+            return owned
+
+        # Events are sent while holding the lock of the piano
+        self.assertEqual(asyncio.run(main()), [True, True])
+
+    def test_cancel(self, mock_fluid_synth_sequencer):
+        async def main():
+            p = AsyncPiano()
+            synth = p.piano._synth
+            synth.events.clear()
+            task = asyncio.ensure_future(p.play(self.bar))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            return synth.events
+
+        self.assertEqual(asyncio.run(main()), [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+
+if __name__ == "__main__":
+    unittest.main()
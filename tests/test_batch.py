@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest.mock import patch
+from mingus.containers import Bar
+from pypiano.batch import render_batch, RenderJob
+from .mock_objects import MockFluidSynthSequencer
+
+
+@patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
+class BatchTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_render_batch_in_process(self, mock_fluid_synth_sequencer):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        jobs = [
+            RenderJob(bar, None, None),
+            (bar, "Harpsichord", None),
+            ("G-0", None, None),
+            (bar, "FantasyInstrument", None),
+        ]
+
+        results = list(render_batch(jobs, processes=0))
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual(results[0].samples.shape, (22050, 2))
+        self.assertIsNone(results[1].error)
+        self.assertIn("ValueError", results[2].error)
+        self.assertIn("Unknown instrument", results[3].error)
+
+    def test_render_batch_process_pool(self, mock_fluid_synth_sequencer):
+        # Worker processes are forked, so they inherit the patched sequencer
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        jobs = [(bar, None, None), ("G-0", None, None), (bar, "Harpsichord", None)]
+
+        results = list(render_batch(jobs, processes=2, max_pending=2))
+        self.assertEqual([result.index for result in results], [0, 1, 2])
+        self.assertEqual(results[0].samples.shape, (22050, 2))
+        self.assertIn("ValueError", results[1].error)
+        self.assertIsNone(results[2].error)
+
+        unordered = render_batch(jobs, processes=2, ordered=False)
+        self.assertEqual(sorted(result.index for result in unordered), [0, 1, 2])
+
+        # Jobs that can not be sent to a worker process are reported without losing the rest of the batch
+        unpicklable = (lambda: None, None, None)
+        results = list(render_batch([unpicklable, jobs[0]], processes=1))
+        self.assertIn("Error", results[0].error)
+        self.assertIs(results[0].job.music_container, unpicklable[0])
+        self.assertIsNone(results[1].error)
+
+    def test_render_batch_broken_pool(self, mock_fluid_synth_sequencer):
+        # Workers fail to create their Piano, which breaks the pool. Every job reports the error instead of raising it
+        bar = Bar()
+        jobs = [(bar, None, None)] * 3
+        results = list(render_batch(jobs, instrument="FantasyInstrument", processes=1, max_pending=1))
+        self.assertEqual([result.index for result in results], [0, 1, 2])
+        self.assertTrue(all("BrokenProcessPool" in result.error for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
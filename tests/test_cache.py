@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+from unittest.mock import patch
+from mingus.containers import Bar
+from pypiano.cache import render_cache_key, RenderCache, RenderCacheInfo
+from pypiano.fonts import sound_font_key
+from pypiano.piano import Piano
+from pypiano.render import compile_events
+from .mock_objects import MockFluidSynthSequencer
+
+
+class RecordingSequencer(MockFluidSynthSequencer):
+    def __init__(self):
+        super().__init__()
+        self.recordings = 0
+
+    def start_recording(self, file):
+        self.recordings += 1
+        self.wav = wave.open(file, "wb")
+        self.wav.setnchannels(2)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(44100)
+        return True
+
+
+def write_bytes(size):
+    def render(path):
+        with open(path, "wb") as output:
+            output.write(b"\0" * size)
+
+    return render
+
+
+class RenderCacheTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_render_cache_key(self):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        events, end = compile_events(bar)
+        font = sound_font_key("/fantasypath/fantasyfile.sf2")
+        key = render_cache_key(events, end, "Clavi", font, 44100, None)
+
+        self.assertEqual(key, render_cache_key(list(events), end, "Clavi", font, 44100, None))
+        self.assertNotEqual(key, render_cache_key(events, end, "Harpsichord", font, 44100, None))
+        self.assertNotEqual(key, render_cache_key(events, end, "Clavi", font, 44100, 1.0))
+        self.assertNotEqual(key, render_cache_key(events[:1], end, "Clavi", font, 44100, None))
+        self.assertNotEqual(key, render_cache_key(events, end, "Clavi", font._replace(size=1), 44100, None))
+
+    def test_store_and_fetch(self):
+        cache = RenderCache(self.path / "cache")
+        target = self.path / "out.wav"
+
+        self.assertFalse(cache.fetch("ab" * 32, target))
+        entry = cache.store("ab" * 32, write_bytes(100))
+        self.assertTrue(cache.fetch("ab" * 32, target))
+        self.assertNotEqual(os.stat(target).st_ino, os.stat(entry).st_ino)
+        self.assertEqual(cache.info(), RenderCacheInfo(hits=1, misses=1, max_bytes=1 << 30, size=100, entries=1))
+
+        # Copies can be written in place without changing the cache entry
+        with open(target, "wb") as output:
+            output.write(b"\1")
+        self.assertEqual(os.path.getsize(entry), 100)
+
+        RenderCache(self.path / "cache", link=True).fetch("ab" * 32, target)
+        self.assertEqual(os.stat(target).st_ino, os.stat(entry).st_ino)
+        self.assertEqual(RenderCache(self.path / "cache").info().size, 100)
+
+    def test_eviction(self):
+        cache = RenderCache(self.path, max_bytes=250)
+        first = cache.store("01" * 32, write_bytes(100))
+        second = cache.store("02" * 32, write_bytes(100))
+        os.utime(first, (1, 1))
+        os.utime(second, (2, 2))
+        # Using the first entry makes the second one the least recently used
+        cache.fetch("01" * 32, self.path / "out.wav")
+
+        cache.store("03" * 32, write_bytes(100))
+        self.assertTrue(first.exists())
+        self.assertFalse(second.exists())
+        self.assertEqual(cache.info().size, 200)
+
+        cache.clear()
+        self.assertEqual(cache.info(), RenderCacheInfo(0, 0, 250, 0, 0))
+
+    @patch("pypiano.piano.FluidSynthSequencer", return_value=RecordingSequencer())
+    def test_piano(self, mock_fluid_synth_sequencer):
+        sequencer = mock_fluid_synth_sequencer.return_value
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        p = Piano(render_cache=RenderCache(self.path / "cache"))
+
+        p.play(bar, recording_file=str(self.path / "first.wav"), record_seconds=0.1)
+        p.play(bar, recording_file=str(self.path / "second.wav"), record_seconds=0.1)
+        self.assertEqual(sequencer.recordings, 1)
+        with wave.open(str(self.path / "second.wav")) as recording:
+            self.assertEqual(recording.getnframes(), int(0.6 * 44100))
+
+        p.load_instrument("Clavi")
+        p.play(bar, recording_file=str(self.path / "third.wav"), record_seconds=0.1)
+        self.assertEqual(sequencer.recordings, 2)
+        self.assertEqual(p.render_cache.info()[:2], (1, 2))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from pypiano.fonts import sound_font_key, SoundFontRegistry, SoundFontCacheInfo
+from .mock_objects import MockFluidSynthSequencer
+
+
+class CountingSequencer(MockFluidSynthSequencer):
+    def __init__(self):
+        super().__init__()
+        self.loads = 0
+        self.fs.unloaded = []
+        self.fs.sfunload = self.fs.unloaded.append
+
+    def load_sound_font(self, path):
+        self.loads += 1
+        self.sfid = self.loads
+        return True
+
+
+class SoundFontRegistryTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sf2")
+        os.write(handle, b"RIFF")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_sound_font_key(self):
+        key = sound_font_key(self.path)
+        self.assertEqual(key.path, str(Path(self.path).resolve()))
+        self.assertEqual(key.size, 4)
+        self.assertEqual(sound_font_key("/fantasypath/fantasyfile.sf2").size, None)
+
+    def test_reference_counting(self):
+        registry = SoundFontRegistry()
+        sequencer, other_sequencer = CountingSequencer(), CountingSequencer()
+
+        key = registry.acquire(sequencer, self.path)
+        self.assertEqual(registry.acquire(sequencer, self.path), key)
+        self.assertEqual(sequencer.loads, 1)
+        # Font ids are only valid for the synthesizer that loaded them
+        registry.acquire(other_sequencer, self.path)
+        self.assertEqual(other_sequencer.loads, 1)
+        self.assertEqual(registry.info(), SoundFontCacheInfo(hits=1, misses=2, loaded=2, unloads=0))
+
+        registry.release(sequencer, key)
+        self.assertEqual(sequencer.fs.unloaded, [])
+        registry.release(sequencer, key)
+        self.assertEqual(sequencer.fs.unloaded, [1])
+        self.assertEqual(registry.info(), SoundFontCacheInfo(hits=1, misses=2, loaded=1, unloads=1))
+
+        # A file changed on disk is loaded again
+        registry.acquire(other_sequencer, self.path)
+        os.utime(self.path, ns=(0, 0))
+        registry.acquire(other_sequencer, self.path)
+        self.assertEqual(other_sequencer.loads, 2)
+
+    def test_load_failure(self):
+        sequencer = CountingSequencer()
+        sequencer.load_sound_font = lambda path: False
+        with self.assertRaises(Exception):
+            SoundFontRegistry().acquire(sequencer, self.path)
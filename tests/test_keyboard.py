@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 import unittest
-from pypiano.keyboard import PianoKeyboard
+from mingus.containers import Note
+import pickle
+import numpy
+from pypiano.keyboard import PianoKeyboard, PianoKey, NOTE_INDEX
 
 
 class KeyboardTests(unittest.TestCase):
@@ -18,6 +21,56 @@ class KeyboardTests(unittest.TestCase):
     def test_black_keys(self):
         self.assertEqual(len(self.keyboard.black_keys), 36)
 
+    def test_cached_views(self):
+        self.assertIs(self.keyboard.distinct_key_names, PianoKeyboard().distinct_key_names)
+        self.assertIsInstance(self.keyboard.distinct_key_names, frozenset)
+        self.assertIn("Db-4", self.keyboard.distinct_key_names)
+        self.assertIs(self.keyboard.white_keys, self.keyboard.white_keys)
+        self.assertIs(self.keyboard.black_keys, self.keyboard.black_keys)
+        with self.assertRaises(TypeError):
+            self.keyboard.white_keys[0] = None
+
+    def test_shared_immutable_keys(self):
+        self.assertIs(self.keyboard[0], PianoKeyboard()[0])
+        piano_key = self.keyboard[48]
+        self.assertEqual(piano_key.get_as_string(), "A-4")
+        self.assertFalse(hasattr(piano_key, "__dict__"))
+        self.assertRaises(AttributeError, setattr, piano_key, "key_index", 1)
+        self.assertRaises(ValueError, PianoKey, "C", "B#", 4, "green")
+        self.assertEqual(repr(pickle.loads(pickle.dumps(piano_key))), repr(piano_key))
+
+    def test_lookup_tables(self):
+        for piano_key in self.keyboard:
+            self.assertAlmostEqual(piano_key.frequency, piano_key.first_note.to_hertz())
+            self.assertEqual(piano_key.midi_number, int(piano_key.first_note) + 12)
+            self.assertEqual(self.keyboard.key_colors[piano_key.key_index], piano_key.key_color)
+        self.assertEqual(self.keyboard.midi_numbers[0], 21)
+        self.assertEqual(self.keyboard.midi_numbers[87], 108)
+        self.assertFalse(self.keyboard.frequencies.flags.writeable)
+
+    def test_batch_conversion(self):
+        numpy.testing.assert_array_equal(self.keyboard.to_midi_numbers(numpy.array([0, 48, 87])), [21, 69, 108])
+        numpy.testing.assert_array_equal(
+            self.keyboard.to_midi_numbers(["A-4", "C#-4", "Db-4", Note("A-0")]), [69, 61, 61, 21]
+        )
+        numpy.testing.assert_allclose(self.keyboard.to_frequencies(["A-4", "A-5"]), [440.0, 880.0])
+        numpy.testing.assert_array_equal(self.keyboard.key_indices([0, "A-4", Note("A-0"), 87]), [0, 48, 0, 87])
+        self.assertEqual(self.keyboard.to_frequencies([]).shape, (0,))
+        self.assertRaises(IndexError, self.keyboard.to_frequencies, [88])
+        self.assertRaises(IndexError, self.keyboard.to_frequencies, ["A-4", "G-0"])
+
+    def test_getitem_note(self):
+        self.assertEqual(self.keyboard["A-0"], 0)
+        self.assertEqual(self.keyboard["C-8"], 87)
+        self.assertEqual(self.keyboard["C#-4"], self.keyboard["Db-4"])
+        self.assertEqual(self.keyboard[Note("A-4")], 48)
+        self.assertEqual(self.keyboard["Bb-3"], NOTE_INDEX["Bb-3"])
+
+        # Lookups are exact, a note string must not match as a substring of a key name
+        self.assertRaises(IndexError, self.keyboard.__getitem__, "C-10")
+        self.assertRaises(IndexError, self.keyboard.__getitem__, "-4")
+        self.assertRaises(IndexError, self.keyboard.__getitem__, "G-0")
+
 
 if __name__ == "__main__":
     unittest.main()
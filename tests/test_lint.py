@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from mingus.containers import Note, NoteContainer, Bar, Track
+from pypiano.keyboard import PianoKeyboard
+from pypiano.lint import find_invalid_notes, format_invalid_notes, InvalidNote, LintCache
+
+
+class LintTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self) -> None:
+        self.bar = Bar()
+        self.bar.place_notes("C-4", 4)
+        self.bar.place_rest(4)
+        self.bar.place_notes(["G-0", "E-4"], 4)
+        self.bar.place_notes("D-8", 4)
+
+    def test_valid_containers(self):
+        self.assertEqual(find_invalid_notes("A-0"), [])
+        self.assertEqual(find_invalid_notes(Note("C-8")), [])
+        self.assertEqual(find_invalid_notes(Note("Db-4")), [])
+        # Enharmonic names are valid if the keyboard has them, even if mingus puts them in the next octave
+        self.assertEqual(find_invalid_notes("B#-8"), [])
+        self.assertIn("B#-8", PianoKeyboard())
+        self.assertEqual(find_invalid_notes(NoteContainer(["C-4", "E-4", "G-4"])), [])
+        self.assertEqual(find_invalid_notes(87), [])
+        self.assertEqual(find_invalid_notes(PianoKeyboard()[0]), [])
+
+    def test_invalid_containers(self):
+        self.assertEqual(find_invalid_notes(Note("G#-0")), [InvalidNote(Note("G#-0"), None, None)])
+        self.assertEqual(find_invalid_notes("Cb-0"), [InvalidNote(Note("Cb-0"), None, None)])
+        self.assertNotIn("Cb-0", PianoKeyboard())
+        self.assertEqual(find_invalid_notes(88), [InvalidNote(88, None, None)])
+        self.assertRaises(TypeError, find_invalid_notes, 1.5)
+
+    def test_positions(self):
+        self.assertEqual(find_invalid_notes(self.bar), [InvalidNote(Note("G-0"), 0, 0.5)])
+
+        track = Track()
+        track.add_bar(Bar())
+        track.add_bar(self.bar)
+        invalid_notes = find_invalid_notes(track, collect_all=True)
+        self.assertEqual(invalid_notes, [InvalidNote(Note("G-0"), 1, 0.5), InvalidNote(Note("D-8"), 1, 0.75)])
+        self.assertEqual(format_invalid_notes(invalid_notes), "G-0 (bar 1, beat 0.5), D-8 (bar 1, beat 0.75)")
+
+    def test_lint_cache(self):
+        cache = LintCache(maxsize=2)
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        track = Track()
+        track.add_bar(bar)
+
+        self.assertEqual(cache.find_invalid_notes(track), [])
+        self.assertEqual(cache.find_invalid_notes(track), [])
+        self.assertEqual(cache.info().hits, 1)
+        self.assertEqual(cache.info().misses, 1)
+
+        # Changing the container invalidates the cached result
+        bar.place_notes("G-0", 4)
+        self.assertEqual(len(cache.find_invalid_notes(track)), 1)
+        self.assertEqual(len(cache.find_invalid_notes(track)), 1)
+        self.assertEqual(cache.info().misses, 3)
+
+        # Notes added to or note containers replaced within a bar invalidate the cached result as well
+        valid_bar = Bar()
+        valid_bar.place_notes("C-4", 4)
+        self.assertEqual(cache.find_invalid_notes(valid_bar), [])
+        valid_bar[0][2].add_note("G-0")
+        self.assertEqual(len(cache.find_invalid_notes(valid_bar)), 1)
+        valid_bar[0][2] = NoteContainer(["C-4"])
+        self.assertEqual(cache.find_invalid_notes(valid_bar), [])
+        valid_bar[0][2] = NoteContainer(["G-0"])
+        self.assertEqual(len(cache.find_invalid_notes(valid_bar)), 1)
+
+        # Cheap containers are never cached and the least recently used container is evicted first
+        cache.clear()
+        cache.find_invalid_notes("C-4")
+        bars = [Bar(), Bar(), Bar()]
+        for b in bars:
+            cache.find_invalid_notes(b)
+        self.assertEqual(cache.info(), (0, 3, 2, 2))
+        cache.find_invalid_notes(bars[0])
+        self.assertEqual(cache.info().misses, 4)
+
+    def test_lint_cache_threads(self):
+        # Threads hitting and evicting entries of a shared cache at the same time
+        cache = LintCache(maxsize=4)
+        bars = [Bar() for _ in range(8)]
+        for bar in bars:
+            bar.place_notes("C-4", 4)
+        errors = []
+
+        def lint():
+            try:
+                for _ in range(200):
+                    for bar in bars:
+                        cache.find_invalid_notes(bar)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=lint) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        info = cache.info()
+        self.assertEqual(info.hits + info.misses, 8 * 200 * 8)
+        self.assertEqual(info.currsize, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
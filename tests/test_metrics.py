@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+from unittest.mock import patch
+from mingus.containers import Bar, NoteContainer
+from pypiano.piano import Piano
+from pypiano.metrics import collect_metrics, set_default_collector, MetricsRecorder, RENDER, WAV_WRITE
+from .mock_objects import MockFluidSynthSequencer
+
+
+class UnprintableNoteContainer(NoteContainer):
+    def __repr__(self):
+        raise AssertionError("Music container was formatted for a disabled log message")
+
+    __str__ = __repr__
+
+
+@patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
+class MetricsTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_collect_metrics(self, mock_fluid_synth_sequencer):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        recorder = MetricsRecorder()
+
+        with collect_metrics(recorder):
+            p = Piano(lazy=True)
+            p.render(bar, record_seconds=0.5)
+            p.play(bar, recording_file="test.wav", record_seconds=0)
+        p.render(bar)
+
+        stages = [metric.stage for metric in recorder.metrics]
+        self.assertEqual(stages, ["lint", "sound_font_load", "render", "lint", "render", "wav_write"])
+        render = recorder.metrics[2]
+        self.assertEqual(render.stage, RENDER)
+        self.assertEqual(render.frames, 44100)
+        self.assertAlmostEqual(render.real_time_factor, render.seconds)
+        self.assertEqual(recorder.metrics[-1].stage, WAV_WRITE)
+        self.assertEqual(set(recorder.totals()), set(stages))
+
+    def test_wav_write_not_counted_as_render(self, mock_fluid_synth_sequencer):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        recorder = MetricsRecorder()
+        p = Piano()
+
+        with patch("tests.mock_objects.MockWav.writeframes", side_effect=lambda data: time.sleep(0.01)):
+            with collect_metrics(recorder):
+                p.play(bar, recording_file="test.wav", record_seconds=0, lint=False)
+
+        render, wav_write = recorder.metrics
+        self.assertEqual((render.stage, wav_write.stage), (RENDER, WAV_WRITE))
+        self.assertGreaterEqual(wav_write.seconds, 0.05)
+        self.assertLess(render.seconds, wav_write.seconds)
+
+    def test_default_collector(self, mock_fluid_synth_sequencer):
+        recorder = MetricsRecorder()
+        set_default_collector(recorder)
+        try:
+            Piano()._lint_music_container("C-4")
+        finally:
+            set_default_collector(None)
+        self.assertEqual([metric.stage for metric in recorder.metrics], ["sound_font_load", "lint"])
+
+    def test_lazy_log_messages(self, mock_fluid_synth_sequencer):
+        Piano().play(UnprintableNoteContainer(["C-4", "E-4"]))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import pickle
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+from mingus.containers import Bar, NoteContainer, Track
+from pypiano.lint import find_invalid_events
+from pypiano.midi import MidiFile, write_midi_file
+from pypiano.piano import Piano
+from pypiano.render import compile_events, MidiEvent, NOTE_OFF, NOTE_ON
+from .mock_objects import MockFluidSynthSequencer
+
+
+def track_chunk(data: bytes) -> bytes:
+    return struct.pack(">4sI", b"MTrk", len(data)) + data
+
+
+def make_midi_file(tracks, division: int = 96) -> bytes:
+    """Build a format 1 Standard MIDI File from the raw event data of its tracks"""
+    header = struct.pack(">4sIHHH", b"MThd", 6, 1, len(tracks), division)
+    return header + b"".join(track_chunk(data + b"\x00\xff\x2f\x00") for data in tracks)
+
+
+class MidiFileTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".mid")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, data: bytes) -> MidiFile:
+        with open(self.path, "wb") as midi_file:
+            midi_file.write(data)
+        return MidiFile(self.path)
+
+    def test_read_events(self):
+        # Tempo track doubling the tempo after one quarter note, a sysex message and a program change
+        tempo = b"\x00\xff\x51\x03\x07\xa1\x20" + b"\x60\xff\x51\x03\x03\xd0\x90"
+        notes = (
+            b"\x00\xf0\x02\x01\xf7"
+            + b"\x00\xc0\x05"
+            # Note on with running status, then a note off as note on with velocity 0
+            + b"\x00\x90\x3c\x40\x00\x40\x50"
+            + b"\x60\x3c\x00\x00\x80\x40\x00"
+            # Retriggered note, note off comes first at the same tick
+            + b"\x60\x91\x45\x30\x00\x81\x45\x00"
+        )
+        midi_file = self.write(make_midi_file([tempo, notes]))
+        self.assertEqual((midi_file.format, midi_file.number_of_tracks, midi_file.division), (1, 2, 96))
+
+        events = list(midi_file.events(sample_rate=1000))
+        self.assertEqual(
+            events,
+            [
+                MidiEvent(0, NOTE_ON, 0, 60, 64),
+                MidiEvent(0, NOTE_ON, 0, 64, 80),
+                MidiEvent(500, NOTE_OFF, 0, 60, 0),
+                MidiEvent(500, NOTE_OFF, 0, 64, 0),
+                MidiEvent(750, NOTE_OFF, 1, 69, 0),
+                MidiEvent(750, NOTE_ON, 1, 69, 48),
+            ],
+        )
+        self.assertEqual(midi_file.end(sample_rate=1000), 750)
+        self.assertEqual({event.channel for event in midi_file.events(channel=1)}, {1})
+        self.assertEqual(pickle.loads(pickle.dumps(midi_file)).path, midi_file.path)
+
+    def test_invalid_files(self):
+        self.assertRaises(ValueError, self.write, b"RIFF")
+        self.assertRaises(ValueError, self.write, make_midi_file([b""])[:-12])
+
+        midi_file = self.write(make_midi_file([b"\x00\x40\x40"]))
+        self.assertRaises(ValueError, list, midi_file.events())
+
+    def test_write_round_trip(self):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        bar.place_rest(4)
+        bar.place_notes(NoteContainer(["C-4", "E-4"]), 2)
+        track = Track()
+        track.add_bar(bar)
+        events, end = compile_events(track)
+
+        write_midi_file(self.path, events, end)
+        midi_file = MidiFile(self.path)
+        self.assertEqual(list(midi_file.events()), events)
+        self.assertEqual(midi_file.end(), end)
+
+        self.assertRaises(ValueError, write_midi_file, self.path, [MidiEvent(0, NOTE_ON, 16, 60, 64)])
+        self.assertRaises(ValueError, write_midi_file, self.path, list(reversed(events)))
+
+    def test_find_invalid_events(self):
+        midi_file = self.write(make_midi_file([b"\x00\x90\x3c\x40\x00\x90\x14\x40\x00\x90\x6d\x40"]))
+        invalid_events = find_invalid_events(midi_file.events(), collect_all=True)
+        self.assertEqual([(invalid.event.key, invalid.index) for invalid in invalid_events], [(20, 0), (109, 2)])
+        self.assertEqual(len(find_invalid_events(midi_file.events())), 1)
+
+    @patch("pypiano.piano.FluidSynthSequencer", side_effect=MockFluidSynthSequencer)
+    def test_piano(self, mock_fluid_synth_sequencer):
+        p = Piano()
+        midi_file = self.write(make_midi_file([b"\x00\x92\x3c\x40\x60\x82\x3c\x00"]))
+
+        self.assertEqual(p.render(midi_file).shape, (22050, 2))
+        self.assertEqual(p._synth.events, [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+        p.play(midi_file)
+        self.assertEqual(p.last_scheduler_stats.events, 2)
+
+        midi_file = self.write(make_midi_file([b"\x00\x90\x14\x40"]))
+        with self.assertRaisesRegex(ValueError, r"MIDI key 20 \(event 0, sample 0\)"):
+            p.render(midi_file)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy
+from mingus.containers import Bar, Note, NoteContainer, Track
+from pypiano.cache import render_cache_key, RenderCache
+from pypiano.fonts import SoundFontKey
+from pypiano.performance import compile_performance, Performance, HELD
+from pypiano.piano import Piano
+from pypiano.render import compile_events, MidiEvent, NOTE_OFF, NOTE_ON
+from pypiano.scheduler import compile_schedule
+from .mock_objects import MockFluidSynthSequencer
+
+
+def make_track() -> Track:
+    bar = Bar()
+    bar.place_notes("C-4", 4)
+    bar.place_notes("C-4", 4)
+    bar.place_rest(4)
+    bar.place_notes(NoteContainer(["C-4", "E-4"]), 4)
+    track = Track()
+    track.add_bar(bar)
+    track.add_bar(bar)
+    return track
+
+
+class PerformanceTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_compile_performance(self):
+        track = make_track()
+        performance = compile_performance(track, sample_rate=1000)
+        self.assertEqual(len(performance), 8)
+        self.assertEqual(performance.end, 4000)
+        self.assertEqual(performance.onset[:4].tolist(), [0, 500, 1500, 1500])
+        self.assertEqual(performance.duration.tolist(), [500] * 8)
+        self.assertEqual(performance.key[:4].tolist(), [60, 60, 60, 64])
+        self.assertEqual(performance.nbytes, 8 * 20)
+
+        # Events and schedule are the same as for the mingus containers, including retriggered notes
+        events, _ = compile_events(track, sample_rate=1000)
+        self.assertEqual(list(performance.events()), events)
+        sound_font = SoundFontKey("a.sf2", 0, 0)
+        self.assertEqual(
+            render_cache_key(performance.event_array(), 0, "Piano", sound_font, 1000, None),
+            render_cache_key(events, 0, "Piano", sound_font, 1000, None),
+        )
+        numpy.testing.assert_array_equal(compile_performance(track).schedule(), compile_schedule(track))
+
+        chord = compile_performance(NoteContainer(["C-4", "E-4"]), sample_rate=1000)
+        self.assertEqual((chord.duration.tolist(), chord.end), ([500, 500], 500))
+        self.assertIs(compile_performance(chord), chord)
+
+        # Note on events without note off events are held
+        held_events = [MidiEvent(0, NOTE_ON, 1, 60, 64), MidiEvent(0, NOTE_ON, 1, 64, 64)]
+        held = Performance.from_events(held_events)
+        self.assertEqual(held.duration.tolist(), [HELD, HELD])
+        self.assertEqual(list(held.events()), held_events)
+
+    def test_from_events(self):
+        events = [
+            MidiEvent(0, NOTE_ON, 0, 60, 100),
+            MidiEvent(10, NOTE_ON, 0, 60, 90),
+            MidiEvent(15, NOTE_OFF, 0, 62, 0),
+            MidiEvent(20, NOTE_OFF, 0, 60, 0),
+            MidiEvent(30, NOTE_OFF, 0, 60, 0),
+        ]
+        performance = Performance.from_events(iter(events), end=30)
+        self.assertEqual(performance.duration.tolist(), [20, 20])
+        self.assertEqual(performance.velocity.tolist(), [100, 90])
+
+        self.assertRaises(ValueError, Performance.from_events, [MidiEvent(0, NOTE_ON, 0, 60, 300)])
+        self.assertRaises(ValueError, Performance, [0], [0, 0], [60], [64], [1])
+        self.assertEqual(len(Performance.from_events([])), 0)
+
+    def test_pickle(self):
+        performance = compile_performance(make_track())
+        copy = pickle.loads(pickle.dumps(performance))
+        self.assertEqual((copy.end, copy.sample_rate), (performance.end, performance.sample_rate))
+        numpy.testing.assert_array_equal(copy.event_array(), performance.event_array())
+
+    def test_find_invalid_notes(self):
+        performance = compile_performance(NoteContainer([Note("G-0"), Note("C-4"), Note("D-8")]))
+        invalid_notes = performance.find_invalid_notes(collect_all=True)
+        self.assertEqual([(invalid.event.key, invalid.index) for invalid in invalid_notes], [(19, 0), (110, 2)])
+        self.assertEqual(len(performance.find_invalid_notes()), 1)
+
+    @patch("pypiano.piano.FluidSynthSequencer", side_effect=MockFluidSynthSequencer)
+    def test_piano(self, mock_fluid_synth_sequencer):
+        performance = compile_performance(make_track())
+        with tempfile.TemporaryDirectory() as directory:
+            p = Piano(render_cache=RenderCache(directory))
+            self.assertEqual(p.render(performance).shape, (2 * 88200, 2))
+            self.assertEqual(p._synth.events[:2], [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+            p.play(performance, recording_file=directory + "/performance.wav")
+            self.assertEqual(p.render_cache.info().misses, 1)
+
+        p.play(compile_performance(Bar()))
+        self.assertEqual(p.last_scheduler_stats.events, 0)
+
+        self.assertRaises(ValueError, p.render, compile_performance(Note("G-0")))
+        self.assertRaises(ValueError, p.render, compile_performance(make_track(), sample_rate=1000))
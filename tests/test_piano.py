@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
+import subprocess
+import sys
+import threading
 import unittest
 from unittest.mock import patch
 from pypiano import piano
 from pathlib import Path
 from .mock_objects import MockFluidSynthSequencer
 from mingus.containers import Note, NoteContainer, Bar, Track
+import numpy
 
 
 @patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
@@ -25,6 +29,53 @@ class PianoTests(unittest.TestCase):
         self.assertEqual(p._sound_fonts_loaded, True)
         self.assertEqual(p._sound_fonts_path, Path(new_sf_path))
 
+    def test_load_same_sound_fonts(self, mock_fluid_synth_sequencer) -> None:
+        p = piano.Piano()
+        hits = p.sound_font_cache_info().hits
+
+        with patch.object(mock_fluid_synth_sequencer.return_value, "load_sound_font") as load_sound_font:
+            p.load_sound_fonts(piano.DEFAULT_SOUND_FONTS)
+            piano.Piano()
+        load_sound_font.assert_not_called()
+        self.assertEqual(p.sound_font_cache_info().hits, hits + 1)
+
+    def test_lazy(self, mock_fluid_synth_sequencer) -> None:
+        mock_fluid_synth_sequencer.reset_mock()
+        p = piano.Piano(lazy=True)
+        self.assertEqual(p.keyboard["A-4"], 48)
+        p._lint_music_container(Note("C-4"))
+        p.load_instrument("Clavi")
+        with self.assertRaises(ValueError):
+            p.load_instrument("Violin")
+        mock_fluid_synth_sequencer.assert_not_called()
+        self.assertFalse(p._sound_fonts_loaded)
+
+        p.render(Note("C-4"), record_seconds=0.01)
+        mock_fluid_synth_sequencer.assert_called_once()
+        self.assertTrue(p._sound_fonts_loaded)
+        self.assertEqual(mock_fluid_synth_sequencer.return_value.programs[1], 7)
+
+        p = piano.Piano(lazy=True)
+        p.warm_up()
+        p.warm_up()
+        self.assertEqual(mock_fluid_synth_sequencer.call_count, 2)
+
+    def test_import_defers_backends(self, mock_fluid_synth_sequencer) -> None:
+        deferred = ("pkg_resources", "mingus.midi.pyfluidsynth", "concurrent.futures.process", "hashlib")
+        code = "import sys, pypiano; print([m for m in {0!r} if m in sys.modules])".format(deferred)
+        result = subprocess.run(
+            [sys.executable, "-c", code], stdout=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+        # Lazily exported names are imported on first access
+        code = "import pypiano; print(pypiano.PianoPool.__module__, pypiano.render_batch.__module__)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], stdout=subprocess.PIPE, universal_newlines=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "pypiano.pool pypiano.batch")
+        self.assertTrue(piano.DEFAULT_SOUND_FONTS.is_file())
+
     def test_unload_sound_fonts(self, mock_fluid_synth_sequencer) -> None:
         p = piano.Piano()
         self.assertEqual(p._sound_fonts_loaded, True)
@@ -33,6 +84,8 @@ class PianoTests(unittest.TestCase):
         p._unload_sound_fonts()
         self.assertEqual(p._sound_fonts_loaded, False)
         self.assertEqual(p._sound_fonts_path, None)
+        self.assertRaises(RuntimeError, p.load_instrument, instrument="Clavi")
+        self.assertRaises(RuntimeError, p.load_instrument, instrument=1)
 
     def test_start_audio_output(self, mock_fluid_synth_sequencer) -> None:
         p = piano.Piano()
@@ -89,6 +142,63 @@ class PianoTests(unittest.TestCase):
         p.play("C-4", recording_file="test.wav")
         self.assertEqual(p._audio_driver_is_active, False)
 
+        bar = Bar()
+        bar.place_notes(["C-4", "E-4"], 64)
+        p.play(bar)
+        self.assertEqual(p.last_scheduler_stats.events, 4)
+
+        # Recordings that fail are closed, so the piano can record again
+        with patch.object(p, "_render_events", side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, p.play, bar, recording_file="test.wav")
+        self.assertFalse(hasattr(p._sequencer, "wav"))
+        p.play(bar, recording_file="test.wav")
+
+    def test_render(self, mock_fluid_synth_sequencer):
+        p = piano.Piano()
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+
+        samples = p.render(bar)
+        self.assertEqual(samples.shape, (22050, 2))
+        self.assertEqual(samples.dtype, numpy.int16)
+        self.assertEqual(p.render(bar, record_seconds=1, dtype="float32").shape, (22050 + 44100, 2))
+        self.assertRaises(ValueError, p.render, bar, dtype="int32")
+
+        out = numpy.ones((1000, 2), dtype=numpy.float32)
+        self.assertEqual(p.render_into(bar, out), 1000)
+        self.assertEqual(out.max(), 0.0)
+        self.assertRaises(ValueError, p.render_into, bar, numpy.zeros(1000, dtype=numpy.int16))
+
+    def test_concurrent_render(self, mock_fluid_synth_sequencer):
+        p = piano.Piano()
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        events = p._synth.events
+        start = len(events)
+
+        threads = [threading.Thread(target=p.render, args=(bar,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Renders are serialized, so notes of different threads never overlap
+        self.assertEqual(events[start:], [("noteon", 1, 60, 64), ("noteoff", 1, 60)] * 8)
+
+    def test_lint_cache(self, mock_fluid_synth_sequencer):
+        p = piano.Piano()
+        bar = Bar()
+        bar.place_notes("C-4", 64)
+
+        p.play(bar)
+        p.play(bar)
+        self.assertEqual(p.lint_cache_info().hits, 1)
+
+        p.play(Bar(), lint=False)
+        self.assertEqual(p.lint_cache_info().misses, 1)
+
+        p.clear_lint_cache()
+        self.assertEqual(p.lint_cache_info().currsize, 0)
+
     def test_lint_music_container(self, mock_fluid_synth_sequencer):
 
         p = piano.Piano()
@@ -103,6 +213,8 @@ class PianoTests(unittest.TestCase):
         bar = Bar()
         bar.place_notes([outside_left, outside_right], 2)
         self.assertRaises(ValueError, p._lint_music_container, music_container=bar)
+        with self.assertRaisesRegex(ValueError, r"G-0 \(bar 0, beat 0.0\)"):
+            p._lint_music_container(bar)
 
         track = Track()
         track.add_bar(bar)
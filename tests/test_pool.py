@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from unittest.mock import patch
+from pypiano.metrics import collect_metrics, MetricsRecorder, POOL_WAIT
+from pypiano.pool import PianoPool
+from .mock_objects import MockFluidSynthSequencer
+
+
+@patch("pypiano.piano.FluidSynthSequencer", side_effect=MockFluidSynthSequencer)
+class PianoPoolTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_checkout(self, mock_fluid_synth_sequencer):
+        pool = PianoPool(size=2, prewarm=1)
+        self.assertEqual(pool.info().created, 1)
+
+        recorder = MetricsRecorder()
+        with collect_metrics(recorder):
+            with pool.checkout() as first, pool.checkout() as second:
+                self.assertIsNot(first, second)
+                self.assertEqual(pool.info()[1:4], (2, 0, 2))
+                first.load_instrument("Harpsichord")
+        # The second checkout created a piano, which also records loading its sound fonts
+        self.assertEqual(len([metric for metric in recorder.metrics if metric.stage == POOL_WAIT]), 2)
+
+        # Returned pianos are reset to the instrument of the pool
+        self.assertEqual(first.instrument, "Acoustic Grand Piano")
+        info = pool.info()
+        self.assertEqual((info.idle, info.in_use, info.checkouts, info.replaced), (2, 0, 2, 0))
+        self.assertRaises(ValueError, pool.release, first)
+
+    def test_bounded_size(self, mock_fluid_synth_sequencer):
+        pool = PianoPool(size=1)
+        piano = pool.acquire()
+        self.assertRaises(TimeoutError, pool.acquire, timeout=0.01)
+
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+        waiter.start()
+        pool.release(piano)
+        waiter.join()
+        self.assertIs(acquired[0], piano)
+        self.assertGreater(pool.info().max_wait, 0.0)
+
+    def test_health_check(self, mock_fluid_synth_sequencer):
+        pool = PianoPool(size=1, health_check=lambda piano: piano.render_cache is not None)
+        with pool.checkout() as piano:
+            pass
+        with pool.checkout() as replacement:
+            self.assertIsNot(replacement, piano)
+        self.assertEqual(pool.info().replaced, 2)
+
+        # Recordings left open fail the default health check
+        pool = PianoPool(size=1)
+        with pool.checkout() as piano:
+            piano._sequencer.start_recording("left_open.wav")
+        self.assertEqual(pool.info().replaced, 1)
+
+    def test_close(self, mock_fluid_synth_sequencer):
+        pool = PianoPool(size=2)
+        piano = pool.acquire()
+        pool.close()
+        self.assertEqual(pool.info().created, 1)
+        self.assertRaises(RuntimeError, pool.acquire)
+        pool.release(piano)
+        self.assertEqual(pool.info()[1:4], (0, 0, 0))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import unittest
+import numpy
+from mingus.containers import Note, NoteContainer, Bar, Track
+from pypiano.render import compile_events, render_events, BlockReader, MidiEvent, NOTE_ON, NOTE_OFF
+from .mock_objects import MockSynth
+
+
+class RenderTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_compile_single_notes(self):
+        # Single notes and chords last a quarter note, which is half a second at 120 bpm
+        events, end = compile_events("A-4", sample_rate=1000)
+        self.assertEqual(events, [MidiEvent(0, NOTE_ON, 1, 69, 64), MidiEvent(500, NOTE_OFF, 1, 69, 0)])
+        self.assertEqual(end, 500)
+        self.assertEqual(compile_events("A-4", bpm=60, sample_rate=1000)[1], 1000)
+
+        events, _ = compile_events(NoteContainer(["C-4", "E-4"]))
+        self.assertEqual([(event.message, event.key) for event in events[:2]], [(NOTE_ON, 60), (NOTE_ON, 64)])
+        self.assertEqual({event.sample for event in events[2:]}, {22050})
+
+        events, _ = compile_events(0, sample_rate=1000)
+        self.assertEqual(events, [MidiEvent(0, NOTE_ON, 1, 21, 64), MidiEvent(500, NOTE_OFF, 1, 21, 0)])
+
+    def test_compile_track(self):
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        bar.place_rest(4)
+        bar.place_notes(NoteContainer(["C-4", "E-4"]), 2)
+        track = Track()
+        track.add_bar(bar)
+        track.add_bar(bar)
+
+        events, end = compile_events(track, sample_rate=1000)
+        # A quarter note at 120 bpm lasts half a second and a bar in 4/4 two seconds
+        self.assertEqual(end, 4000)
+        self.assertEqual(events[:2], [MidiEvent(0, NOTE_ON, 1, 60, 64), MidiEvent(500, NOTE_OFF, 1, 60, 0)])
+        # Note off events come before note on events at the same sample
+        self.assertEqual([event.message for event in events if event.sample == 2000], [NOTE_OFF] * 2 + [NOTE_ON])
+
+        _, end = compile_events(track, bpm=60, sample_rate=1000)
+        self.assertEqual(end, 8000)
+
+    def test_render_events(self):
+        synth = MockSynth()
+        blocks = []
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        events, end = compile_events(bar, sample_rate=1000)
+
+        render_events(synth, events, end + 3000, blocks.append, block_size=1024)
+        self.assertEqual(end, 500)
+        self.assertEqual(sum(len(block) for block in blocks), 2 * 3500)
+        self.assertTrue(all(len(block) <= 2 * 1024 for block in blocks))
+        self.assertEqual(synth.events, [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+        # Notes still sounding at the end are stopped
+        synth = MockSynth()
+        events, _ = compile_events(Note("C-4"))
+        render_events(synth, events, 100, blocks.append)
+        self.assertEqual(synth.events[-1], ("noteoff", 1, 60))
+
+    def test_block_reader(self):
+        reader = BlockReader(MockSynth(), block_size=64)
+        first = reader.read(1000)
+        second = reader.read(10)
+        self.assertEqual(len(first), 2 * 64)
+        self.assertEqual(len(second), 2 * 10)
+        self.assertTrue(numpy.shares_memory(first, second))
+
+    def test_render_release_tail(self):
+        synth = MockSynth()
+        blocks = []
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        events, end = compile_events(bar, sample_rate=1000)
+
+        # The mock synthesizer is silent, so rendering stops right at the end of the music container
+        self.assertEqual(render_events(synth, events, end, blocks.append, silence_threshold=32), 500)
+        self.assertEqual(synth.events, [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+        synth.get_samples = lambda frames: numpy.full(frames * 2, 1000, dtype=numpy.int16)
+        frames = render_events(
+            synth, events, end, blocks.append, block_size=100, silence_threshold=32, max_tail_frames=250
+        )
+        self.assertEqual(frames, 750)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import math
+import unittest
+from ctypes.util import find_library
+from unittest.mock import patch
+import numpy
+from mingus.containers import Note, NoteContainer, Bar
+from pypiano.piano import Piano
+from pypiano.render import compile_events
+from .mock_objects import MockFluidSynthSequencer
+
+
+class AdditiveSynth(object):
+    """Synthesizer adding up decaying sine waves of all sounding notes, like FluidSynth mixes its voices"""
+
+    def __init__(self):
+        self.audio_driver = None
+        self.frame = 0
+        self.voices = {}
+        self.noteons = 0
+
+    def noteon(self, chan, key, vel):
+        self.noteons += 1
+        self.voices[key] = (self.frame, vel)
+
+    def noteoff(self, chan, key):
+        self.voices.pop(key, None)
+
+    def cc(self, chan, ctrl, val):
+        self.voices.clear()
+
+    def program_reset(self):
+        return True
+
+    def get_samples(self, len):
+        frames = numpy.arange(self.frame, self.frame + len)
+        mix = numpy.zeros(len, dtype=numpy.int64)
+        for key, (start, velocity) in self.voices.items():
+            time = (frames - start) / 44100
+            mix += numpy.rint(velocity * 40 * numpy.exp(-time / 0.05) * numpy.sin(key * time * 50)).astype(numpy.int64)
+        self.frame += len
+        return numpy.repeat(numpy.clip(mix, -32768, 32767).astype(numpy.int16), 2)
+
+
+class AdditiveSequencer(MockFluidSynthSequencer):
+    def __init__(self):
+        super().__init__()
+        self.fs = AdditiveSynth()
+
+
+@patch("pypiano.piano.FluidSynthSequencer", side_effect=AdditiveSequencer)
+class SampleBankTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_render_chord(self, mock_fluid_synth_sequencer):
+        p = Piano(sample_bank_bytes=1 << 20)
+        direct = Piano()
+        chord = NoteContainer(["C-4", "E-4", "G-4"])
+
+        samples = p.render(chord, record_seconds=0.2)
+        numpy.testing.assert_array_equal(samples, direct.render(chord, record_seconds=0.2))
+        self.assertEqual(p.sample_bank.info()[:2], (0, 3))
+
+        noteons = p._synth.noteons
+        # Replayed chords are served from the cache and single notes as views of their buffer, both read-only
+        self.assertIs(p.render(chord, record_seconds=0.2), samples)
+        self.assertFalse(samples.flags.writeable)
+        self.assertEqual(p._synth.noteons, noteons)
+        single = p.sample_bank.render_chord([(60, 64)])
+        self.assertTrue(numpy.shares_memory(single, p.sample_bank._buffer(60, 64, 22050)[0]))
+        self.assertEqual(p.render(Note("C-4"), dtype="float32").shape[1], 2)
+        self.assertEqual(p.sample_bank.info()[:2], (4, 3))
+        self.assertEqual(p.sample_bank.check_fidelity([(60, 64), (64, 100)], frames=4410), math.inf)
+
+        p.load_instrument("Clavi")
+        p.render(chord, record_seconds=0.2)
+        self.assertEqual(p.sample_bank.info().misses, 7)
+
+    def test_memory_cap(self, mock_fluid_synth_sequencer):
+        p = Piano(sample_bank_bytes=1)
+        p.render(NoteContainer(["C-4", "E-4"]))
+        info = p.sample_bank.info()
+        self.assertEqual(info.entries, 1)
+        self.assertGreater(info.size, 0)
+
+    def test_gain_and_clipping(self, mock_fluid_synth_sequencer):
+        p = Piano(sample_bank_bytes=1 << 20)
+        p.sample_bank.gain = 1000.0
+        samples = p.sample_bank.render_chord([(60, 127)], frames=100)
+        self.assertEqual(samples.dtype, numpy.int16)
+        self.assertEqual(int(numpy.abs(samples.astype(numpy.int32)).max()), 32768)
+
+    def test_recording(self, mock_fluid_synth_sequencer):
+        p = Piano(sample_bank_bytes=1 << 24)
+        bar = Bar()
+        bar.place_notes("C-4", 4)
+        bar.place_notes("E-4", 4)
+        p.sample_bank.warm_up()
+        self.assertEqual(p.sample_bank.info().entries, 88)
+
+        noteons = p._synth.noteons
+        p.play(NoteContainer(["C-4", "E-4"]), recording_file="test.wav", record_seconds=0.1)
+        self.assertEqual(p._synth.noteons, noteons)
+        # Music containers that are not a chord on the piano channel are rendered by the synthesizer
+        self.assertIsNone(p.sample_bank.render_events(*compile_events(bar), None))
+
+
+@unittest.skipIf(find_library("fluidsynth") is None, "libfluidsynth is not installed")
+class SampleBankFluidSynthTests(unittest.TestCase):
+    """Test cases rendering with FluidSynth and the default sound fonts."""
+
+    def test_fidelity(self):
+        p = Piano(sample_bank_bytes=1 << 24)
+        bank = p.sample_bank
+        notes = [(60, 64), (64, 64), (67, 64)]
+        frames = 44100
+        # Reverb and chorus keep state across renders, so only the dry signal is expected to mix exactly
+        p._synth.cc(1, 91, 0)
+        p._synth.cc(1, 93, 0)
+        mixed = bank.render_chord(notes, frames).astype(numpy.float64)
+        direct = bank._render_direct(bank._chord_events(notes, 22050), 22050, frames).astype(numpy.float64)
+
+        # FluidSynth starts each note at the next block of 64 frames and dithers its int16 output by up to 1.5 LSB.
+        # The error is bounded by the worst misalignment of every note plus the dither of every render
+        bound = math.sqrt(direct.size) * 1.5 * (len(notes) + 1)
+        for key, velocity in notes:
+            buffer = numpy.zeros((frames + 64, 2))
+            note = bank._buffer(key, velocity, 22050)[0][:frames]
+            buffer[64 : 64 + len(note)] = note
+            bound += max(
+                numpy.linalg.norm(buffer[64 : 64 + frames] - buffer[64 - shift : 64 - shift + frames])
+                for shift in range(1, 64)
+            )
+        self.assertLessEqual(numpy.linalg.norm(mixed - direct), bound)
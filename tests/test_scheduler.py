@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import unittest
+from mingus.containers import Bar
+from pypiano.scheduler import compile_schedule, EventScheduler
+from pypiano.render import NOTE_ON, NOTE_OFF
+from .mock_objects import MockSynth
+
+
+class FakeClock(object):
+    """Clock that advances by a fixed step on every reading and by the requested time on every sleep"""
+
+    def __init__(self, step: float = 0.0001) -> None:
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class SchedulerTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self) -> None:
+        self.bar = Bar()
+        self.bar.place_notes("C-4", 4)
+        self.bar.place_notes("E-4", 4)
+
+    def test_compile_schedule(self):
+        schedule = compile_schedule(self.bar)
+        self.assertEqual(schedule["time"].tolist(), [0.0, 0.5, 0.5, 1.0])
+        self.assertEqual(schedule["message"].tolist(), [NOTE_ON, NOTE_OFF, NOTE_ON, NOTE_OFF])
+        self.assertEqual(compile_schedule(self.bar, bpm=240)["time"][-1], 0.5)
+
+    def test_run(self):
+        clock = FakeClock()
+        synth = MockSynth()
+        stats = EventScheduler(synth, lookahead=0.002, clock=clock, sleep=clock.sleep).run(compile_schedule(self.bar))
+
+        self.assertEqual(stats.events, 4)
+        self.assertEqual(synth.events[0], ("noteon", 1, 60, 64))
+        self.assertLess(stats.max_latency, 0.001)
+        # Sleeping stops before events are due, so the total time is the length of the bar and does not drift
+        self.assertAlmostEqual(clock.now, 1.0, places=2)
+
+    def test_stop(self):
+        clock = FakeClock()
+        synth = MockSynth()
+        scheduler = EventScheduler(synth, clock=clock)
+
+        def sleep(seconds):
+            scheduler.stop()
+
+        scheduler._sleep = sleep
+        stats = scheduler.run(compile_schedule(self.bar))
+        self.assertEqual(stats.events, 1)
+        self.assertEqual(synth.events, [("noteon", 1, 60, 64), ("noteoff", 1, 60)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from mingus.containers import Bar
+from pypiano.cache import RenderCache
+from pypiano.piano import Piano
+from pypiano.session import PianoSession, MAX_CHANNELS, DRUM_CHANNEL
+from .mock_objects import MockFluidSynthSequencer
+
+
+@patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
+class PianoSessionTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def test_new_piano(self, mock_fluid_synth_sequencer):
+        session = PianoSession()
+        sequencer = mock_fluid_synth_sequencer.return_value
+
+        grand = session.new_piano()
+        clavi = session.new_piano("Clavi")
+        self.assertEqual((grand.channel, clavi.channel), (1, 0))
+        self.assertEqual(sequencer.programs[0], 7)
+
+        clavi.load_instrument("Harpsichord")
+        self.assertEqual((clavi.instrument, sequencer.programs[0]), ("Harpsichord", 6))
+        with self.assertRaises(ValueError):
+            session.new_piano(channel=1)
+        with self.assertRaises(ValueError):
+            session.new_piano("Violin")
+
+        handles = [session.new_piano() for _ in range(MAX_CHANNELS - 2)]
+        self.assertEqual(handles[-1].channel, DRUM_CHANNEL)
+        with self.assertRaises(RuntimeError):
+            session.new_piano()
+
+        clavi.release()
+        self.assertEqual(session.new_piano().channel, 0)
+        with self.assertRaises(RuntimeError):
+            clavi.play("C-4")
+
+    def test_piano_channel(self, mock_fluid_synth_sequencer):
+        with tempfile.TemporaryDirectory() as directory:
+            session = PianoSession(piano=Piano(render_cache=RenderCache(directory)))
+            handle = session.new_piano("Harpsichord")
+            recording_file = os.path.join(directory, "bar.wav")
+            bar = Bar()
+            bar.place_notes("C-4", 4)
+
+            # The handle on channel 1 selects the instrument of the piano itself
+            self.assertEqual((handle.channel, session.piano.instrument), (1, "Harpsichord"))
+            session.piano.play(bar, recording_file=recording_file)
+            handle.load_instrument("Clavi")
+            self.assertEqual(session.piano.instrument, "Clavi")
+            # The recording of the previous instrument is not served from the render cache
+            session.piano.play(bar, recording_file=recording_file)
+            self.assertEqual(session.piano.render_cache.info()[:2], (0, 2))
+
+    def test_render_mix(self, mock_fluid_synth_sequencer):
+        session = PianoSession()
+        synth = mock_fluid_synth_sequencer.return_value.fs
+        first, second = session.new_piano(), session.new_piano("Clavi")
+        short_bar, long_bar = Bar(), Bar()
+        short_bar.place_notes("C-4", 4)
+        long_bar.place_notes("E-4", 2)
+
+        synth.events.clear()
+        samples = session.render([(first, short_bar), (second, long_bar)], record_seconds=0)
+        # The mix lasts as long as the longest part, a half note at 120 bpm
+        self.assertEqual(samples.shape, (44100, 2))
+        self.assertEqual(
+            synth.events, [("noteon", 0, 64, 64), ("noteon", 1, 60, 64), ("noteoff", 1, 60), ("noteoff", 0, 64)]
+        )
+
+        # At 60 bpm the half note lasts twice as long
+        samples = session.render([(first, short_bar), (second, long_bar)], record_seconds=0, bpm=60)
+        self.assertEqual(samples.shape, (88200, 2))
+        self.assertEqual(first.render(short_bar, record_seconds=0, bpm=60).shape, (44100, 2))
+
+        with self.assertRaises(ValueError):
+            PianoSession().render([(first, short_bar)])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import patch
+from pypiano.piano import Piano
+from pypiano.sf2 import read_sound_font_info, sound_font_info, SoundFontPreset
+from .mock_objects import MockFluidSynthSequencer
+
+
+def chunk(chunk_id: bytes, data: bytes) -> bytes:
+    return struct.pack("<4sI", chunk_id, len(data)) + data + b"\0" * (len(data) & 1)
+
+
+def make_sound_font(presets, sample_data: bytes = b"\0" * 64, name: bytes = b"Test Font") -> bytes:
+    """Build a minimal SF2 file with preset headers but without instruments"""
+    records = b"".join(struct.pack("<20sHHHIII", *preset, 0, 0, 0, 0) for preset in presets + [(b"EOP", 0, 0)])
+    info = chunk(b"LIST", b"INFO" + chunk(b"ifil", struct.pack("<HH", 2, 4)) + chunk(b"INAM", name + b"\0"))
+    sdta = chunk(b"LIST", b"sdta" + chunk(b"smpl", sample_data))
+    pdta = chunk(b"LIST", b"pdta" + chunk(b"phdr", records))
+    return chunk(b"RIFF", b"sfbk" + info + sdta + pdta)
+
+
+class SoundFontReaderTests(unittest.TestCase):
+    """Basic test cases."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sf2")
+        presets = [(b"Strings", 48, 0), (b"Piano", 0, 0), (b"Drums", 0, 128)]
+        os.write(handle, make_sound_font(presets, sample_data=b"\1" * 1000))
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_read_sound_font_info(self):
+        info = read_sound_font_info(self.path)
+        self.assertEqual(info.version, (2, 4))
+        self.assertEqual(info.name, "Test Font")
+        self.assertEqual(
+            info.presets,
+            (SoundFontPreset("Piano", 0, 0), SoundFontPreset("Strings", 0, 48), SoundFontPreset("Drums", 128, 0)),
+        )
+        self.assertEqual(info.sample_data_size, 1000)
+        self.assertIs(sound_font_info(self.path), sound_font_info(self.path))
+
+    def test_invalid_files(self):
+        with open(self.path, "wb") as sound_fonts_file:
+            sound_fonts_file.write(b"version https://git-lfs.github.com/spec/v1")
+        with self.assertRaises(ValueError):
+            read_sound_font_info(self.path)
+        with open(self.path, "wb") as sound_fonts_file:
+            sound_fonts_file.write(make_sound_font([])[:-10])
+        with self.assertRaises(ValueError):
+            read_sound_font_info(self.path)
+        with open(self.path, "wb"):
+            pass
+        with self.assertRaises(ValueError):
+            read_sound_font_info(self.path)
+
+    @patch("pypiano.piano.FluidSynthSequencer", return_value=MockFluidSynthSequencer())
+    def test_load_instrument(self, mock_fluid_synth_sequencer):
+        p = Piano(sound_fonts_path=self.path, instrument="Strings")
+        self.assertEqual(mock_fluid_synth_sequencer.return_value.programs[1], 48)
+        p.load_instrument(0)
+        self.assertEqual(p.instrument, 0)
+        with self.assertRaises(ValueError):
+            p.load_instrument("Drums")
+        with self.assertRaises(ValueError):
+            p.load_instrument(5)